@@ -0,0 +1,161 @@
+# -*- coding:utf8 -*-
+
+
+"""============================================================================
+								ENUNCIADO 5
+								PRACTICA 2
+
+	BEURIER Erwan
+	CANAVATE VEGA Fernando
+	DE LA ROSA Augustin
+	NAPOLI Luca
+
+	This file contains the implementation of the class ArrivalProcess, the
+	non-homogeneous Poisson process of the arrivals of the oil tankers.
+
+	Useful methods:
+		generate()
+		nextArrival()
+	(The rest is supposed to be private, even if Python doesn't know about
+	encapsulation)
+
+	This file is not supposed to be launched via console.
+
+	Vocabulary (because the code is in English but the wording is in Spanish):
+		oil tanker	= petrolero
+
+
+============================================================================"""
+
+
+import numpy
+
+
+# The daily profile of the rate of arrivals (oil tankers per hour). The rate
+# is linear between two consecutive hours of the list, and periodic over 24h.
+HOURS = numpy.array([0.0, 5.0, 9.0, 15.0, 17.0, 24.0])
+RATES = numpy.array([5.0, 7.0, 6.0, 9.0, 6.0, 5.0])
+SLOPES = numpy.diff(RATES) / numpy.diff(HOURS)
+# Expected number of arrivals between 0h and each hour of HOURS.
+CUMULRATES = numpy.concatenate([[0.0], numpy.cumsum((RATES[:-1] + RATES[1:]) / 2.0 * numpy.diff(HOURS))])
+DAILYARRIVALS = CUMULRATES[-1]
+
+
+def rate(minutes):
+	"""
+	Returns the rate of arrivals (oil tankers per hour) at the given time.
+
+	Arguments:
+		minutes			Time in minutes since the beginning of the simulation
+						(which starts at 0h).
+	"""
+	t = (minutes / 60.0) % 24.0
+	segment = min(numpy.searchsorted(HOURS, t, side = "right") - 1, len(SLOPES) - 1)
+	return float(RATES[segment] + SLOPES[segment] * (t - HOURS[segment]))
+
+
+def cumulativeRate(hours):
+	"""
+	Returns the expected number of arrivals between 0 and "hours" (integral of
+	the rate). Works on floats and on numpy arrays.
+
+	Arguments:
+		hours			Time in hours.
+	"""
+	days = numpy.floor(hours / 24.0)
+	t = hours - days * 24.0
+	segment = numpy.clip(numpy.searchsorted(HOURS, t, side = "right") - 1, 0, len(SLOPES) - 1)
+	x = t - HOURS[segment]
+	return days * DAILYARRIVALS + CUMULRATES[segment] + RATES[segment] * x + SLOPES[segment] * x * x / 2.0
+
+
+def inverseCumulativeRate(arrivals):
+	"""
+	Inverse of cumulativeRate(): returns the time in hours at which the
+	expected number of arrivals reaches "arrivals". On each segment the
+	integral of the rate is quadratic, so the inverse is exact. Works on
+	floats and on numpy arrays.
+
+	Arguments:
+		arrivals		Expected number of arrivals since 0h.
+	"""
+	days = numpy.floor(arrivals / DAILYARRIVALS)
+	s = arrivals - days * DAILYARRIVALS
+	segment = numpy.clip(numpy.searchsorted(CUMULRATES, s, side = "right") - 1, 0, len(SLOPES) - 1)
+	d = s - CUMULRATES[segment]
+	r0 = RATES[segment]
+	# Root of SLOPES/2 x^2 + r0 x - d = 0, in a form that is also valid when
+	# the slope is 0.
+	x = 2.0 * d / (r0 + numpy.sqrt(r0 * r0 + 2.0 * SLOPES[segment] * d))
+	return days * 24.0 + HOURS[segment] + x
+
+
+class ArrivalProcess:
+	"""
+	Generates the arrival times of the oil tankers, a non-homogeneous Poisson
+	process with the daily rate profile of HOURS and RATES.
+	The times are the inverse images, by the integral of the rate, of the
+	times of a Poisson process of rate 1. The arrivals are generated by blocks
+	of "blockLength" minutes and handed out one by one by nextArrival().
+
+	Attributes:
+		randomState		The numpy.random.RandomState used to draw the
+						arrivals.
+		blockLength		Length (in minutes) of a block of arrivals.
+		blockEnd		End (in minutes) of the last generated block.
+		arrivals		List of the arrival times of the current block.
+		index			Index in "arrivals" of the next arrival to hand out.
+	"""
+
+	def __init__(self, seed = None, blockLength = 24*60):
+		"""
+		Constructor. The first block is generated at the first call to
+		nextArrival().
+
+		Arguments:
+			seed			Seed of the numpy.random.RandomState. None to seed
+							from the system.
+			blockLength		Length (in minutes) of a block of arrivals. One
+							day by default.
+		"""
+		self.randomState = numpy.random.RandomState(seed)
+		self.blockLength = blockLength
+		self.blockEnd = 0.0
+		self.arrivals = []
+		self.index = 0
+
+
+	def generate(self, start, end):
+		"""
+		Returns the sorted numpy array of the arrival times (in minutes) in
+		[start, end[. Because of the lack of memory of the Poisson process,
+		consecutive intervals can be generated independently.
+
+		Arguments:
+			start			Beginning of the interval, in minutes.
+			end				End of the interval, in minutes.
+		"""
+		first = cumulativeRate(start / 60.0)
+		last = cumulativeRate(end / 60.0)
+		expected = last - first
+		size = int(expected + 5.0 * numpy.sqrt(expected) + 10)
+
+		points = first + numpy.cumsum(self.randomState.exponential(1.0, size))
+		while points[-1] < last:
+			points = numpy.concatenate([points, points[-1] + numpy.cumsum(self.randomState.exponential(1.0, size))])
+
+		points = points[:numpy.searchsorted(points, last)]
+		return 60.0 * inverseCumulativeRate(points)
+
+
+	def nextArrival(self):
+		"""
+		Returns the time (in minutes) of the next arrival. Generates the next
+		block(s) if needed.
+		"""
+		while self.index >= len(self.arrivals):
+			self.arrivals = self.generate(self.blockEnd, self.blockEnd + self.blockLength).tolist()
+			self.blockEnd += self.blockLength
+			self.index = 0
+		self.index += 1
+		return self.arrivals[self.index - 1]
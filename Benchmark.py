@@ -0,0 +1,309 @@
+# -*- coding:utf8 -*-
+
+
+"""============================================================================
+								ENUNCIADO 5
+								PRACTICA 2
+
+	BEURIER Erwan
+	CANAVATE VEGA Fernando
+	DE LA ROSA Augustin
+	NAPOLI Luca
+
+	This file contains the implementation of the class Benchmark, that
+	measures the speed and the memory of the simulation on a fixed set of
+	scenarios with fixed seeds, saves the measures in a JSON file and compares
+	them with a baseline.
+
+	Useful methods:
+		run()
+		save()
+		compare()
+		printMeasures()
+	(The rest is supposed to be private, even if Python doesn't know about
+	encapsulation)
+
+	This file can be launched via console:
+		python Benchmark.py [--output file] [--baseline file]
+						[--tolerance t] [--repeat k] [--scenarios a,b]
+
+	Arguments:
+		--output file	Saves the measures in the JSON file "file".
+		--baseline file	Compares the measures with the ones saved in "file"
+						(by "--output"). Exits with the status 1 if a scenario
+						is slower or uses more memory than the baseline by
+						more than the tolerance.
+		--tolerance t	Relative tolerance of the comparison. Default is 0.1
+						(10%).
+		--repeat k		Runs every scenario "k" times and keeps the fastest
+						run. Default is 3.
+		--scenarios a,b	Only runs the given scenarios (names of SCENARIOS).
+
+
+============================================================================"""
+
+
+import json
+import multiprocessing
+import platform
+import sys
+import time
+import timeit
+import PortSimulation
+import Profiler
+
+try:
+	import resource
+except ImportError: # Not available on Windows: no memory measures.
+	resource = None
+
+
+DAY = 24*60
+WEEK = 7*DAY
+YEAR = 52*WEEK
+
+# The scenarios: name, number of wharves, number of tugs, duration of the
+# simulation and value of PortSimulation.SAFEPORT. The daily profile of the
+# arrivals brings about 155 oil tankers a day, that each stay 3 hours at a
+# wharf on average: 20 wharves are a busy port, 5 wharves and 2 tugs an
+# overloaded one, 600 wharves and 50 tugs an underloaded one.
+SCENARIOS = [("day-default", 20, 10, DAY, False),
+			("day-default-safe", 20, 10, DAY, True),
+			("week-default", 20, 10, WEEK, False),
+			("week-default-safe", 20, 10, WEEK, True),
+			("week-overloaded", 5, 2, WEEK, False),
+			("week-overloaded-safe", 5, 2, WEEK, True),
+			("week-underloaded", 600, 50, WEEK, False),
+			("week-large", 5000, 2000, WEEK, False),
+			("year-default", 20, 10, YEAR, False),
+			("year-underloaded-safe", 600, 50, YEAR, True)]
+
+SEED = 20170401
+
+
+def runScenario(arguments):
+	"""
+	Simulates one scenario "repeat" times and returns its measures as a
+	dictionary: number of events, time of the fastest run (in seconds),
+	events per second, peak memory of the process (in kB, None if unknown)
+	and, from one more run with a Profiler, the time spent in every routine
+	(in seconds) and its number of calls.
+	Module-level function, so it can be run in a new process (the peak memory
+	of a process never decreases).
+
+	Arguments:
+		arguments		Tuple (scenario, repeat, seed).
+	"""
+	(name, maxWharves, maxTugs, timeSimulation, safe), repeat, seed = arguments
+	PortSimulation.SAFEPORT = safe
+	PortSimulation.BATCHMODE = True
+
+	best = None
+	for i in xrange(repeat):
+		port = PortSimulation.Port(maxWharves, maxTugs, timeSimulation, seed = seed)
+		t = timeit.default_timer()
+		port.simulate()
+		t = timeit.default_timer() - t
+		if best is None or t < best:
+			best = t
+	events = port.numEvents
+
+	peakMemory = None
+	if resource is not None:
+		peakMemory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+	port = PortSimulation.Port(maxWharves, maxTugs, timeSimulation, seed = seed)
+	port.profiler = Profiler.Profiler()
+	port.simulate()
+	routines = port.profiler.methods
+
+	return {"events": events,
+			"seconds": best,
+			"eventsPerSecond": events / best,
+			"peakMemory": peakMemory,
+			"routines": routines}
+
+
+class Benchmark:
+	"""
+	Runs the scenarios, each one in a new process, and keeps their measures.
+
+	Attributes:
+		scenarios		List of the scenarios to run (cf. SCENARIOS).
+		repeat			Number of runs of every scenario.
+		seed			Seed of every simulation.
+		measures		Dictionary (name of the scenario, measures), cf.
+						runScenario(). Empty until run() is called.
+	"""
+
+	def __init__(self, scenarios = SCENARIOS, repeat = 3, seed = SEED):
+		"""
+		Constructor.
+
+		Arguments:
+			scenarios		List of the scenarios to run.
+			repeat			Number of runs of every scenario. The fastest one
+							is kept.
+			seed			Seed of every simulation.
+		"""
+		self.scenarios = list(scenarios)
+		self.repeat = repeat
+		self.seed = seed
+		self.measures = {}
+
+
+	def run(self):
+		"""
+		Runs every scenario and returns the measures.
+		"""
+		for scenario in self.scenarios:
+			pool = multiprocessing.Pool(1)
+			try:
+				self.measures[scenario[0]] = pool.apply(runScenario, ((scenario, self.repeat, self.seed),))
+			finally:
+				pool.close()
+				pool.join()
+			print scenario[0] + ": " + str(int(self.measures[scenario[0]]["eventsPerSecond"])) + " events/s"
+		return self.measures
+
+
+	def save(self, path):
+		"""
+		Saves the measures in the JSON file "path", with a description of the
+		machine.
+
+		Arguments:
+			path			The JSON file.
+		"""
+		content = {"python": platform.python_version(),
+					"machine": platform.platform(),
+					"date": time.strftime("%Y-%m-%d %H:%M:%S"),
+					"repeat": self.repeat,
+					"seed": self.seed,
+					"scenarios": self.measures}
+		f = open(path, "w")
+		json.dump(content, f, indent = 1, sort_keys = True)
+		f.close()
+
+
+	def compare(self, path, tolerance = 0.1):
+		"""
+		Compares the measures with the baseline saved in "path". Returns the
+		list of the regressions, as strings: a scenario is slower than the
+		baseline (events per second) or uses more memory, by more than
+		"tolerance" (relative). A different number of events means that the
+		model changed, which is reported too.
+		Scenarios missing from the baseline are ignored.
+
+		Arguments:
+			path			The JSON file of the baseline.
+			tolerance		Relative tolerance.
+		"""
+		baseline = json.load(open(path))["scenarios"]
+		regressions = []
+		for scenario in self.scenarios:
+			name = scenario[0]
+			if name not in baseline or name not in self.measures:
+				continue
+			old = baseline[name]
+			new = self.measures[name]
+			if new["events"] != old["events"]:
+				regressions.append(name + ": " + str(new["events"]) + " events instead of " + str(old["events"]) + " (the model changed)")
+			if new["eventsPerSecond"] < old["eventsPerSecond"] * (1 - tolerance):
+				regressions.append(name + ": " + Benchmark.formatChange(new["eventsPerSecond"], old["eventsPerSecond"]) + " events per second")
+			if new["peakMemory"] is not None and old["peakMemory"] is not None and new["peakMemory"] > old["peakMemory"] * (1 + tolerance):
+				regressions.append(name + ": " + Benchmark.formatChange(new["peakMemory"], old["peakMemory"]) + " peak memory")
+		return regressions
+
+
+	def printMeasures(self, baselinePath = None):
+		"""
+		Prints a table of the measures, with the change of speed relative to
+		the baseline if "baselinePath" is given, and the three routines that
+		take the most time in every scenario.
+
+		Arguments:
+			baselinePath	The JSON file of the baseline, or None.
+		"""
+		baseline = {}
+		if baselinePath is not None:
+			baseline = json.load(open(baselinePath))["scenarios"]
+
+		print "--------------------------------------------"
+		print "%-24s %10s %10s %12s %10s  %s" % ("Scenario", "Events", "Seconds", "Events/s", "Peak kB", "vs baseline")
+		for scenario in self.scenarios:
+			name = scenario[0]
+			m = self.measures[name]
+			change = ""
+			if name in baseline:
+				change = Benchmark.formatChange(m["eventsPerSecond"], baseline[name]["eventsPerSecond"])
+			print "%-24s %10d %10.3f %12.0f %10s  %s" % (name, m["events"], m["seconds"], m["eventsPerSecond"], m["peakMemory"], change)
+		print "--------------------------------------------"
+		print "Time per routine (timed run, including the methods they call):"
+		for scenario in self.scenarios:
+			name = scenario[0]
+			routines = sorted(self.measures[name]["routines"].iteritems(), key = lambda item: -item[1][0])
+			print name + ": " + ", ".join(routine + " " + ("%.3f" % seconds) + "s/" + str(calls) for routine, (seconds, calls) in routines[:3])
+		print "--------------------------------------------"
+
+
+
+
+	"""========================================================================
+	Below these two lines are functions that are not crucial to the
+	understanding of the code.
+	========================================================================"""
+
+	@staticmethod
+	def formatChange(new, old):
+		"""
+		Returns the relative change from "old" to "new" as a string, e.g.
+		"+12.3%".
+		"""
+		if old == 0:
+			return "n/a"
+		return "%+.1f%%" % (100.0 * (new - old) / old)
+
+
+
+
+"""============================================================================
+	M 	  M       A 	  II	NN     N
+	MM	 MM      A A	  II   	N N    N
+	M M	M M     A   A	  II   	N  N   N
+	M  M  M     AAAAA	  II   	N   N  N
+	M	  M    A     A	  II	N    N N
+	M 	  M	  A       A   II	N     NN
+============================================================================"""
+
+if __name__=="__main__":
+	options = {"output": None, "baseline": None, "tolerance": 0.1, "repeat": 3, "scenarios": None}
+
+	for i in xrange(1, len(sys.argv) - 1):
+		if sys.argv[i] in ("--output", "--baseline"):
+			options[sys.argv[i][2:]] = sys.argv[i+1]
+		elif sys.argv[i] == "--tolerance":
+			options["tolerance"] = float(sys.argv[i+1])
+		elif sys.argv[i] == "--repeat":
+			options["repeat"] = int(sys.argv[i+1])
+		elif sys.argv[i] == "--scenarios":
+			options["scenarios"] = sys.argv[i+1].split(",")
+
+	scenarios = SCENARIOS
+	if options["scenarios"] is not None:
+		scenarios = [scenario for scenario in SCENARIOS if scenario[0] in options["scenarios"]]
+
+	benchmark = Benchmark(scenarios, options["repeat"])
+	benchmark.run()
+	benchmark.printMeasures(options["baseline"])
+	if options["output"] is not None:
+		benchmark.save(options["output"])
+
+	if options["baseline"] is not None:
+		regressions = benchmark.compare(options["baseline"], options["tolerance"])
+		if regressions:
+			print "Regressions (tolerance " + str(options["tolerance"]) + "):"
+			for regression in regressions:
+				print "\t" + regression
+			sys.exit(1)
+		print "No regression (tolerance " + str(options["tolerance"]) + ")."
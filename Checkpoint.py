@@ -0,0 +1,135 @@
+# -*- coding:utf8 -*-
+
+
+"""============================================================================
+								ENUNCIADO 5
+								PRACTICA 2
+
+	BEURIER Erwan
+	CANAVATE VEGA Fernando
+	DE LA ROSA Augustin
+	NAPOLI Luca
+
+	This file contains the functions to save and load the whole state of a
+	simulation of the port, and the class Checkpointer that saves it
+	regularly during Port.simulate().
+
+	Useful methods:
+		save()
+		load()
+		Checkpointer.tick()
+	(The rest is supposed to be private, even if Python doesn't know about
+	encapsulation)
+
+	This file is not supposed to be launched via console.
+
+
+============================================================================"""
+
+
+import cPickle
+import os
+import time
+import zlib
+import PortSimulation
+
+
+def save(port, path):
+	"""
+	Saves the whole state of "port" (counters, queues, ListEvents, oil
+	tankers, random generators) and the policy PortSimulation.SAFEPORT in the
+	file "path". The file is replaced atomically, so a crash while saving
+	leaves the previous checkpoint intact.
+	The trace, the checkpointer and the profiler of the port are not saved.
+
+	Arguments:
+		port			The Port to save. Supposed to be between two events.
+		path			The file of the checkpoint.
+	"""
+	if port.profiler is not None: # Its timed methods can't be pickled.
+		port.profiler.detach(port)
+	data = zlib.compress(cPickle.dumps({"port": port, "safe": PortSimulation.SAFEPORT}, 2))
+	if port.profiler is not None:
+		port.profiler.attach(port)
+	temporary = path + ".tmp"
+	f = open(temporary, "wb")
+	f.write(data)
+	f.flush()
+	os.fsync(f.fileno())
+	f.close()
+	os.rename(temporary, path)
+
+
+def load(path):
+	"""
+	Loads a checkpoint saved by save(). Restores PortSimulation.SAFEPORT and
+	returns the Port. Calling simulate() on it continues the simulation where
+	it stopped, with the same results as a simulation that was never
+	interrupted.
+
+	Arguments:
+		path			The file of the checkpoint.
+	"""
+	f = open(path, "rb")
+	content = cPickle.loads(zlib.decompress(f.read()))
+	f.close()
+	PortSimulation.SAFEPORT = content["safe"]
+	return content["port"]
+
+
+class Checkpointer:
+	"""
+	Saves a Port every "everyEvents" events and/or every "everySeconds"
+	seconds of wall-clock time. Port.simulate() calls tick() after each event
+	if the port has a checkpointer.
+
+	Attributes:
+		path			The file of the checkpoint.
+		everyEvents		Number of events between two checkpoints, or None.
+		everySeconds	Wall-clock seconds between two checkpoints, or None.
+		events			Number of events since the last checkpoint.
+		lastSave		Wall-clock time of the last checkpoint.
+	"""
+
+	def __init__(self, path, everyEvents = None, everySeconds = None):
+		"""
+		Constructor.
+
+		Arguments:
+			path			The file of the checkpoint.
+			everyEvents		Number of events between two checkpoints, or None.
+			everySeconds	Wall-clock seconds between two checkpoints, or
+							None.
+		"""
+		self.path = path
+		self.everyEvents = everyEvents
+		self.everySeconds = everySeconds
+		self.events = 0
+		self.lastSave = time.time()
+
+
+	def tick(self, port):
+		"""
+		Counts an event and saves "port" if it is time to. The clock is only
+		read every 256 events.
+
+		Arguments:
+			port			The Port to save.
+		"""
+		self.events += 1
+		if self.everyEvents is not None and self.events >= self.everyEvents:
+			self.save(port)
+		elif self.everySeconds is not None and self.events % 256 == 0 and time.time() - self.lastSave >= self.everySeconds:
+			self.save(port)
+
+
+	def save(self, port):
+		"""
+		Saves "port" now.
+
+		Arguments:
+			port			The Port to save.
+		"""
+		save(port, self.path)
+		self.events = 0
+		self.lastSave = time.time()
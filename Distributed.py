@@ -0,0 +1,501 @@
+# -*- coding:utf8 -*-
+
+
+"""============================================================================
+								ENUNCIADO 5
+								PRACTICA 2
+
+	BEURIER Erwan
+	CANAVATE VEGA Fernando
+	DE LA ROSA Augustin
+	NAPOLI Luca
+
+	This file contains the implementation of the class Coordinator, that hands
+	out replications of the simulation (work units) to workers over TCP, and
+	of the function runWorker(), that runs them. The workers are stateless:
+	they can run on any number of machines, be started before or after the
+	coordinator, and crash. The unit of a worker whose connection is lost, or
+	that takes too long, is given to another worker.
+	Every result comes back with a summary (Statistics, cf. summarize()) that
+	the coordinator merges.
+
+	Useful methods:
+		Coordinator.run()
+		Coordinator.printSummary()
+		runWorker()
+		getAuthKey()
+	(The rest is supposed to be private, even if Python doesn't know about
+	encapsulation)
+
+	This file can be launched via console:
+		python Distributed.py coordinator [--host h] [--port p] [--days d]
+						[--hours h] [--mins m] [--wharves w] [--tugs t]
+						[--replications n] [--seed s] [--safe] [--fast]
+						[--timeout s] [--local k] [--export file]
+						[--cache directory]
+		python Distributed.py worker host:port
+
+	Arguments:
+		coordinator		Runs the coordinator, which waits for the workers.
+		worker host:port	Runs a worker connected to the coordinator at
+						"host:port". It stops when the coordinator has no more
+						work.
+		--host h		Interface of the coordinator. Default is 127.0.0.1;
+						0.0.0.0 to accept workers from other machines (needs
+						PORTSIM_AUTHKEY, see below).
+		--port p		Port of the coordinator. Default is 6005.
+		--days d		Adds "d" days to every simulation. Default time is set
+						to one week. (Same for --hours and --mins.)
+		--wharves w		Number of wharves. Default is 20.
+		--tugs t		Number of tugs. Default is 10.
+		--replications n	Number of replications (work units). Default is
+						10.
+		--seed s		Master seed of the replications: the results are the
+						same as with Replications, whatever the workers.
+		--safe			Uses the safe mode of the Port (cf.
+						PortSimulation.SAFEPORT).
+		--fast			The workers simulate with FastKernel.FastPort.
+		--timeout s		A unit is given to another worker if its result
+						doesn't come back within "s" seconds. Default is 3600.
+		--local k		Also starts "k" workers on this machine.
+		--export file	Saves the record of every replication in "file" (cf.
+						Records).
+		--cache directory	The workers use the ResultCache in "directory"
+						(a directory shared by the machines).
+	The connections are authenticated with the key of the environment
+	variable PORTSIM_AUTHKEY (the same for the coordinator and the workers).
+	It is mandatory unless the coordinator is on a loopback address (e.g.
+	127.0.0.1): the messages are pickles, so anyone knowing the key can run
+	code on the coordinator and on the workers.
+
+
+============================================================================"""
+
+
+import collections
+import math
+import multiprocessing
+import multiprocessing.connection
+import os
+import socket
+import sys
+import threading
+import time
+import PortSimulation
+import RandomStreams
+import Records
+import Replications
+import ResultCache
+import Statistics
+
+
+# The key of the connections (None if PORTSIM_AUTHKEY is not set), and the
+# public key used instead on a loopback address only (cf. getAuthKey()).
+AUTHKEY = os.environ.get("PORTSIM_AUTHKEY")
+LOCALAUTHKEY = "enunciado5"
+
+
+def summarize(record):
+	"""
+	Returns the summary of the record of one replication: a Statistics with
+	one Observational per result of PortSimulation.RESULTS (NaN values are
+	not observed). Summaries are merged with Statistics.merge(), in any
+	order and on any machine.
+
+	Arguments:
+		record			The record of a replication (cf. Port.getRecord()).
+	"""
+	summary = Statistics.Statistics()
+	for name, label, unit in PortSimulation.RESULTS:
+		summary.registerObservational(name)
+		if record is not None and record[name] == record[name]:
+			summary.observe(name, record[name])
+	return summary
+
+
+def getAuthKey(host):
+	"""
+	Returns the key of the connections to or from "host": AUTHKEY if
+	PORTSIM_AUTHKEY is set, otherwise LOCALAUTHKEY if "host" is a loopback
+	address. Raises an Exception for any other address: the messages are
+	unpickled, so a public key would let anyone reaching the port run code.
+
+	Arguments:
+		host			Host name or address of the coordinator.
+	"""
+	if AUTHKEY is not None:
+		return AUTHKEY
+	try:
+		loopback = socket.gethostbyname(host).startswith("127.")
+	except socket.error:
+		loopback = False
+	if not loopback:
+		raise Exception("Set the environment variable PORTSIM_AUTHKEY (the same secret on the coordinator and the workers) to use the address " + repr(host) + ".")
+	return LOCALAUTHKEY
+
+
+def runWorker(address, authkey = None, patience = 60.0):
+	"""
+	Runs a worker: asks the coordinator at "address" for units, runs them
+	(cf. Replications.runReplication()) and sends back their records and
+	summaries, until the coordinator says stop or disappears. Returns the
+	number of units run.
+
+	Arguments:
+		address			Tuple (host, port) of the coordinator.
+		authkey			Key of the connection. None for getAuthKey().
+		patience		Number of seconds during which the worker tries to
+						connect, if the coordinator isn't started yet.
+	"""
+	if authkey is None:
+		authkey = getAuthKey(address[0])
+	name = socket.gethostname() + ":" + str(os.getpid())
+	deadline = time.time() + patience
+	while True:
+		try:
+			connection = multiprocessing.connection.Client(address, authkey = authkey)
+			break
+		except socket.error:
+			if time.time() > deadline:
+				raise
+			time.sleep(0.5)
+
+	numUnits = 0
+	try:
+		while True:
+			connection.send(("request", name))
+			message = connection.recv()
+			if message[0] == "unit":
+				unit, arguments = message[1], message[2]
+				record = Replications.runReplication(arguments)
+				connection.send(("result", unit, record, summarize(record)))
+				numUnits += 1
+			elif message[0] == "wait":
+				time.sleep(message[1])
+			else:
+				break
+	except (EOFError, IOError):
+		pass # The coordinator is gone: nothing left to do.
+	finally:
+		connection.close()
+	return numUnits
+
+
+class Coordinator:
+	"""
+	Hands out work units to the workers that connect to it, one unit at a
+	time per worker. Every connection is served by its own thread.
+	A unit handed out is leased to its worker: if the connection is lost
+	before the result comes back (the worker crashed), or if the lease is
+	older than "timeout" (the worker hangs or its machine is unreachable),
+	the unit is handed out again. If two results of the same unit come back,
+	the first one is kept (they are the same: a unit carries its seed).
+
+	Attributes:
+		units			List of the units: tuples of the arguments of
+						Replications.runReplication().
+		address			Tuple (host, port) on which the workers connect.
+		authkey			Key of the connections.
+		timeout			Duration of a lease, in seconds.
+		pending			Deque of the indices of the units to hand out.
+		leases			Dictionary (unit, (worker, time of the hand out)).
+		records			Dictionary (unit, record).
+		summaries		Dictionary (unit, summary, cf. summarize()).
+		numIssued		Number of hand outs (more than the units if some were
+						re-issued).
+		lock			threading.Condition protecting the attributes above.
+		listener		The multiprocessing.connection.Listener, once run()
+						is called.
+	"""
+
+	def __init__(self, units, address = ("127.0.0.1", 6005), authkey = None, timeout = 3600.0):
+		"""
+		Constructor.
+
+		Arguments:
+			units			List of the arguments of
+							Replications.runReplication(): tuples (config,
+							safe, seed, fast, cache).
+			address			Tuple (host, port) of the coordinator. Port 0 to
+							let the system choose (cf. the attribute
+							"address" after run() starts).
+			authkey			Key of the connections. None for getAuthKey(),
+							which raises an Exception if PORTSIM_AUTHKEY is
+							not set and the address is not a loopback one.
+			timeout			Duration of a lease, in seconds.
+		"""
+		if authkey is None:
+			authkey = getAuthKey(address[0])
+		self.units = list(units)
+		self.address = address
+		self.authkey = authkey
+		self.timeout = timeout
+		self.pending = collections.deque(xrange(len(self.units)))
+		self.leases = {}
+		self.records = {}
+		self.summaries = {}
+		self.numIssued = 0
+		self.lock = threading.Condition()
+		self.listener = None
+
+
+	def start(self):
+		"""
+		Opens the listener and starts accepting workers in the background.
+		Supposed to be called once, before the workers are started if the
+		port is chosen by the system.
+		"""
+		self.listener = multiprocessing.connection.Listener(self.address, authkey = self.authkey)
+		self.address = self.listener.address
+		thread = threading.Thread(target = self.accept)
+		thread.daemon = True
+		thread.start()
+
+
+	def run(self):
+		"""
+		Waits until every unit has a result (calls start() if needed), then
+		closes the listener. Returns the list of the records, in the order of
+		the units.
+		"""
+		if self.listener is None:
+			self.start()
+		self.lock.acquire()
+		try:
+			while not self.isDone():
+				self.lock.wait(1.0)
+		finally:
+			self.lock.release()
+		time.sleep(0.5) # Lets the handlers tell the workers to stop.
+		self.listener.close()
+		return self.getRecords()
+
+
+	def getRecords(self):
+		"""
+		Returns the list of the records received so far, in the order of the
+		units.
+		"""
+		return [self.records[unit] for unit in sorted(self.records)]
+
+
+	def getSummary(self):
+		"""
+		Returns the merge of the summaries received so far (cf. summarize()),
+		merged in the order of the units so that the result doesn't depend
+		on the order of arrival.
+		"""
+		summary = summarize(None)
+		for unit in sorted(self.summaries):
+			summary.merge(self.summaries[unit])
+		return summary
+
+
+	def printSummary(self, confidence = 0.95):
+		"""
+		Prints the mean, the standard deviation and the confidence interval of
+		every result, from the merged summaries.
+
+		Arguments:
+			confidence		Level of the confidence intervals.
+		"""
+		summary = self.getSummary()
+		print "--------------------------------------------"
+		print "Results of " + str(len(self.summaries)) + " replications (" + str(self.numIssued) + " units handed out, " + str(int(100*confidence)) + "% confidence intervals):"
+		for name, label, unit in PortSimulation.RESULTS:
+			accumulator = summary.get(name)
+			mean = accumulator.getMean()
+			std = math.sqrt(accumulator.getVariance())
+			halfWidth = Replications.halfWidth(mean, std, accumulator.count, confidence)
+			print label + ": " + Replications.Replications.formatValue(mean, unit) + " [" + Replications.Replications.formatValue(mean - halfWidth, unit) + ", " + Replications.Replications.formatValue(mean + halfWidth, unit) + "], std: " + Replications.Replications.formatValue(std, unit)
+		print "--------------------------------------------"
+
+
+
+
+	"""========================================================================
+	Below these two lines are functions that are not crucial to the
+	understanding of the code.
+	========================================================================"""
+
+	def accept(self):
+		"""
+		Accepts the workers until the listener is closed, and serves each
+		one in a new thread.
+		"""
+		while True:
+			try:
+				connection = self.listener.accept()
+			except multiprocessing.AuthenticationError:
+				continue # Not one of our workers.
+			except (IOError, EOFError, socket.error):
+				return # The listener is closed.
+			thread = threading.Thread(target = self.serve, args = (connection,))
+			thread.daemon = True
+			thread.start()
+
+
+	def serve(self, connection):
+		"""
+		Answers the messages of one worker until it disconnects. Its leases
+		are re-issued if it disconnects while holding one.
+
+		Arguments:
+			connection		The multiprocessing.connection.Connection of the
+							worker.
+		"""
+		try:
+			while True:
+				message = connection.recv()
+				if message[0] == "request":
+					connection.send(self.handOut(connection))
+				elif message[0] == "result":
+					self.receive(message[1], message[2], message[3])
+		except (EOFError, IOError):
+			pass
+		finally:
+			connection.close()
+			self.release(connection)
+
+
+	def handOut(self, worker):
+		"""
+		Returns the message answering a request of "worker": ("unit", index,
+		arguments), ("wait", seconds) if every unit is leased, or ("stop",)
+		if every unit is done. Expired leases are re-issued first.
+
+		Arguments:
+			worker			The connection of the worker.
+		"""
+		self.lock.acquire()
+		try:
+			if self.isDone():
+				return ("stop",)
+			now = time.time()
+			for unit, (holder, start) in self.leases.items():
+				if now - start > self.timeout:
+					del self.leases[unit]
+					self.pending.appendleft(unit)
+			while self.pending and self.pending[0] in self.records:
+				self.pending.popleft()
+			if not self.pending:
+				return ("wait", 1.0)
+			unit = self.pending.popleft()
+			self.leases[unit] = (worker, now)
+			self.numIssued += 1
+			return ("unit", unit, self.units[unit])
+		finally:
+			self.lock.release()
+
+
+	def receive(self, unit, record, summary):
+		"""
+		Stores the result of a unit, unless it was already received.
+
+		Arguments:
+			unit			Index of the unit.
+			record			Its record.
+			summary			Its summary.
+		"""
+		self.lock.acquire()
+		try:
+			self.leases.pop(unit, None)
+			if unit not in self.records:
+				self.records[unit] = record
+				self.summaries[unit] = summary
+			self.lock.notify_all()
+		finally:
+			self.lock.release()
+
+
+	def release(self, worker):
+		"""
+		Puts back the units leased to "worker" at the front of the queue.
+
+		Arguments:
+			worker			The connection of the worker.
+		"""
+		self.lock.acquire()
+		try:
+			for unit, (holder, start) in self.leases.items():
+				if holder is worker:
+					del self.leases[unit]
+					self.pending.appendleft(unit)
+		finally:
+			self.lock.release()
+
+
+	def isDone(self):
+		"""
+		Returns True if every unit has a result.
+		"""
+		return len(self.records) == len(self.units)
+
+
+
+
+"""============================================================================
+	M 	  M       A 	  II	NN     N
+	MM	 MM      A A	  II   	N N    N
+	M M	M M     A   A	  II   	N  N   N
+	M  M  M     AAAAA	  II   	N   N  N
+	M	  M    A     A	  II	N    N N
+	M 	  M	  A       A   II	N     NN
+============================================================================"""
+
+if __name__=="__main__":
+	if len(sys.argv) > 2 and sys.argv[1] == "worker":
+		host, port = sys.argv[2].rsplit(":", 1)
+		try:
+			getAuthKey(host)
+		except Exception as e:
+			print e
+			sys.exit(1)
+		print "Worker done: " + str(runWorker((host, int(port)))) + " units."
+		sys.exit()
+
+	timeSimulation = 0
+	options = {"host": "127.0.0.1", "port": 6005, "wharves": 20, "tugs": 10, "replications": 10,
+				"seed": None, "timeout": 3600.0, "local": 0, "export": None, "cache": None}
+	for i in xrange(1, len(sys.argv) - 1):
+		if sys.argv[i] == "--days":
+			timeSimulation += int(sys.argv[i+1])*60*24
+		elif sys.argv[i] == "--hours":
+			timeSimulation += int(sys.argv[i+1])*60
+		elif sys.argv[i] == "--mins":
+			timeSimulation += int(sys.argv[i+1])
+		elif sys.argv[i] in ("--host", "--export", "--cache"):
+			options[sys.argv[i][2:]] = sys.argv[i+1]
+		elif sys.argv[i] == "--timeout":
+			options["timeout"] = float(sys.argv[i+1])
+		elif sys.argv[i] in ("--port", "--wharves", "--tugs", "--replications", "--seed", "--local"):
+			options[sys.argv[i][2:]] = int(sys.argv[i+1])
+
+	if timeSimulation == 0:
+		timeSimulation = 24*60*7 #Default value, just in case.
+
+	config = {"maxWharves": options["wharves"], "maxTugs": options["tugs"], "timeSimulation": timeSimulation}
+	seed = options["seed"]
+	if seed is None:
+		seed = RandomStreams.newSeed()
+	cache = None
+	if options["cache"] is not None:
+		cache = ResultCache.ResultCache(options["cache"])
+	units = [(config, "--safe" in sys.argv, s, "--fast" in sys.argv, cache) for s in Replications.Replications.replicationSeeds(seed, options["replications"])]
+
+	try:
+		coordinator = Coordinator(units, (options["host"], options["port"]), timeout = options["timeout"])
+	except Exception as e:
+		print e
+		sys.exit(1)
+	coordinator.start()
+	print "Coordinator listening on " + str(coordinator.address[0]) + ":" + str(coordinator.address[1]) + " (seed " + str(seed) + "): " + str(len(units)) + " units."
+	workers = [multiprocessing.Process(target = runWorker, args = (coordinator.address,)) for i in xrange(options["local"])]
+	for worker in workers:
+		worker.start()
+	coordinator.run()
+	for worker in workers:
+		worker.join()
+	coordinator.printSummary()
+	if options["export"] is not None:
+		Records.save(coordinator.getRecords(), options["export"])
@@ -0,0 +1,444 @@
+# -*- coding:utf8 -*-
+
+
+"""============================================================================
+								ENUNCIADO 5
+								PRACTICA 2
+
+	BEURIER Erwan
+	CANAVATE VEGA Fernando
+	DE LA ROSA Augustin
+	NAPOLI Luca
+
+	This file contains the implementation of the class FastPort, a faster
+	simulation of the port for big sweeps. Events are integer codes in the
+	calendar and are dispatched through a table of routines, oil tankers are
+	indices in preallocated lists of floats instead of OilTanker objects, and
+	the statistics are accumulated in local variables of the loop.
+	With the same seed, FastPort consumes the same random variates in the same
+	order as Port, handles the events in the same order and gives the same
+	results (cf. Port.getResults()). Port stays the reference: it is the one
+	to read, debug, trace, profile or checkpoint.
+
+	Useful methods:
+		simulate()
+		getResults()
+		printResultsOnTheFly()
+	(The rest is supposed to be private, even if Python doesn't know about
+	encapsulation)
+
+	This file is not supposed to be launched via console.
+
+	Vocabulary (because the code is in English but the wording is in Spanish):
+		tug 		= remolcador
+		oil tanker	= petrolero
+		wharf 		= muelle
+
+
+============================================================================"""
+
+
+import heapq
+import numpy
+import ArrivalProcess
+import ListEvents
+import PortSimulation
+import TugPool
+
+
+# The integer codes of the events (cf. ListEvents.EVENTS).
+ARRIVALOILTANKERENTRANCE = ListEvents.EVENTS.index("ArrivalOilTankerEntrance")
+ARRIVALTUGENTRANCE = ListEvents.EVENTS.index("ArrivalTugEntrance")
+ARRIVALOILTANKERWHARF = ListEvents.EVENTS.index("ArrivalOilTankerWharf")
+UNLOADINGDONE = ListEvents.EVENTS.index("UnloadingDone")
+ARRIVALTUGWHARF = ListEvents.EVENTS.index("ArrivalTugWharf")
+EXITOILTANKER = ListEvents.EVENTS.index("ExitOilTanker")
+TUGAVAILABLE = ListEvents.EVENTS.index("TugAvailable")
+
+
+class FastPort(PortSimulation.Port):
+	"""
+	Fast version of Port. Same constructor, same random streams, same routines
+	and same results, but:
+		- the calendar is a heap of tuples (time, sequence, code, tanker,
+		tug), where "code" is an integer, "tanker" the id of the oil tanker (0
+		if none) and "tug" the number of the tug (-1 if none);
+		- the routines are called through the list "routines", indexed by the
+		code of the event;
+		- the oil tankers are ids: their times are in the lists below (Python
+		floats: indexing a NumPy array in the loop would box every value),
+		the queues hold ids;
+		- the counters of the state are attributes (not a PortState), and the
+		time-persistent statistics are accumulated in the loop and written in
+		"statistics" and "state" when simulate() ends.
+	There is no trace, profiler, subscriber, checkpoint, steady-state
+	analysis nor time series, and a simulation can't be resumed.
+
+	Attributes:
+		calendar		Binary heap of tuples (time, sequence, code, tanker, tug).
+		sequence		Number of events added so far. Used to break ties.
+		routines		List of the routines, indexed by the codes of the
+						events.
+		entranceTimes	List of the entrance times of the oil tankers,
+						indexed by their ids.
+		lastTimes		List of the last times scheduled for the oil tankers
+						(OilTanker.lastTimeTookCare).
+		lastIntervals	List of the last intervals scheduled for the oil
+						tankers (OilTanker.lastInterval).
+		beforeUnloadingTimes, unloadingIntervals, insideTimes
+						Lists of the observations of timeBeforeUnloading,
+						timeUnloading and timeInside (NaN if not observed).
+		totalBeforeUnloading	Sum of the times before unloading, in the order
+						of the observations (as Statistics does).
+		waiting, inside, atWharf, doneUnloading, tugsToEntrance, tugsToWharf,
+		tugsTowingIn, tugsTowingOut, pendingTugAvailable
+						Counters of the state, cf. PortState.
+		(And the attributes of Port that give the results.)
+	"""
+
+	def __init__(self, maxWharves, maxTugs, timeSimulation, muEmpty = 2, sigEmpty = 1, muFull = 10, sigFull = 3, seed = None, blockSize = 4096, capacity = None):
+		"""
+		Constructor. Same arguments as Port.__init__(), without the trace.
+
+		Arguments:
+			capacity			Initial size of the lists of the oil tankers. By
+								default, 1.5 times the expected number of
+								arrivals. The lists grow if needed.
+			(The others: cf. Port.__init__().)
+		"""
+		PortSimulation.Port.__init__(self, maxWharves, maxTugs, timeSimulation, muEmpty, sigEmpty, muFull, sigFull, seed, blockSize)
+		if capacity is None:
+			capacity = int(1.5 * ArrivalProcess.DAILYARRIVALS * timeSimulation / (24*60)) + 1024
+		self.calendar = []
+		self.sequence = 0
+		self.entranceTimes = [0.0] * capacity
+		self.lastTimes = [0.0] * capacity
+		self.lastIntervals = [0.0] * capacity
+		self.beforeUnloadingTimes = [float("nan")] * capacity
+		self.unloadingIntervals = [float("nan")] * capacity
+		self.insideTimes = [float("nan")] * capacity
+		self.totalBeforeUnloading = 0.0
+		self.waiting = 0
+		self.inside = 0
+		self.atWharf = 0
+		self.doneUnloading = 0
+		self.tugsToEntrance = 0
+		self.tugsToWharf = 0
+		self.tugsTowingIn = 0
+		self.tugsTowingOut = 0
+		self.pendingTugAvailable = 0
+		self.routines = [None] * len(ListEvents.EVENTS)
+		self.routines[ARRIVALOILTANKERENTRANCE] = self.routineArrivalOilTankerEntrance
+		self.routines[ARRIVALTUGENTRANCE] = self.routineArrivalTugEntrance
+		self.routines[ARRIVALOILTANKERWHARF] = self.routineArrivalOilTankerWharf
+		self.routines[UNLOADINGDONE] = self.routineUnloadingDone
+		self.routines[ARRIVALTUGWHARF] = self.routineArrivalTugWharf
+		self.routines[EXITOILTANKER] = self.routineExitOilTanker
+		self.routines[TUGAVAILABLE] = self.routineTugAvailable
+
+
+	def simulate(self):
+		"""
+		Launches the simulation, as Port.simulate(). The policy of the tugs is
+		the one of PortSimulation.SAFEPORT when the simulation starts.
+		Returns the record of the simulation (cf. Port.getRecord()).
+		"""
+		if self.started:
+			raise Exception("A FastPort can't resume a simulation.")
+		if self.trace is not None or self.profiler is not None or self.checkpoint is not None or self.steadyState is not None or self.timeSeries is not None:
+			raise Exception("A FastPort has no trace, profiler, checkpoint, steady-state analysis nor time series. Use Port.")
+		self.started = True
+		if PortSimulation.SAFEPORT:
+			self.routines[TUGAVAILABLE] = self.routineTugAvailableSafe
+		self.generateOilTanker()
+
+		routines = self.routines
+		calendar = self.calendar
+		heappop = heapq.heappop
+		maxTime = self.maxTime
+		maxWharves = self.maxWharves
+		idle = self.tugs.idle
+		time = self.time
+		numEvents = 0
+		numTimesBlocked = 0
+
+		# Total duration, and integral, integral of the square, min and max of
+		# the time-persistent metrics: waiting, inside, atWharf, atWharf +
+		# doneUnloading.
+		total = eI = eS = nI = nS = uI = uS = wI = wS = 0.0
+		eMin = nMin = uMin = wMin = float("inf")
+		eMax = nMax = uMax = wMax = float("-inf")
+
+		while True:
+			# Last iteration: records the final state with a null duration.
+			last = time >= maxTime
+			previous = time
+			if not last:
+				time, sequence, code, tanker, tug = heappop(calendar)
+			duration = time - previous
+			total += duration
+
+			value = self.waiting
+			eI += value * duration
+			eS += value * value * duration
+			if value < eMin:
+				eMin = value
+			if value > eMax:
+				eMax = value
+			value = self.inside
+			nI += value * duration
+			nS += value * value * duration
+			if value < nMin:
+				nMin = value
+			if value > nMax:
+				nMax = value
+			value = self.atWharf
+			uI += value * duration
+			uS += value * value * duration
+			if value < uMin:
+				uMin = value
+			if value > uMax:
+				uMax = value
+			value += self.doneUnloading
+			wI += value * duration
+			wS += value * value * duration
+			if value < wMin:
+				wMin = value
+			if value > wMax:
+				wMax = value
+
+			if last:
+				break
+
+			self.time = time
+			numEvents += 1
+			routines[code](tanker, tug)
+
+			if (not idle and self.tugsToWharf == 0 and self.pendingTugAvailable == 0
+					and self.tugsTowingOut == 0 and self.atWharf + self.doneUnloading >= maxWharves):
+				numTimesBlocked += 1
+
+		self.previousTime = self.time
+		self.numEvents += numEvents
+		self.numTimesBlocked += numTimesBlocked
+		self.writeStatistics(total, [(eI, eS, eMin, eMax), (nI, nS, nMin, nMax), (uI, uS, uMin, uMax), (wI, wS, wMin, wMax)])
+		return self.getRecord()
+
+
+	def addEvent(self, code, time, tanker = 0, tug = -1):
+		"""
+		Adds an event to the calendar, as ListEvents.addEvent(). For an event
+		of an oil tanker, updates its last time the way OilTanker.addTime()
+		does, so that the intervals are computed with the same roundings.
+
+		Arguments:
+			code			The code of the event.
+			time			The time of the event.
+			tanker			The id of the oil tanker, 0 if none.
+			tug				The number of the tug, -1 if none.
+		"""
+		if tanker:
+			interval = time - self.lastTimes[tanker]
+			self.lastTimes[tanker] += interval
+			self.lastIntervals[tanker] = interval
+		self.sequence += 1
+		heapq.heappush(self.calendar, (time, self.sequence, code, tanker, tug))
+
+
+	def generateOilTanker(self):
+		"""
+		Generates the next oil tanker, as Port.generateOilTanker().
+		"""
+		self.tankerCountTotalGenerated += 1
+		tanker = self.tankerCountTotalGenerated
+		if tanker >= len(self.entranceTimes):
+			self.grow()
+		t = self.arrivalProcess.nextArrival()
+		self.entranceTimes[tanker] = t
+		self.lastTimes[tanker] = t
+		self.sequence += 1
+		heapq.heappush(self.calendar, (t, self.sequence, ARRIVALOILTANKERENTRANCE, tanker, -1))
+
+
+	def routineArrivalOilTankerEntrance(self, tanker, tug):
+		"""
+		Cf. Port.routineArrivalOilTankerEntrance().
+		"""
+		self.tankerCountWaiting += 1
+		self.waiting += 1
+		self.generateOilTanker()
+		self.oilTankersEntrance.append(tanker)
+
+		if self.tugs.idle:
+			tug = self.tugs.acquire(self.time)
+			self.tugsToEntrance += 1
+			self.addEvent(ARRIVALTUGENTRANCE, self.time + self.travelTimesEmpty.draw(), 0, tug)
+
+
+	def routineArrivalTugEntrance(self, tanker, tug):
+		"""
+		Cf. Port.routineArrivalTugEntrance().
+		"""
+		t = self.travelTimesFull.draw()
+		self.addEvent(ARRIVALOILTANKERWHARF, self.time + t, self.oilTankersEntrance.popleft(), tug)
+		self.tugs.setState(tug, TugPool.TOWING, self.time)
+		self.tankerCountWaiting -= 1
+		self.tankerCountInside += 1
+		self.tugsToEntrance -= 1
+		self.waiting -= 1
+		self.tugsTowingIn += 1
+		self.inside += 1
+
+
+	def routineArrivalOilTankerWharf(self, tanker, tug):
+		"""
+		Cf. Port.routineArrivalOilTankerWharf(). There is no pause when the
+		port is blocked.
+		"""
+		value = self.time - self.entranceTimes[tanker]
+		self.beforeUnloadingTimes[tanker] = value
+		self.totalBeforeUnloading += value
+		self.tugsTowingIn -= 1
+
+		if self.atWharf + self.doneUnloading < self.maxWharves:
+			self.atWharf += 1
+			self.pendingTugAvailable += 1
+			self.addEvent(TUGAVAILABLE, self.time, 0, tug)
+			self.addEvent(UNLOADINGDONE, self.time + 60*self.unloadingTimes.draw(), tanker)
+			return
+
+		# No wharf is free: the oil tanker is lost, and so is its tug.
+		self.inside -= 1
+		self.tugs.setState(tug, TugPool.LOST, self.time)
+
+
+	def routineUnloadingDone(self, tanker, tug):
+		"""
+		Cf. Port.routineUnloadingDone().
+		"""
+		self.oilTankersWharvesDone.append(tanker)
+		self.tankersCountUnloaded += 1
+		self.unloadingIntervals[tanker] = self.lastIntervals[tanker]
+		self.atWharf -= 1
+		self.doneUnloading += 1
+
+		if self.tugs.idle and self.tugsToWharf < self.doneUnloading:
+			tug = self.tugs.acquire(self.time)
+			self.tugsToWharf += 1
+			self.addEvent(ARRIVALTUGWHARF, self.time + self.travelTimesEmpty.draw(), 0, tug)
+
+
+	def routineArrivalTugWharf(self, tanker, tug):
+		"""
+		Cf. Port.routineArrivalTugWharf().
+		"""
+		t = self.travelTimesFull.draw()
+		self.addEvent(EXITOILTANKER, self.time + t, self.oilTankersWharvesDone.popleft(), tug)
+		self.tugs.setState(tug, TugPool.TOWING, self.time)
+		self.tugsToWharf -= 1
+		self.doneUnloading -= 1
+		self.tugsTowingOut += 1
+
+
+	def routineExitOilTanker(self, tanker, tug):
+		"""
+		Cf. Port.routineExitOilTanker(). There is no pause for long stays.
+		"""
+		self.tankerCountInside -= 1
+		self.tankerCountDone += 1
+		self.tugsTowingOut -= 1
+		self.inside -= 1
+		self.pendingTugAvailable += 1
+		self.addEvent(TUGAVAILABLE, self.time, 0, tug)
+		self.insideTimes[tanker] = self.time - self.entranceTimes[tanker]
+
+
+	def routineTugAvailable(self, tanker, tug):
+		"""
+		Cf. Port.routineTugAvailable().
+		"""
+		self.pendingTugAvailable -= 1
+		if self.waiting > 0 and self.tugsToEntrance < self.waiting:
+			self.tugsToEntrance += 1
+			self.tugs.setState(tug, TugPool.EMPTY, self.time)
+			self.addEvent(ARRIVALTUGENTRANCE, self.time + self.travelTimesEmpty.draw(), 0, tug)
+		elif self.doneUnloading > 0 and self.tugsToWharf < self.doneUnloading:
+			self.tugsToWharf += 1
+			self.tugs.setState(tug, TugPool.EMPTY, self.time)
+			self.addEvent(ARRIVALTUGWHARF, self.time + self.travelTimesEmpty.draw(), 0, tug)
+		else:
+			self.tugs.release(tug, self.time)
+
+
+	def routineTugAvailableSafe(self, tanker, tug):
+		"""
+		Cf. Port.routineTugAvailableSafe().
+		"""
+		self.pendingTugAvailable -= 1
+		if self.doneUnloading > 0 and self.tugsToWharf < self.doneUnloading:
+			self.tugsToWharf += 1
+			self.tugs.setState(tug, TugPool.EMPTY, self.time)
+			self.addEvent(ARRIVALTUGWHARF, self.time + self.travelTimesEmpty.draw(), 0, tug)
+		elif self.waiting > 0 and self.tugsToEntrance < self.waiting:
+			self.tugsToEntrance += 1
+			self.tugs.setState(tug, TugPool.EMPTY, self.time)
+			self.addEvent(ARRIVALTUGENTRANCE, self.time + self.travelTimesEmpty.draw(), 0, tug)
+		else:
+			self.tugs.release(tug, self.time)
+
+
+
+
+	"""========================================================================
+	Below these two lines are functions that are not crucial to the
+	understanding of the code.
+	========================================================================"""
+
+	def grow(self):
+		"""
+		Doubles the size of the lists of the oil tankers.
+		"""
+		size = len(self.entranceTimes)
+		for name in ("entranceTimes", "lastTimes", "lastIntervals", "beforeUnloadingTimes", "unloadingIntervals", "insideTimes"):
+			getattr(self, name).extend([float("nan")] * size)
+
+
+	def writeStatistics(self, duration, timePersistent):
+		"""
+		Writes the accumulators of the loop in self.statistics, and the
+		counters in self.state, so that the methods of Port that give the
+		results (getResults(), printResultsOnTheFly(), printState()) work.
+
+		Arguments:
+			duration		Total duration of the simulation (sum of the
+							durations between the events).
+			timePersistent	List of tuples (integral, integral of the square,
+							min, max), in the order in which the metrics are
+							registered by Port.__init__().
+		"""
+		for (name, attributes, accumulator), (integral, squares, minimum, maximum) in zip(self.statistics.timePersistent, timePersistent):
+			accumulator.duration = duration
+			accumulator.integral = integral
+			accumulator.integralSquares = squares
+			accumulator.minimum = minimum
+			accumulator.maximum = maximum
+
+		observations = {"timeBeforeUnloading": self.beforeUnloadingTimes,
+						"timeUnloading": self.unloadingIntervals,
+						"timeInside": self.insideTimes}
+		for name, array in observations.iteritems():
+			values = numpy.array(array[1:self.tankerCountTotalGenerated + 1])
+			values = values[~numpy.isnan(values)]
+			accumulator = self.statistics.get(name)
+			accumulator.count = len(values)
+			if len(values) > 0:
+				accumulator.total = float(values.sum())
+				accumulator.mean = float(values.mean())
+				accumulator.m2 = float(((values - accumulator.mean)**2).sum())
+				accumulator.minimum = float(values.min())
+				accumulator.maximum = float(values.max())
+		self.statistics.get("timeBeforeUnloading").total = self.totalBeforeUnloading
+
+		for attribute in ("waiting", "inside", "atWharf", "doneUnloading", "tugsToEntrance", "tugsToWharf",
+						"tugsTowingIn", "tugsTowingOut", "pendingTugAvailable"):
+			setattr(self.state, attribute, getattr(self, attribute))
@@ -0,0 +1,229 @@
+# -*- coding:utf8 -*-
+
+
+"""============================================================================
+								ENUNCIADO 5
+								PRACTICA 2
+
+	BEURIER Erwan
+	CANAVATE VEGA Fernando
+	DE LA ROSA Augustin
+	NAPOLI Luca
+
+	This file contains the implementation of the class Hooks, that lets
+	external code subscribe to what happens during Port.simulate(), and of the
+	interactive subscribers (debug mode, log mode and pauses).
+
+	Useful methods:
+		Hooks.subscribe()
+		Hooks.unsubscribe()
+		Hooks.publish()
+	(The rest is supposed to be private, even if Python doesn't know about
+	encapsulation)
+
+	This file is not supposed to be launched via console.
+
+	Vocabulary (because the code is in English but the wording is in Spanish):
+		tug 		= remolcador
+		oil tanker	= petrolero
+		wharf 		= muelle
+
+
+============================================================================"""
+
+
+# The topics and the arguments given to their subscribers:
+#	beforeEvent		(port, event, oilTanker) before the routine of the event.
+#	afterEvent		(port, event, oilTanker) after the routine of the event.
+#	tanker			(port, oilTanker, transition) when an oil tanker changes of
+#					stage, cf. TRANSITIONS.
+#	blocked			(port) after an event that leaves the port blocked.
+# "oilTanker" is None for the events that don't concern an oil tanker.
+TOPICS = ("beforeEvent", "afterEvent", "tanker", "blocked")
+
+# The stages of the life of an oil tanker, in order. "lost" replaces "wharf"
+# and the following ones when no wharf is free.
+TRANSITIONS = ("generated", "entrance", "towedIn", "wharf", "unloaded",
+				"towedOut", "exit", "lost")
+
+
+class Hooks:
+	"""
+	Registry of the subscribers of a Port. The port only publishes on a topic
+	if it has subscribers, and gives them the objects themselves (the port,
+	the event, the oil tanker): any text is built by the subscribers. Without
+	subscribers, a publication costs one test of an empty list.
+
+	Attributes:
+		beforeEvent, afterEvent, tanker, blocked
+						The lists of the subscribers (callables) of each
+						topic. The port tests them directly. They are never
+						replaced, so the port can keep references to them.
+		subscribers		Dictionary (topic, list of subscribers).
+	"""
+
+	def __init__(self):
+		"""
+		Default constructor. No subscriber.
+		"""
+		self.subscribers = {}
+		for topic in TOPICS:
+			setattr(self, topic, [])
+			self.subscribers[topic] = getattr(self, topic)
+
+
+	def subscribe(self, topic, callback):
+		"""
+		Adds a subscriber to a topic.
+
+		Arguments:
+			topic			One of TOPICS.
+			callback		Callable, called with the arguments of the topic.
+		"""
+		self.subscribers[topic].append(callback)
+
+
+	def unsubscribe(self, topic, callback):
+		"""
+		Removes a subscriber from a topic. Nothing happens if it wasn't
+		subscribed.
+
+		Arguments:
+			topic			One of TOPICS.
+			callback		The subscriber to remove.
+		"""
+		if callback in self.subscribers[topic]:
+			self.subscribers[topic].remove(callback)
+
+
+	def publish(self, topic, *args):
+		"""
+		Calls every subscriber of a topic. Supposed to be called only if
+		isListening(topic), so that the arguments aren't even gathered when
+		nobody listens.
+
+		Arguments:
+			topic			One of TOPICS.
+			args			The arguments of the topic.
+		"""
+		for callback in list(self.subscribers[topic]):
+			callback(*args)
+
+
+	def isListening(self, topic):
+		"""
+		Returns True if the topic has at least one subscriber.
+		"""
+		return len(self.subscribers[topic]) > 0
+
+
+
+
+	"""========================================================================
+	Below these two lines are functions that are not crucial to the
+	understanding of the code.
+	========================================================================"""
+
+	def subscribeInteractive(self, debug = False, log = False, pauses = False):
+		"""
+		Subscribes the interactive subscribers below.
+
+		Arguments:
+			debug			Subscribes a Debugger (PortSimulation.ISDEBUG).
+			log				Subscribes a StateLogger (PortSimulation.LOGPORT).
+			pauses			Subscribes a Pauses (PortSimulation.PAUSEPORT or
+							ISDEBUG, and not BATCHMODE).
+		"""
+		if debug:
+			debugger = Debugger()
+			self.subscribe("beforeEvent", debugger.beforeEvent)
+			self.subscribe("afterEvent", debugger.afterEvent)
+		if log:
+			self.subscribe("afterEvent", StateLogger(self).afterEvent)
+		if pauses:
+			self.subscribe("tanker", Pauses().tanker)
+
+
+class Debugger:
+	"""
+	Debug mode: prints every event before and after its routine and waits
+	for the user.
+	"""
+
+	def beforeEvent(self, port, event, oilTanker):
+		"""
+		Prints the event.
+		"""
+		print "Step : " + event + " after time : " + str(port.time) + "Oil Tanker : " + str(oilTanker)
+		raw_input()
+
+
+	def afterEvent(self, port, event, oilTanker):
+		"""
+		Prints the event that is done.
+		"""
+		print "Event to remove : " + event
+		raw_input()
+
+
+class StateLogger:
+	"""
+	Log mode: prints the whole state of the port after every event, until the
+	user asks to stop.
+
+	Attributes:
+		hooks			The Hooks to unsubscribe from.
+	"""
+
+	def __init__(self, hooks):
+		"""
+		Constructor.
+
+		Arguments:
+			hooks			The Hooks it is subscribed to.
+		"""
+		self.hooks = hooks
+
+
+	def afterEvent(self, port, event, oilTanker):
+		"""
+		Prints the state and waits for the user.
+		"""
+		port.printState()
+		if raw_input("Press a key + Enter to prevent this interruption from happening again, of simply Enter if you want this to appear next time too:") != "":
+			self.hooks.unsubscribe("afterEvent", self.afterEvent)
+
+
+class Pauses:
+	"""
+	Interrupts the simulation when something looks wrong: an oil tanker is
+	lost while the port is blocked, or an oil tanker stayed more than
+	"longStay" minutes in the port.
+
+	Attributes:
+		longStay		Duration of a stay that triggers a pause (in minutes).
+	"""
+
+	def __init__(self, longStay = 10000):
+		"""
+		Constructor.
+
+		Arguments:
+			longStay		Duration of a stay that triggers a pause.
+		"""
+		self.longStay = longStay
+
+
+	def tanker(self, port, oilTanker, transition):
+		"""
+		Pauses if needed.
+		"""
+		if transition == "lost" and port.detectBlockedSituation():
+			print "Blocked situation. I don't kow how to handle it."
+			port.printState()
+			port.printResultsOnTheFly()
+			raw_input()
+		elif transition == "exit" and port.time - oilTanker.getEntranceTime() > self.longStay:
+			print "Pause: " + str(oilTanker.getNumTimes())
+			print "Pause: " + str(oilTanker)
+			raw_input()
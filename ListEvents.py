@@ -31,100 +31,117 @@
 ============================================================================"""
 
 
+import heapq
 import OilTanker
 
+
+# Every event that can occur in the simulation. The index of an event in this 
+# tuple is its integer code.
+EVENTS = ("ArrivalOilTankerEntrance",
+			"ArrivalTugEntrance",
+			"ArrivalOilTankerWharf",
+			"UnloadingDone",
+			"ArrivalTugWharf",
+			"ExitOilTanker",
+			"TugAvailable")
+
+# Events that always concern an oil tanker.
+TANKEREVENTS = ("ArrivalOilTankerEntrance", # Ill-named. Should be understood as "Oil Tankers Waiting in the entrance"
+				"ArrivalOilTankerWharf",
+				"UnloadingDone",
+				"ExitOilTanker")
+
+
 class ListEvents:
 	"""
 	Class containing the information about the different events that can occur 
 	in the simulation.
-	The events are stored in a dictionary. The key is the name of the event, 
-	and the associated value is a list of float, supposed to be the times (in 
-	minutes).
+	The events are stored in a binary heap (the future event calendar). Each 
+	entry is a tuple (time, sequence, event, oilTanker, tug). The sequence number 
+	increases at every insertion, so two events occurring at the same time are 
+	handled in the order in which they were added. This tie-breaking does not 
+	depend on anything else, so it stays the same from run to run.
 	The Port is supposed to contain one instance of this class.
 	
 	Attributes:
-		events			Dictionary (events, list of times). The events are 
-						supposed to occur at the times given in the list.
-		tankers			Dictionary (events, list of tankers). Contains the 
-						tankers corresponding to the event.
+		calendar		Binary heap of tuples (time, sequence, event, oilTanker, 
+						tug). oilTanker is None if the event doesn't concern a 
+						tanker, tug is None if it doesn't concern a tug (cf. 
+						TugPool).
+		counts			Dictionary (events, number of pending occurrences). 
+						Updated at each insertion and removal.
+		sequence		Number of events added so far. Used to break ties.
+		current			The entry returned by the last call to getNextEvent(), 
+						until removeLastEvent() is called. It is still counted 
+						in "counts".
 	"""
 	def __init__(self):
 		"""
-		Default initializer. Empty list for every event.
+		Default initializer. No event in the calendar.
 		"""
-		self.events = {"ArrivalOilTankerEntrance": [],
-						"ArrivalTugEntrance": [],
-						"ArrivalOilTankerWharf": [],
-						"UnloadingDone": [],
-						"ArrivalTugWharf": [],
-						"ExitOilTanker": [],
-						"TugAvailable": []
-						}
-		self.tankers = {"ArrivalOilTankerEntrance": [], # Ill-named. Should be understood as "Oil Tankers Waiting in the entrance"
-						"ArrivalOilTankerWharf": [],
-						"UnloadingDone": [],
-						"ExitOilTanker": [],
-						}
+		self.calendar = []
+		self.counts = dict((event, 0) for event in EVENTS)
+		self.sequence = 0
+		self.current = None
 	
-	def addEvent(self, event, time, oilTanker = None):
+	def addEvent(self, event, time, oilTanker = None, tug = None):
 		"""
-		Adds the event "event" at given "time". Sorts the list of times of the 
-		given event, so the first element of the list is always the soonest to 
-		come.
+		Adds the event "event" at given "time". The calendar is a heap, so the 
+		insertion is in O(log n).
 		
 		Arguments:
-			event		The code of the event. Cf. __init__() to see what 
+			event		The code of the event. Cf. EVENTS to see what 
 						events make sense in this simulation.
 			time 		Time in minutes. The timestamp at which the event is 
 						supposed to occur.
 			oilTanker	In the special case in which the event concerns an oil 
 						tanker, we need to know which tanker is concerned.
+			tug			The number of the tug concerned by the event, if any.
 		"""
-		self.events[event].append(time)
-		
-		if event in self.tankers.keys():
-			if oilTanker is not None:
-				oilTanker.addTime(time, False)
-				self.tankers[event].append(oilTanker)
-				ListEvents.doubleMergeSort(self.events[event], self.tankers[event])
-			else:
+		if event in TANKEREVENTS:
+			if oilTanker is None:
 				raise Exception(event + " without specified tanker. Abort.")
-				return 
-		else:
-			self.events[event].sort()
+			oilTanker.addTime(time, False)
+		
+		self.counts[event] += 1
+		self.sequence += 1
+		heapq.heappush(self.calendar, (time, self.sequence, event, oilTanker, tug))
  
  
 	
 	def getNextEvent(self):
 		"""
-		Searches the attribute "events" to find the next event to come. Returns 
-		the event, the time at which it's supposed to occur, and potentially the 
-		oil tanker that is concerned.
+		Pops the next event to come from the calendar. Returns the event, the 
+		time at which it's supposed to occur, and potentially the oil tanker 
+		and the tug that are concerned.
+		The event stays the current one (and keeps being counted) until 
+		removeLastEvent() is called, so calling this method twice in a row 
+		returns the same event.
 		"""
-		minEvent = ""
-		minTime = 1000000.0
-		minOilTanker = None
-		
-		for key, value in self.events.iteritems():
-			if len(value) > 0 and value[0] < minTime:
-				minEvent = key
-				minTime = value[0]
-				if key in self.tankers.keys():
-					minOilTanker = self.tankers[key][0]
-		return minEvent, minTime, minOilTanker
+		if self.current is None:
+			if len(self.calendar) == 0:
+				return "", 1000000.0, None, None
+			self.current = heapq.heappop(self.calendar)
+		
+		return self.current[2], self.current[0], self.current[3], self.current[4]
 	
 	
 	def removeLastEvent(self, event):
 		"""
-		Removes the first time of given "event".
+		Removes the first time of given "event". In the simulation loop it is 
+		the event returned by getNextEvent(), which has already left the heap.
 		
 		Arguments:
 			event		The event the first time of which should be removed.
 		"""
-		self.events[event].pop(0)# = self.events[event][1:]
-		if event in self.tankers.keys():
-			#self.tankers[event] = self.tankers[event][1:]
-			self.tankers[event].pop(0) #.remove(self.tankers[event][0])
+		if self.current is not None and self.current[2] == event:
+			self.current = None
+		else:
+			# Not the usual use: look for the soonest occurrence of "event".
+			entries = [entry for entry in self.calendar if entry[2] == event]
+			self.calendar.remove(min(entries))
+			heapq.heapify(self.calendar)
+		self.counts[event] -= 1
 
 			
 			
@@ -150,66 +167,38 @@ class ListEvents:
 		return s
 	
 	
-	@staticmethod
-	def doubleMergeSort(liUnloaded, tankers):
+	def getSortedEvents(self):
 		"""
-		Applies a merge sort on both lists. However, the values of "liUnloaded" 
-		are the only one used to sort both lists. It means that "tankers" is 
-		supposed to be paired.
-		
-		Arguments:
-			liUnloaded		A list to sort. 
-			tankers			Second list to sort. 
+		Returns two dictionaries (events, list of times) and (events, list of 
+		tankers), sorted by time. It's the way the events used to be stored, 
+		only used to print the calendar.
 		"""
-		if len(liUnloaded) > 1:
-			mid = len(liUnloaded)//2
-			leftList = liUnloaded[:mid]
-			rightList = liUnloaded[mid:]
-			leftTankers = tankers[:mid]
-			rightTankers = tankers[mid:]
-
-			ListEvents.doubleMergeSort(leftList, leftTankers)
-			ListEvents.doubleMergeSort(rightList, rightTankers)
-
-			i = 0
-			j = 0 
-			k = 0
-			while i < len(leftList) and j < len(rightList):
-				if leftList[i] < rightList[j]:
-					liUnloaded[k] = leftList[i]
-					tankers[k] = leftTankers[i]
-					i += 1
-				else:
-					liUnloaded[k]=rightList[j]
-					tankers[k] = rightTankers[j]
-					j += 1
-				k += 1
-
-			while i < len(leftList):
-				liUnloaded[k] = leftList[i]
-				tankers[k] = leftTankers[i]
-				i += 1
-				k += 1
-
-			while j < len(rightList):
-				liUnloaded[k] = rightList[j]
-				tankers[k] = rightTankers[j]
-				j += 1
-				k += 1
+		events = dict((key, []) for key in self.counts)
+		tankers = dict((key, []) for key in TANKEREVENTS)
+		entries = sorted(self.calendar)
+		if self.current is not None:
+			entries.insert(0, self.current)
+		
+		for time, sequence, event, oilTanker, tug in entries:
+			events[event].append(time)
+			if event in tankers:
+				tankers[event].append(oilTanker)
+		return events, tankers
 				
 				
 	def __str__(self):
-		s = "self.events: \r\n" + ListEvents.strDico(self.events) 
-		s += "\r\n\r\nself.tankers: \r\n" + ListEvents.strDico(self.tankers)
+		events, tankers = self.getSortedEvents()
+		s = "self.events: \r\n" + ListEvents.strDico(events) 
+		s += "\r\n\r\nself.tankers: \r\n" + ListEvents.strDico(tankers)
 		return s
 				
 		
 	def getNumTankers(self, event):
-		return len(self.tankers[event])
+		return self.counts[event]
 		
 		
 	def getListEventSize(self, event):
-		return len(self.events[event])
+		return self.counts[event]
 		
 		
 		
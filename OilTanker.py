@@ -30,24 +30,35 @@
 from math import log
 
 
-class OilTanker:
+KEEPHISTORY = False # If True, every oil tanker keeps the list of all its times.
+
+
+class OilTanker(object):
 	"""
 	Convenient class. 
 	Stores the time spent in the port.
+	The attributes are slots (no __dict__), and by default only the times 
+	needed by the results are kept, so that an instance stays small. 
 	
 	Attributes:
 		id				The id of the oil tanker. To identify the oil tanker.
 		arrivalTime		Arrival time of the boat at the port.
+		entranceTime	Arrival time plus the first recorded interval.
 		lastTimeTookCare	Last time we took care of this ship.
+		lastInterval	Last recorded interval.
+		numTimes		Number of recorded times (including the initial 0).
 		listTimes		List of times spent in the port. It's not a list of 
 						timestamps, but a list of times spent (it's not a list 
-						of absolute times).
+						of absolute times). None unless KEEPHISTORY was True 
+						when the instance was created.
 						NB: I've put a list because their are lots of things to 
 						check to answer the question. We could register every 
 						action of the boat and check this list to decompose its 
 						travel.
 		totalTime		Total time spent by the OilTanker in the Port.
 	"""
+	__slots__ = ("id", "arrivalTime", "entranceTime", "lastTimeTookCare", 
+				"lastInterval", "numTimes", "totalTime", "listTimes")
 	
 	def __init__(self, t, id):
 		"""
@@ -63,7 +74,10 @@ class OilTanker:
 		self.lastTimeTookCare = t
 		self.lastInterval = 0
 		self.totalTime = 0.0
-		self.listTimes = [0.0]
+		self.numTimes = 1
+		self.listTimes = None
+		if KEEPHISTORY:
+			self.listTimes = [0.0]
 		
 		
 	def addTime(self, t, interval = True):
@@ -82,7 +96,11 @@ class OilTanker:
 		if not interval:
 			t1 = t - self.lastTimeTookCare
 			
-		self.listTimes.append(t1)
+		if self.numTimes == 1:
+			self.entranceTime = self.arrivalTime + t1
+		self.numTimes += 1
+		if self.listTimes is not None:
+			self.listTimes.append(t1)
 		self.totalTime += t1
 		self.lastTimeTookCare += t1
 		self.lastInterval = t1 	
@@ -143,7 +161,14 @@ class OilTanker:
 		"""
 		Accessor method.
 		"""
-		return self.arrivalTime + self.listTimes[1]
+		return self.entranceTime
+		
+		
+	def getNumTimes(self):
+		"""
+		Accessor method. Number of recorded times, including the initial 0.
+		"""
+		return self.numTimes
 
 		
 		
@@ -14,6 +14,7 @@
 	Useful methods:
 		simulate()
 		printResults()
+		getRecord()
 	(The rest is supposed to be private, even if Python doesn't know about 
 	encapsulation).
 	
@@ -29,17 +30,67 @@
 
 
 
-import random
-from scipy.stats import t as tStudent
-from scipy.stats import norm
-from scipy.stats import chi2
+import collections
+import Hooks
+import ArrivalProcess
 import ListEvents
+import VariatePool
 import OilTanker
+import PortState
+import RandomStreams
+import Statistics
+import SteadyState
+import TimeSeries
+import TugPool
 
 
+# ISDEBUG, LOGPORT and PAUSEPORT subscribe the interactive subscribers of 
+# Hooks to the ports created afterwards (the pauses also come with ISDEBUG, 
+# and never with BATCHMODE). By default, nothing is subscribed.
 ISDEBUG = False 
 SAFEPORT = False
 LOGPORT = False
+PAUSEPORT = False # If True, pauses when an oil tanker is lost in a blocked port or stays too long (cf. Hooks.Pauses).
+BATCHMODE = False # If True, the simulation never prints nor waits for the user (e.g. in worker processes).
+
+# The results computed by Port.getResults(): name, label and unit. The unit 
+# "time" means minutes, printed with minutesToTime().
+RESULTS = [("meanNumOilTankersEntrance", "Mean number of oil tankers waiting in the entrance", "units"),
+			("maxNumOilTankersEntrance", "Max number of oil tankers waiting in the entrance", "units"),
+			("meanNumOilTankersInside", "Mean number of oil tankers inside the port", "units"),
+			("maxNumOilTankersInside", "Max number of oil tankers inside the port", "units"),
+			("meanTimeOilTankerInside", "Mean time spent by the tankers inside the port", "time"),
+			("maxTimeOilTankerInside", "Max time spent by the tankers inside the port", "time"),
+			("meanTimeBeforeUnloading", "Mean time before unloading", "time"),
+			("maxTimeBeforeUnloading", "Max time before unloading", "time"),
+			("meanTimeOilTankersUnloading", "Mean time spent by the tankers unloading at the wharves", "time"),
+			("maxTimeOilTankersUnloading", "Max time spent by the tankers unloading at the wharves", "time"),
+			("meanNumOilTankersWharves", "Mean number of tankers at the wharves", "units"),
+			("maxNumOilTankersWharves", "Max number of tankers at the wharves", "units"),
+			("numTimesBlocked", "Number of times the port was blocked", "times")
+			]
+
+# The other fields of the record returned by Port.getRecord(): the 
+# configuration of the simulation, then the counters and the mean utilization 
+# of the tugs (cf. TugPool.getUtilization()).
+CONFIGURATION = ["maxWharves", "maxTugs", "timeSimulation", "muEmpty", "sigEmpty", 
+				"muFull", "sigFull", "safe", "seed"]
+COUNTS = ["time", "numEvents", "tankersGenerated", "tankersDone", 
+				"tankersUnloaded", "tankersWaiting", "tankersInside", "tugUtilization"]
+
+def formatResult(value, unit):
+	"""
+	Returns the string used to print a result.
+	
+	Arguments:
+		value 			The value of the result.
+		unit 			The unit of the result, as in RESULTS.
+	"""
+	if unit == "time":
+		if value != value: # NaN
+			return "undefined"
+		return minutesToTime(value)
+	return str(value) + " " + unit + "."
 
 def mtt(minutes):
 	return minutesToTime(minutes)
@@ -68,10 +119,17 @@ class Port:
 	Attributes:
 		maxWharves				Total number of wharves in the port.
 		maxTugs					Total number of tugs in the port.
-		oilTankersEntrance		Queue at the entrance of the port.
-		oilTankersWharves	 	List of OilTankers that are currently unloading.
-		oilTankersWharvesDone	List of OilTankers that have finished unloading.
-		freeTugs				Number of free tugs in the port.
+		oilTankersEntrance		Queue (deque) at the entrance of the port.
+		oilTankersWharves	 	Dictionary (id, OilTanker) of the oil tankers 
+								that are currently unloading.
+		oilTankersWharvesDone	Queue (deque) of the OilTankers that have 
+								finished unloading.
+		tugs					TugPool. The state of every tug, the time it 
+								spent in every state, and the idle tugs 
+								(len(tugs.idle) is the number of free tugs).
+		state					PortState. Counters of the state of the port 
+								(queue lengths, tugs in transit, pending 
+								events), updated by the routines.
 		time					The clock in the port (in minutes). Updates at 
 								each iteration of the method Port.simulate().
 		previousTime			The time of the last event. Useful to compute 
@@ -96,38 +154,51 @@ class Port:
 								Mandatory to identify tankers (a tanker has an 
 								id).
 		cumulTimeTankersDone	Counts the time took by tankers inside the port.
-		meanNumOilTankersEntrance	Mean number of oil tankers in the entrance. 
-									Updates at every iteration of simulate().
-		maxNumOilTankersEntrance	Max number of oil tankers in the entrance. 
-									Updates at every iteration of simulate().
-		meanNumOilTankersInside		Mean number of oil tankers inside the port. 
-									Updates at every iteration of simulate().
-		maxNumOilTankersInside		Max number of oil tankers inside the port. 
-									Updates at every iteration of simulate().
-		meanTimeOilTankerInside		Mean time spent by oil tankers inside the 
-									port. Updates at every iteration of simulate().
-		maxTimeOilTankerInside		Max time spent by oil tankers inside the 
-									port. Updates every time an oil tanker leaves 
-									the port.
-		meanTimeOilTankersUnloading		Mean time spent by oil tankers to unload. 
-										Updates at every iteration of simulate().
-		maxTimeOilTankersUnloading		Max time spent by oil tankers to unload. 
-										Updates at every iteration of simulate().
-		meanNumOilTankersWharves	Mean number of oil tankers at the wharves. 
-									Updates at every iteration of simulate().
-		maxNumOilTankersWharves 	Max number of oil tankers at the wharves. 
-									Updates at every iteration of simulate().
+		statistics				Statistics. Accumulators of the metrics: the 
+								time-persistent ones (numOilTankersEntrance, 
+								numOilTankersInside, numOilTankersUnloading, 
+								numOilTankersWharves) update at every iteration 
+								of simulate(), the observational ones 
+								(timeBeforeUnloading, timeUnloading, timeInside) 
+								every time an oil tanker arrives at a wharf, 
+								finishes unloading or leaves the port.
 		tankersCountUnloaded		Number of tankers that have unloaded.
 		numTimesBlocked				Number of times the port gets blocked (that 
 									is, a situation when no tug is avaiblable to 
 									free the wharves while the wharves are full).
-		meanTimeBeforeUnloading		Mean time spent by the oil tankers between 
-									the entrance and the arrival at the wharves.
-		maxTimeBeforeUnloading		Max time spent by the oil tankers between 
-									the entrance and the arrival at the wharves.
+		numEvents				Number of events dispatched by simulate().
+		seed					The master seed of the simulation. Each random 
+								source below has its own stream spawned from 
+								it (cf. RandomStreams).
+		arrivalProcess			ArrivalProcess generating the arrival times of 
+								the oil tankers.
+		trace					TraceRecorder recording every event dispatched 
+								by simulate(), or None.
+		hooks					Hooks. The subscribers to the events, to the 
+								transitions of the oil tankers and to the 
+								blocked situations.
+		profiler				Profiler.Profiler timing the events and the 
+								routines during simulate(), or None.
+		checkpoint				Checkpoint.Checkpointer saving the port 
+								regularly during simulate(), or None.
+		steadyState				SteadyState.BatchMeans recording the batch 
+								averages of the time-persistent metrics, or 
+								None (cf. enableSteadyState()).
+		timeSeries				TimeSeries.StateRecorder recording the curves 
+								of the state of the port, or None (cf. 
+								enableTimeSeries()).
+		started					True once simulate() has generated the first 
+								oil tanker. A port loaded from a checkpoint 
+								is already started.
+		unloadingTimes			VariatePool of the unloading times, chi2(3) 
+								(in hours).
+		travelTimesEmpty		VariatePool of the travel times of the empty 
+								tugs, Normal(muEmpty, sigEmpty).
+		travelTimesFull			VariatePool of the travel times of the tugs 
+								carrying an oil tanker, Normal(muFull, sigFull).
 
 	"""
-	def __init__(self, maxWharves, maxTugs, timeSimulation, muEmpty = 2, sigEmpty = 1, muFull = 10, sigFull = 3):
+	def __init__(self, maxWharves, maxTugs, timeSimulation, muEmpty = 2, sigEmpty = 1, muFull = 10, sigFull = 3, seed = None, blockSize = 4096, trace = None):
 		"""
 		Constructor. 
 		
@@ -146,14 +217,22 @@ class Port:
 			sigFull				The standard deviation of the time took by the 
 								tugs to reach their destination when carrying 
 								an oil tanker. In minutes.
+			seed				Integer, or key of a stream (list of integers, 
+								cf. RandomStreams). The whole simulation can be 
+								reproduced by using the same seed. None to draw 
+								a new seed from the system.
+			blockSize			Number of variates drawn at once by each 
+								VariatePool.
+			trace				A TraceRecorder recording every event, or None.
 		"""
 		self.debugDebug("Initialization starting.")
 		self.maxWharves = maxWharves
 		self.maxTugs = maxTugs
-		self.oilTankersEntrance = [] # No limit on size.
-		self.oilTankersWharves = [] # Needs to be of size <= maxWharves
-		self.oilTankersWharvesDone = [] # The indices in oilTankerWharves that have finished unloading.
-		self.freeTugs = maxTugs # size <= maxTugs
+		self.oilTankersEntrance = collections.deque() # No limit on size.
+		self.oilTankersWharves = {} # Needs to be of size <= maxWharves
+		self.oilTankersWharvesDone = collections.deque() # The indices in oilTankerWharves that have finished unloading.
+		self.tugs = TugPool.TugPool(maxTugs)
+		self.state = PortState.PortState()
 		self.time = 0.0
 		self.previousTime = 0.0
 		self.maxTime = timeSimulation
@@ -162,25 +241,37 @@ class Port:
 		self.sigEmpty = sigEmpty
 		self.muFull = muFull
 		self.sigFull = sigFull
+		if seed is None:
+			seed = RandomStreams.newSeed()
+		self.seed = seed
+		self.arrivalProcess = ArrivalProcess.ArrivalProcess(RandomStreams.spawn(seed, RandomStreams.ARRIVALS))
+		self.unloadingTimes = VariatePool.VariatePool("chisquare", (3,), blockSize, RandomStreams.spawn(seed, RandomStreams.UNLOADING))
+		self.travelTimesEmpty = VariatePool.VariatePool("normal", (muEmpty, sigEmpty), blockSize, RandomStreams.spawn(seed, RandomStreams.TRAVELEMPTY))
+		self.travelTimesFull = VariatePool.VariatePool("normal", (muFull, sigFull), blockSize, RandomStreams.spawn(seed, RandomStreams.TRAVELFULL))
+		self.trace = trace
+		self.hooks = Hooks.Hooks()
+		self.hooks.subscribeInteractive(ISDEBUG, LOGPORT, (PAUSEPORT or ISDEBUG) and not BATCHMODE)
+		self.profiler = None
+		self.checkpoint = None
+		self.steadyState = None
+		self.timeSeries = None
+		self.started = False
 		self.tankerCountDone = 0
 		self.tankerCountInside = 0 # Inside = between the moment they leave the entrance queue and the moment they get out of the port.
 		self.tankerCountWaiting = 0
 		self.tankerCountTotalGenerated = 0 # Increments each time a tanker is generated. 
 		self.cumulTimeTankersDone = 0.0
-		self.meanNumOilTankersEntrance = 0.0
-		self.maxNumOilTankersEntrance = 0.0
-		self.meanNumOilTankersInside = 0.0
-		self.maxNumOilTankersInside = 0.0
-		self.meanTimeOilTankerInside = 0.0 # 
-		self.maxTimeOilTankerInside = 0.0
-		self.meanTimeOilTankersUnloading = 0.0 # Unloading = between the moment they leave the entrance and the moment they finish unloading.
-		self.maxTimeOilTankersUnloading = 0.0
-		self.meanNumOilTankersWharves = 0.0 # The mean number of boats at the wharves.
-		self.maxNumOilTankersWharves = 0.0
+		self.statistics = Statistics.Statistics()
+		self.statistics.registerTimePersistent("numOilTankersEntrance", ("waiting",))
+		self.statistics.registerTimePersistent("numOilTankersInside", ("inside",))
+		self.statistics.registerTimePersistent("numOilTankersUnloading", ("atWharf",)) # Unloading = between the moment they arrive at the wharf and the moment they finish unloading.
+		self.statistics.registerTimePersistent("numOilTankersWharves", ("atWharf", "doneUnloading")) # The number of boats at the wharves.
+		self.statistics.registerObservational("timeBeforeUnloading")
+		self.statistics.registerObservational("timeUnloading")
+		self.statistics.registerObservational("timeInside")
 		self.numTimesBlocked = 0
-		self.meanTimeBeforeUnloading = 0.0
-		self.maxTimeBeforeUnloading = 0.0
 		self.tankersCountUnloaded = 0
+		self.numEvents = 0
 		self.debugDebug("End of initialization.")
 	
 	
@@ -192,62 +283,89 @@ class Port:
 		occurs, and potentially an oil tanker if the event concerns an oil tanker.
 		Then it checks which event is the next and uses the corresponding routine.
 		The loop stops after some time, given at the construction of the instance.
+		If the port was loaded from a checkpoint, the simulation continues 
+		where it stopped.
+		If self.profiler is not None, the events and the routines are timed 
+		(cf. Profiler).
+		Returns the record of the simulation (cf. getRecord()).
 		"""
 		self.debugDebug("Simulation starting.")
-		self.generateOilTanker()		
+		if not self.started:
+			self.started = True
+			self.generateOilTanker()
 		event = ""
 		oilTanker = None 
-		stopThat = False
+		beforeEvent = self.hooks.beforeEvent
+		afterEvent = self.hooks.afterEvent
+		blocked = self.hooks.blocked
+		profiler = self.profiler
+		if profiler is not None:
+			profiler.attach(self)
 
 		while self.time < self.maxTime:
 			self.previousTime = self.time
-			event, self.time, oilTanker = self.listEvents.getNextEvent()
-			self.debugDebug("Step : " + event + " after time : "+ str(self.time) + "Oil Tanker : " + str(oilTanker))
+			event, self.time, oilTanker, tug = self.listEvents.getNextEvent()
+			self.numEvents += 1
 			self.updateTimes()
+			if self.trace is not None:
+				self.trace.record(event, self.time, oilTanker, self.state, len(self.tugs.idle))
+			if beforeEvent:
+				self.hooks.publish("beforeEvent", self, event, oilTanker)
 			
 			if event == "ArrivalOilTankerEntrance":
 				self.routineArrivalOilTankerEntrance(oilTanker)
 			elif event == "ArrivalTugEntrance":
-				self.routineArrivalTugEntrance()
+				self.routineArrivalTugEntrance(tug)
 			elif event == "ArrivalOilTankerWharf":
-				self.routineArrivalOilTankerWharf(oilTanker)
+				self.routineArrivalOilTankerWharf(oilTanker, tug)
 			elif event == "UnloadingDone":
 				self.routineUnloadingDone(oilTanker)
 			elif event == "ArrivalTugWharf":
-				self.routineArrivalTugWharf()
+				self.routineArrivalTugWharf(tug)
 			elif event == "ExitOilTanker":
-				self.routineExitOilTanker(oilTanker)
+				self.routineExitOilTanker(oilTanker, tug)
 			elif event == "TugAvailable":
 				if SAFEPORT:
-					self.routineTugAvailableSafe()
+					self.routineTugAvailableSafe(tug)
 				else:
-					self.routineTugAvailable()
+					self.routineTugAvailable(tug)
 			
+			if afterEvent:
+				self.hooks.publish("afterEvent", self, event, oilTanker)
 			oilTanker = None
-			self.debugDebug("Event to remove : " + event)
 			self.listEvents.removeLastEvent(event)
 			
-			if LOGPORT and not stopThat:
-				self.printState()
-				stopThat = (raw_input("Press a key + Enter to prevent this interruption from happening again, of simply Enter if you want this to appear next time too:") != "")
 			if self.detectBlockedSituation():
 				self.numTimesBlocked += 1
-		
+				if blocked:
+					self.hooks.publish("blocked", self)
+			if self.checkpoint is not None:
+				self.checkpoint.tick(self)
+			if profiler is not None:
+				profiler.endEvent(event)
+		
+		if profiler is not None:
+			profiler.detach(self)
+		# Records the final state (min/max) without counting the last interval twice.
+		self.previousTime = self.time
 		self.updateTimes()
+		if self.trace is not None:
+			self.trace.flush()
+		return self.getRecord()
 		
 		
 	def generateOilTanker(self):
 		"""
-		Used to generate an OilTanker. Simulates an exponential variate of 
-		parameter Port.lambdat, adds the OilTanker to the list of events.
+		Used to generate an OilTanker. Takes the next arrival time from 
+		self.arrivalProcess, adds the OilTanker to the list of events.
 		"""
 		self.tankerCountTotalGenerated += 1
-		lt = self.lambdat()
-		t = 60*random.expovariate(lt)
-		self.debugDebug(t)
+		t = self.arrivalProcess.nextArrival()
 		#self.oilTankersEntrance.append(OilTanker(t, self.tankerCountTotalGenerated))
-		ot = OilTanker.OilTanker(self.time + t, self.tankerCountTotalGenerated)
-		self.listEvents.addEvent("ArrivalOilTankerEntrance", self.time + t, ot)
+		ot = OilTanker.OilTanker(t, self.tankerCountTotalGenerated)
+		self.listEvents.addEvent("ArrivalOilTankerEntrance", t, ot)
+		if self.hooks.tanker:
+			self.hooks.publish("tanker", self, ot, "generated")
 	
 	
 	def routineArrivalOilTankerEntrance(self, oilTanker):
@@ -261,36 +379,51 @@ class Port:
 			- generate another arrival of another tanker.
 			- if a tug is free, we ask it to come take the oilTanker (i.e. add 
 			the event "ArrivalTugEntrance" after a time Normal(self.muEmpty, self.sigEmpty))
+			The tug is taken from the idle tugs of self.tugs.
 			
 		Arguments:
 			oilTanker		The arriving oil tanker.
 		"""
 		self.tankerCountWaiting += 1
+		self.state.waiting += 1
 		self.generateOilTanker()
 		self.oilTankersEntrance.append(oilTanker)
-		
-		if self.freeTugs > 0:
-			self.freeTugs -= 1
-			t = random.normalvariate(self.muEmpty, self.sigEmpty)
-			self.listEvents.addEvent("ArrivalTugEntrance", self.time + t)
+		if self.hooks.tanker:
+			self.hooks.publish("tanker", self, oilTanker, "entrance")
+		
+		if self.tugs.idle:
+			tug = self.tugs.acquire(self.time)
+			self.state.tugsToEntrance += 1
+			t = self.travelTimesEmpty.draw()
+			self.listEvents.addEvent("ArrivalTugEntrance", self.time + t, None, tug)
 			
 	
-	def routineArrivalTugEntrance(self):
+	def routineArrivalTugEntrance(self, tug):
 		"""
 		Routine supposed to be triggered when a tug arrives at the entrance of 
 		the port to take an oil tanker.
 		The tug takes the first oil tanker and leads it to a wharf. It adds an 
 		event "ArrivalOilTankerWharf" to the list.
+		
+		Arguments:
+			tug				The number of the tug.
 		"""
-		t = random.normalvariate(self.muFull, self.sigFull)
-		ot = self.oilTankersEntrance.pop(0)
+		t = self.travelTimesFull.draw()
+		ot = self.oilTankersEntrance.popleft()
 		#self.oilTankersEntrance.remove(ot)
-		self.listEvents.addEvent("ArrivalOilTankerWharf", self.time + t, ot)
+		self.listEvents.addEvent("ArrivalOilTankerWharf", self.time + t, ot, tug)
+		self.tugs.setState(tug, TugPool.TOWING, self.time)
 		self.tankerCountWaiting -= 1
 		self.tankerCountInside += 1
+		self.state.tugsToEntrance -= 1
+		self.state.waiting -= 1
+		self.state.tugsTowingIn += 1
+		self.state.inside += 1
+		if self.hooks.tanker:
+			self.hooks.publish("tanker", self, ot, "towedIn")
 
 	
-	def routineArrivalOilTankerWharf(self, oilTanker):
+	def routineArrivalOilTankerWharf(self, oilTanker, tug):
 		"""
 		Routine supposed to be triggered when "oilTanker" arrives at the wharf.
 		The oilTanker is preparing to unload its content and it frees the tug.
@@ -298,6 +431,7 @@ class Port:
 		
 		Arguments:
 			oilTanker		The oil tanker that arrives to the wharf.
+			tug				The number of the tug that towed it.
 
 		OJO
 		There can be a blocked situation here!
@@ -306,21 +440,27 @@ class Port:
 			+ the tugs are carrying an oil tanker to the wharves
 		
 		"""
-		self.maxTimeBeforeUnloading = max(self.maxTimeBeforeUnloading, self.time - oilTanker.getEntranceTime())
-		self.meanTimeBeforeUnloading += self.time - oilTanker.getEntranceTime()
+		self.statistics.observe("timeBeforeUnloading", self.time - oilTanker.getEntranceTime())
+		self.state.tugsTowingIn -= 1
 
-		if len(self.oilTankersWharves) + len(self.oilTankersWharvesDone) < self.maxWharves: 
+		if self.state.atWharf + self.state.doneUnloading < self.maxWharves: 
 			# It means that a wharf is free to deal with the oilTanker.
-			self.listEvents.addEvent("TugAvailable", self.time)
+			self.state.atWharf += 1
+			self.state.pendingTugAvailable += 1
+			self.listEvents.addEvent("TugAvailable", self.time, None, tug)
 			#t = tStudent.rvs(3)
-			t = 60*chi2.rvs(3)
+			t = 60*self.unloadingTimes.draw()
 			self.listEvents.addEvent("UnloadingDone", self.time + t, oilTanker)
-			self.oilTankersWharves.append(oilTanker)
-		elif self.detectBlockedSituation():
-			print "Blocked situation. I don't kow how to handle it."
-			self.printState()
-			self.printResultsOnTheFly()
-			raw_input()
+			self.oilTankersWharves[oilTanker.id] = oilTanker
+			if self.hooks.tanker:
+				self.hooks.publish("tanker", self, oilTanker, "wharf")
+			return
+		
+		# No wharf is free: the oil tanker is lost, and so is its tug.
+		self.state.inside -= 1
+		self.tugs.setState(tug, TugPool.LOST, self.time)
+		if self.hooks.tanker:
+			self.hooks.publish("tanker", self, oilTanker, "lost")
 
 	
 	def routineUnloadingDone(self, oilTanker):
@@ -334,30 +474,44 @@ class Port:
 		Arguments:
 			oilTanker 		The oil tanker whose unloading is done.
 		"""
-		self.oilTankersWharves.remove(oilTanker)
+		del self.oilTankersWharves[oilTanker.id]
 		self.oilTankersWharvesDone.append(oilTanker)
 		self.tankersCountUnloaded += 1
-		self.maxTimeOilTankersUnloading = max(oilTanker.getLastInterval() , self.maxTimeOilTankersUnloading)
+		self.statistics.observe("timeUnloading", oilTanker.getLastInterval())
+		self.state.atWharf -= 1
+		self.state.doneUnloading += 1
+		if self.hooks.tanker:
+			self.hooks.publish("tanker", self, oilTanker, "unloaded")
 
-		if self.freeTugs > 0 and self.listEvents.getListEventSize("ArrivalTugWharf") < len(self.oilTankersWharvesDone) :
-			self.freeTugs -= 1
-			t = random.normalvariate(self.muEmpty, self.sigEmpty)
-			self.listEvents.addEvent("ArrivalTugWharf", self.time + t)
+		if self.tugs.idle and self.state.tugsToWharf < self.state.doneUnloading :
+			tug = self.tugs.acquire(self.time)
+			self.state.tugsToWharf += 1
+			t = self.travelTimesEmpty.draw()
+			self.listEvents.addEvent("ArrivalTugWharf", self.time + t, None, tug)
 			
 			
-	def routineArrivalTugWharf(self):
+	def routineArrivalTugWharf(self, tug):
 		"""
 		Routine supposed to be triggered when a tug arrives at a wharf to take 
 		care of an oil tanker.
 		Starts the evacuation of the oil tanker.
 		Adds "ExitOilTanker" to the list of events.
-		"""
-		t = random.normalvariate(self.muFull, self.sigFull)
-		ot = self.oilTankersWharvesDone.pop(0) 
-		self.listEvents.addEvent("ExitOilTanker", self.time + t, ot)
+		
+		Arguments:
+			tug				The number of the tug.
+		"""
+		t = self.travelTimesFull.draw()
+		ot = self.oilTankersWharvesDone.popleft()
+		self.listEvents.addEvent("ExitOilTanker", self.time + t, ot, tug)
+		self.tugs.setState(tug, TugPool.TOWING, self.time)
+		self.state.tugsToWharf -= 1
+		self.state.doneUnloading -= 1
+		self.state.tugsTowingOut += 1
+		if self.hooks.tanker:
+			self.hooks.publish("tanker", self, ot, "towedOut")
 		
 	
-	def routineExitOilTanker(self, oilTanker):
+	def routineExitOilTanker(self, oilTanker, tug):
 		"""
 		Routine supposed to be triggered when "oilTanker" exits the port.
 		Here are supposed to occur the whole steps of calculations.
@@ -365,20 +519,21 @@ class Port:
 		
 		Arguments:
 			oilTanker		The oil tanker that leaves the port.
+			tug				The number of the tug that towed it.
 		"""
 		self.cumulTimeTankersDone = oilTanker.getTotalTime()
 		self.tankerCountInside -= 1
 		self.tankerCountDone += 1
-		self.listEvents.addEvent("TugAvailable", self.time)
-		self.maxTimeOilTankerInside = max(self.maxTimeOilTankerInside, self.time - oilTanker.getEntranceTime())
-		
-		if self.maxTimeOilTankerInside > 10000:
-			print "Pause: " + str(len(oilTanker.listTimes))
-			print "Pause: " + str(oilTanker)
-			raw_input()
+		self.state.tugsTowingOut -= 1
+		self.state.inside -= 1
+		self.state.pendingTugAvailable += 1
+		self.listEvents.addEvent("TugAvailable", self.time, None, tug)
+		self.statistics.observe("timeInside", self.time - oilTanker.getEntranceTime())
+		if self.hooks.tanker:
+			self.hooks.publish("tanker", self, oilTanker, "exit")
 	
 	
-	def routineTugAvailable(self):
+	def routineTugAvailable(self, tug):
 		"""
 		Routine supposed to be triggered when a tug becomes available.
 		Gives priority to coming oil tankers over oil tankers that are done 
@@ -389,19 +544,28 @@ class Port:
 		If a tug becomes available while the queue at the entrance is empty, 
 		and an oil tanker is done at the wharves, the tug will go to the wharves 
 		(i.e. adds an event "ArrivalTugWharf" to the list).
-		Otherwise, the tug becomes available for further use.
-		"""
-		if len(self.oilTankersEntrance) > 0 and self.listEvents.getListEventSize("ArrivalTugEntrance") < len(self.oilTankersEntrance) :
-			t = random.normalvariate(self.muEmpty, self.sigEmpty)
-			self.listEvents.addEvent("ArrivalTugEntrance", self.time + t)
-		elif len(self.oilTankersWharvesDone) > 0 and self.listEvents.getListEventSize("ArrivalTugWharf") < len(self.oilTankersWharvesDone) :
-			t = random.normalvariate(self.muEmpty, self.sigEmpty)
-			self.listEvents.addEvent("ArrivalTugWharf", self.time + t)
-		elif self.freeTugs < self.maxTugs: # Should not occur, but well...
-			self.freeTugs += 1
+		Otherwise, the tug becomes available for further use (it goes back to 
+		the idle tugs of self.tugs).
 		
+		Arguments:
+			tug				The number of the tug.
+		"""
+		self.state.pendingTugAvailable -= 1
+		if self.state.waiting > 0 and self.state.tugsToEntrance < self.state.waiting :
+			self.state.tugsToEntrance += 1
+			self.tugs.setState(tug, TugPool.EMPTY, self.time)
+			t = self.travelTimesEmpty.draw()
+			self.listEvents.addEvent("ArrivalTugEntrance", self.time + t, None, tug)
+		elif self.state.doneUnloading > 0 and self.state.tugsToWharf < self.state.doneUnloading :
+			self.state.tugsToWharf += 1
+			self.tugs.setState(tug, TugPool.EMPTY, self.time)
+			t = self.travelTimesEmpty.draw()
+			self.listEvents.addEvent("ArrivalTugWharf", self.time + t, None, tug)
+		else:
+			self.tugs.release(tug, self.time)
 		
-	def routineTugAvailableSafe(self):
+		
+	def routineTugAvailableSafe(self, tug):
 		"""
 		Routine supposed to be triggered when a tug becomes available.
 		Gives priority to unloaded oil tankers over oil tankers that are coming 
@@ -412,16 +576,25 @@ class Port:
 		If a tug becomes available while there are some oil tankers waiting in 
 		the entrance and no oil tanker is waiting at the wharves, the tug will 
 		take care of them (i.e. adds an event "ArrivalTugEntrance" to the list).
-		Otherwise, the tug becomes available for further use.
-		"""
-		if len(self.oilTankersWharvesDone) > 0 and self.listEvents.getListEventSize("ArrivalTugWharf") < len(self.oilTankersWharvesDone) :
-			t = random.normalvariate(self.muEmpty, self.sigEmpty)
-			self.listEvents.addEvent("ArrivalTugWharf", self.time + t)
-		elif len(self.oilTankersEntrance) > 0 and self.listEvents.getListEventSize("ArrivalTugEntrance") < len(self.oilTankersEntrance) :
-			t = random.normalvariate(self.muEmpty, self.sigEmpty)
-			self.listEvents.addEvent("ArrivalTugEntrance", self.time + t)
-		elif self.freeTugs < self.maxTugs: # Should not occur, but well...
-			self.freeTugs += 1
+		Otherwise, the tug becomes available for further use (it goes back to 
+		the idle tugs of self.tugs).
+		
+		Arguments:
+			tug				The number of the tug.
+		"""
+		self.state.pendingTugAvailable -= 1
+		if self.state.doneUnloading > 0 and self.state.tugsToWharf < self.state.doneUnloading :
+			self.state.tugsToWharf += 1
+			self.tugs.setState(tug, TugPool.EMPTY, self.time)
+			t = self.travelTimesEmpty.draw()
+			self.listEvents.addEvent("ArrivalTugWharf", self.time + t, None, tug)
+		elif self.state.waiting > 0 and self.state.tugsToEntrance < self.state.waiting :
+			self.state.tugsToEntrance += 1
+			self.tugs.setState(tug, TugPool.EMPTY, self.time)
+			t = self.travelTimesEmpty.draw()
+			self.listEvents.addEvent("ArrivalTugEntrance", self.time + t, None, tug)
+		else:
+			self.tugs.release(tug, self.time)
 		
 		
 		
@@ -433,52 +606,85 @@ class Port:
 
 	def lambdat(self):
 		"""
-		Generates the lambda depending on the time "self.time".
-		"""
-		t = (self.time / 60.0) % 24.0
-		lt = 0
-		if 0.0 <= t and t < 5.0:
-			lt = 2.0*t/5.0 + 5.0
-		elif 5.0 <= t and t < 9.0:
-			lt = -1.0*t/4.0 + 33.0/4
-		elif 9.0 <= t and t < 15.0:
-			lt = 1.0*t/2.0 + 3.0/2.0
-		elif 15.0 <= t and t < 17.0:
-			lt = -3.0*t/2.0 + 63.0/2.0
-		else:
-			lt = -1.0*t/7.0 + 59.0/7.0
-		self.debugDebug(str(t) + " + lambda: " + str(lt))
+		Generates the lambda depending on the time "self.time". The daily 
+		profile is defined in ArrivalProcess.
+		"""
+		lt = ArrivalProcess.rate(self.time)
+		self.debugDebug(str(self.time) + " + lambda: " + str(lt))
 
 		return lt
 		
 		
+	def __getstate__(self):
+		"""
+		Used by pickle (cf. Checkpoint). The trace, the checkpointer, the 
+		profiler and the subscribers are not saved: they belong to the current 
+		run.
+		"""
+		state = self.__dict__.copy()
+		state["trace"] = None
+		state["checkpoint"] = None
+		state["profiler"] = None
+		state["hooks"] = None
+		return state
+		
+		
+	def __setstate__(self, state):
+		"""
+		Used by pickle (cf. Checkpoint). Subscribes the interactive subscribers 
+		again, as in __init__().
+		"""
+		self.__dict__.update(state)
+		self.hooks = Hooks.Hooks()
+		self.hooks.subscribeInteractive(ISDEBUG, LOGPORT, (PAUSEPORT or ISDEBUG) and not BATCHMODE)
+		
+		
 	def getNumOilTankersInside(self):
 		"""
 		Returns the number of oil tankers inside the port.
 		"""
-		return self.listEvents.getNumTankers("ArrivalOilTankerWharf") + self.listEvents.getNumTankers("ExitOilTanker") + len(self.oilTankersWharves) + len(self.oilTankersWharvesDone)
+		return self.state.inside
 			
 			
 	def updateTimes(self):
 		"""
 		Updates inner variables in anticipation of the results.
 		"""
-		intervalTime = self.time - self.previousTime
+		self.statistics.advance(self.state, self.time - self.previousTime)
+		if self.steadyState is not None:
+			self.steadyState.advance(self.state, self.previousTime, self.time)
+		if self.timeSeries is not None:
+			state = self.state
+			self.timeSeries.advance((state.waiting, state.inside, state.atWharf + state.doneUnloading, len(self.tugs.idle)), self.previousTime, self.time)
 		
-		self.meanNumOilTankersEntrance += float(len(self.oilTankersEntrance))*intervalTime
-		self.maxNumOilTankersEntrance = max(len(self.oilTankersEntrance), self.maxNumOilTankersEntrance)
 		
-		tampon = float(self.getNumOilTankersInside())
+	def enableSteadyState(self, batchLength = 60.0):
+		"""
+		Records the averages of the time-persistent metrics over batches of 
+		"batchLength" minutes during simulate(), for a steady-state analysis 
+		(cf. SteadyState.BatchMeans.analyze()). Supposed to be called before 
+		simulate().
 		
-		self.meanNumOilTankersInside += tampon * intervalTime
-		self.maxNumOilTankersInside = max(tampon, self.maxNumOilTankersInside)
+		Arguments:
+			batchLength 	Length of a batch, in minutes.
+		"""
+		metrics = [(name, attributes) for name, attributes, accumulator in self.statistics.timePersistent]
+		self.steadyState = SteadyState.BatchMeans(metrics, batchLength)
 		
-		self.meanTimeOilTankerInside += tampon * intervalTime
 		
-		self.meanTimeOilTankersUnloading += len(self.oilTankersWharves) * intervalTime
+	def enableTimeSeries(self, step = 10.0, capacity = 4096, profileStep = 60.0):
+		"""
+		Records the curves of TimeSeries.SERIES during simulate(), in buckets 
+		of "step" minutes that merge when "capacity" buckets are full, and 
+		their daily profile (cf. TimeSeries.StateRecorder). Supposed to be 
+		called before simulate().
 		
-		self.meanNumOilTankersWharves += (len(self.oilTankersWharves) + len(self.oilTankersWharvesDone)) * intervalTime
-		self.maxNumOilTankersWharves = max(len(self.oilTankersWharves) + len(self.oilTankersWharvesDone), self.maxNumOilTankersWharves)
+		Arguments:
+			step 			Initial width of a bucket, in minutes.
+			capacity 		Number of buckets.
+			profileStep 	Width of a bin of the daily profile, in minutes.
+		"""
+		self.timeSeries = TimeSeries.StateRecorder(TimeSeries.SERIES, step, capacity, profileStep)
 		
 		
 	def printResults(self):
@@ -494,24 +700,81 @@ class Port:
 		"""
 		Computes and prints the results of the simulation if it were to stop now.
 		"""
+		results = self.getResults()
 		print "--------------------------------------------"
 		print "Results of the simulation:"
-		print "Mean number of oil tankers waiting in the entrance: " + str(self.meanNumOilTankersEntrance/self.time) + " units."
-		print "Max number of oil tankers waiting in the entrance: " + str(self.maxNumOilTankersEntrance) + " units."
-		print "Mean number of oil tankers inside the port: " + str(self.meanNumOilTankersInside/self.time) + " units."
-		print "Max number of oil tankers inside the port: " + str(self.maxNumOilTankersInside) + " unit."
-		print "Mean time spent by the tankers inside the port: " + mtt(self.meanTimeOilTankerInside/self.tankerCountDone)
-		print "Max time spent by the tankers inside the port: " + mtt(self.maxTimeOilTankerInside)
-		print "Mean time before unloading: " + mtt(self.meanTimeBeforeUnloading/self.time)
-		print "Max time before unloading: " + mtt(self.maxTimeBeforeUnloading)
-		print "Mean time spent by the tankers unloading at the wharves: " + mtt(self.meanTimeOilTankersUnloading/self.tankersCountUnloaded)
-		print "Max time spent by the tankers unloading at the wharves: " + mtt(self.maxTimeOilTankersUnloading)
-		print "Mean number of tankers at the wharves: " + str(self.meanNumOilTankersWharves/self.time) + " units."
-		print "Max number of tankers at the wharves: " + str(self.maxNumOilTankersWharves) + " units."
-		print "Number of times the port was blocked: " + str(self.numTimesBlocked) + " times."
+		for name, label, unit in RESULTS:
+			print label + ": " + formatResult(results[name], unit)
 		print "--------------------------------------------"
 		
 		
+	def getResults(self):
+		"""
+		Computes the results of the simulation if it were to stop now. Returns 
+		a dictionary (name, value), the names are the ones of RESULTS. Times 
+		are in minutes. A mean over no oil tanker is NaN.
+		"""
+		entrance = self.statistics.get("numOilTankersEntrance")
+		inside = self.statistics.get("numOilTankersInside")
+		unloading = self.statistics.get("numOilTankersUnloading")
+		wharves = self.statistics.get("numOilTankersWharves")
+		timeBeforeUnloading = self.statistics.get("timeBeforeUnloading")
+		
+		return {"meanNumOilTankersEntrance": entrance.getMean(),
+				"maxNumOilTankersEntrance": entrance.getMaximum(),
+				"meanNumOilTankersInside": inside.getMean(),
+				"maxNumOilTankersInside": inside.getMaximum(),
+				"meanTimeOilTankerInside": Port.ratio(inside.integral, self.tankerCountDone),
+				"maxTimeOilTankerInside": self.statistics.get("timeInside").getMaximum(),
+				"meanTimeBeforeUnloading": Port.ratio(timeBeforeUnloading.total, self.time),
+				"maxTimeBeforeUnloading": timeBeforeUnloading.getMaximum(),
+				"meanTimeOilTankersUnloading": Port.ratio(unloading.integral, self.tankersCountUnloaded),
+				"maxTimeOilTankersUnloading": self.statistics.get("timeUnloading").getMaximum(),
+				"meanNumOilTankersWharves": wharves.getMean(),
+				"maxNumOilTankersWharves": wharves.getMaximum(),
+				"numTimesBlocked": self.numTimesBlocked
+				}
+		
+		
+	def getRecord(self):
+		"""
+		Returns the record of the simulation if it were to stop now: a flat 
+		dictionary with the configuration (CONFIGURATION), the counters 
+		(COUNTS) and the results (RESULTS), cf. Records to save records in 
+		bulk. "safe" is the current value of SAFEPORT.
+		"""
+		record = {"maxWharves": self.maxWharves,
+				"maxTugs": self.maxTugs,
+				"timeSimulation": self.maxTime,
+				"muEmpty": self.muEmpty,
+				"sigEmpty": self.sigEmpty,
+				"muFull": self.muFull,
+				"sigFull": self.sigFull,
+				"safe": SAFEPORT,
+				"seed": self.seed,
+				"time": self.time,
+				"numEvents": self.numEvents,
+				"tankersGenerated": self.tankerCountTotalGenerated,
+				"tankersDone": self.tankerCountDone,
+				"tankersUnloaded": self.tankersCountUnloaded,
+				"tankersWaiting": self.state.waiting,
+				"tankersInside": self.state.inside,
+				"tugUtilization": self.tugs.getMeanUtilization(self.time)
+				}
+		record.update(self.getResults())
+		return record
+		
+		
+	@staticmethod
+	def ratio(total, count):
+		"""
+		Returns total/count as a float, or NaN if count is 0.
+		"""
+		if count == 0:
+			return float("nan")
+		return float(total) / count
+		
+		
 	@staticmethod	
 	def printList(st, li):
 		"""
@@ -539,7 +802,8 @@ class Port:
 		print "Time: " + minutesToTime(self.time) + " (" + str(self.time) + ")"
 		print "Tankers generated: " + str(self.tankerCountTotalGenerated)
 		print "Tankers handled: " + str(self.tankerCountDone)
-		print "FreeTugs: " + str(self.freeTugs)
+		print "FreeTugs: " + str(len(self.tugs.idle))
+		print "State: " + str(self.state)
 		print "Num times blocked: " + str(self.numTimesBlocked)
 		print ""
 		print self.listEvents
@@ -554,7 +818,7 @@ class Port:
 		oilTankersWharves and oilTankersWharvesDone.
 		"""
 		Port.printList("otEntrance: ", self.oilTankersEntrance)	
-		Port.printList("otWharves: ", self.oilTankersWharves)	
+		Port.printList("otWharves: ", self.oilTankersWharves.values())	
 		Port.printList("otWDone: ", self.oilTankersWharvesDone)	
 		
 		
@@ -566,11 +830,7 @@ class Port:
 		are done unloading need a tug to leave, and all tugs are carrying oil 
 		tankers from the entrance. 
 		"""
-		blocked = (self.freeTugs == 0 and self.listEvents.getListEventSize("ArrivalTugWharf") == 0)
-		blocked = blocked and (len(self.oilTankersWharves) + len(self.oilTankersWharvesDone) >= self.maxWharves)
-		blocked = blocked and (self.listEvents.getListEventSize("TugAvailable") == 0)
-		blocked = blocked and (self.listEvents.getListEventSize("ExitOilTanker") == 0)
-		return blocked
+		return self.state.isBlocked(len(self.tugs.idle), self.maxWharves)
 		
 		
 	def debugDebug(self, s):
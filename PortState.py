@@ -0,0 +1,111 @@
+# -*- coding:utf8 -*-
+
+
+"""============================================================================
+								ENUNCIADO 5
+								PRACTICA 2
+
+	BEURIER Erwan
+	CANAVATE VEGA Fernando
+	DE LA ROSA Augustin
+	NAPOLI Luca
+
+	This file contains the implementation of the class PortState.
+
+	Useful methods:
+		getTugsInTransit()
+		isBlocked()
+	(The rest is supposed to be private, even if Python doesn't know about
+	encapsulation)
+
+	This file is not supposed to be launched via console.
+
+	Vocabulary (because the code is in English but the wording is in Spanish):
+		tug 		= remolcador
+		oil tanker	= petrolero
+		wharf 		= muelle
+
+
+============================================================================"""
+
+
+class PortState(object):
+	"""
+	Counters describing the state of the port. The routines of the Port update
+	them when they change the state, so that reading the state never needs to
+	measure a list or to query the ListEvents.
+	A counter of pending events counts the events that have been added to the
+	ListEvents and whose routine has not started yet.
+
+	Attributes:
+		waiting				Number of oil tankers in the queue at the entrance.
+		inside				Number of oil tankers inside the port: towed to a
+							wharf, at a wharf or towed out of the port.
+		atWharf				Number of oil tankers unloading at the wharves.
+		doneUnloading		Number of oil tankers that have finished unloading
+							and wait for a tug at the wharves.
+		tugsToEntrance		Number of empty tugs going to the entrance (pending
+							"ArrivalTugEntrance" events).
+		tugsToWharf			Number of empty tugs going to the wharves (pending
+							"ArrivalTugWharf" events).
+		tugsTowingIn		Number of tugs towing an oil tanker to a wharf
+							(pending "ArrivalOilTankerWharf" events).
+		tugsTowingOut		Number of tugs towing an oil tanker out of the port
+							(pending "ExitOilTanker" events).
+		pendingTugAvailable	Number of pending "TugAvailable" events.
+	"""
+	__slots__ = ("waiting", "inside", "atWharf", "doneUnloading", "tugsToEntrance",
+				"tugsToWharf", "tugsTowingIn", "tugsTowingOut", "pendingTugAvailable")
+
+	def __init__(self):
+		"""
+		Default constructor. Empty port.
+		"""
+		self.waiting = 0
+		self.inside = 0
+		self.atWharf = 0
+		self.doneUnloading = 0
+		self.tugsToEntrance = 0
+		self.tugsToWharf = 0
+		self.tugsTowingIn = 0
+		self.tugsTowingOut = 0
+		self.pendingTugAvailable = 0
+
+
+	def getTugsInTransit(self):
+		"""
+		Returns the number of tugs travelling, empty or not.
+		"""
+		return self.tugsToEntrance + self.tugsToWharf + self.tugsTowingIn + self.tugsTowingOut
+
+
+	def isBlocked(self, freeTugs, maxWharves):
+		"""
+		Returns True if the port is in a blocked state: no tug is free or about
+		to be, the wharves are full, and no tug is going to free a wharf.
+
+		Arguments:
+			freeTugs		Number of free tugs in the port.
+			maxWharves		Total number of wharves in the port.
+		"""
+		return (freeTugs == 0 and self.tugsToWharf == 0 and self.pendingTugAvailable == 0
+				and self.tugsTowingOut == 0 and self.atWharf + self.doneUnloading >= maxWharves)
+
+
+
+
+	"""========================================================================
+	Below these two lines are functions that are not crucial to the
+	understanding of the code.
+	========================================================================"""
+
+	def __str__(self):
+		"""
+		Method to make the instance printable.
+		"""
+		s = "waiting: " + str(self.waiting) + ", inside: " + str(self.inside)
+		s += ", atWharf: " + str(self.atWharf) + ", doneUnloading: " + str(self.doneUnloading)
+		s += ", tugsToEntrance: " + str(self.tugsToEntrance) + ", tugsToWharf: " + str(self.tugsToWharf)
+		s += ", tugsTowingIn: " + str(self.tugsTowingIn) + ", tugsTowingOut: " + str(self.tugsTowingOut)
+		s += ", pendingTugAvailable: " + str(self.pendingTugAvailable)
+		return s
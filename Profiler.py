@@ -0,0 +1,185 @@
+# -*- coding:utf8 -*-
+
+
+"""============================================================================
+								ENUNCIADO 5
+								PRACTICA 2
+
+	BEURIER Erwan
+	CANAVATE VEGA Fernando
+	DE LA ROSA Augustin
+	NAPOLI Luca
+
+	This file contains the implementation of the class Profiler, that counts
+	the calls and measures the wall-clock time of every type of event and of
+	the main methods of the Port during Port.simulate().
+
+	Useful methods:
+		attach()
+		detach()
+		endEvent()
+		getHotSpots()
+		printHotSpots()
+	(The rest is supposed to be private, even if Python doesn't know about
+	encapsulation)
+
+	This file is not supposed to be launched via console.
+
+
+============================================================================"""
+
+
+import timeit
+
+
+# The methods that are timed: methods of the Port, and of its ListEvents
+# (prefixed with "listEvents.").
+METHODS = ["routineArrivalOilTankerEntrance", "routineArrivalTugEntrance",
+			"routineArrivalOilTankerWharf", "routineUnloadingDone",
+			"routineArrivalTugWharf", "routineExitOilTanker",
+			"routineTugAvailable", "routineTugAvailableSafe",
+			"generateOilTanker", "updateTimes", "detectBlockedSituation",
+			"listEvents.getNextEvent", "listEvents.addEvent",
+			"listEvents.removeLastEvent"]
+
+
+class Profiler:
+	"""
+	Profiler of Port.simulate(). A Port only pays for it when its attribute
+	"profiler" is not None: simulate() then calls attach() before the loop,
+	endEvent() after each event and detach() after the loop.
+	attach() replaces the methods of METHODS of the port by timed versions
+	(attributes of the instances, so the class and the other ports are not
+	affected), detach() removes them.
+	The times of the methods include the methods that they call (e.g.
+	routineArrivalOilTankerEntrance includes generateOilTanker).
+
+	Attributes:
+		methods			Dictionary (method, [seconds, calls]).
+		events			Dictionary (event, [seconds, calls]). The time of an
+						event is the time of its whole iteration of the loop,
+						from getNextEvent() to the checks after the routine.
+		total			Total time spent in the loop.
+		lastEnd			Clock at the end of the last iteration.
+	"""
+
+	def __init__(self):
+		"""
+		Default constructor. Nothing measured.
+		"""
+		self.methods = dict((method, [0.0, 0]) for method in METHODS)
+		self.events = {}
+		self.total = 0.0
+		self.lastEnd = None
+
+
+	def attach(self, port):
+		"""
+		Replaces the methods of METHODS of "port" and of its ListEvents by
+		timed versions, and starts the clock of the first iteration.
+
+		Arguments:
+			port			The Port to profile.
+		"""
+		for method in METHODS:
+			owner, name = Profiler.getOwner(port, method)
+			setattr(owner, name, Profiler.timed(getattr(owner, name), self.methods[method]))
+		self.lastEnd = timeit.default_timer()
+
+
+	def detach(self, port):
+		"""
+		Restores the methods of "port" and of its ListEvents.
+
+		Arguments:
+			port			The profiled Port.
+		"""
+		for method in METHODS:
+			owner, name = Profiler.getOwner(port, method)
+			if name in owner.__dict__:
+				delattr(owner, name)
+
+
+	def endEvent(self, event):
+		"""
+		Records the end of the iteration of the loop that dispatched "event".
+
+		Arguments:
+			event			The name of the event.
+		"""
+		now = timeit.default_timer()
+		duration = now - self.lastEnd
+		self.lastEnd = now
+		self.total += duration
+		if event not in self.events:
+			self.events[event] = [0.0, 0]
+		self.events[event][0] += duration
+		self.events[event][1] += 1
+
+
+	def getHotSpots(self):
+		"""
+		Returns two lists of tuples (name, seconds, calls), sorted by
+		decreasing time: the events, then the methods (only the ones that
+		were called).
+		"""
+		events = sorted([(name, s, c) for name, (s, c) in self.events.iteritems()], key = lambda spot: -spot[1])
+		methods = sorted([(name, s, c) for name, (s, c) in self.methods.iteritems() if c > 0], key = lambda spot: -spot[1])
+		return events, methods
+
+
+	def printHotSpots(self):
+		"""
+		Prints the events and the methods sorted by decreasing time, with their
+		number of calls, their share of the time of the loop and their mean
+		time per call.
+		"""
+		events, methods = self.getHotSpots()
+		print "--------------------------------------------"
+		print "Profile of the simulation: " + ("%.3f" % self.total) + " s in the loop."
+		for title, spots in (("Event", events), ("Method", methods)):
+			print "%-34s %10s %10s %7s %10s" % (title, "Calls", "Seconds", "%", "us/call")
+			for name, seconds, calls in spots:
+				share = 0.0
+				if self.total > 0:
+					share = 100 * seconds / self.total
+				print "%-34s %10d %10.4f %6.1f%% %10.2f" % (name, calls, seconds, share, 1e6 * seconds / calls)
+		print "--------------------------------------------"
+
+
+
+
+	"""========================================================================
+	Below these two lines are functions that are not crucial to the
+	understanding of the code.
+	========================================================================"""
+
+	@staticmethod
+	def getOwner(port, method):
+		"""
+		Returns the object that has the method "method" (the port or its
+		ListEvents) and the name of the method in this object.
+		"""
+		if method.startswith("listEvents."):
+			return port.listEvents, method[len("listEvents."):]
+		return port, method
+
+
+	@staticmethod
+	def timed(method, timing):
+		"""
+		Returns a version of "method" that adds its duration and its call to
+		"timing" (a list [seconds, calls]).
+
+		Arguments:
+			method			A bound method.
+			timing			The list to update.
+		"""
+		clock = timeit.default_timer
+		def timedMethod(*args):
+			t = clock()
+			result = method(*args)
+			timing[0] += clock() - t
+			timing[1] += 1
+			return result
+		return timedMethod
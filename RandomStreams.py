@@ -0,0 +1,80 @@
+# -*- coding:utf8 -*-
+
+
+"""============================================================================
+								ENUNCIADO 5
+								PRACTICA 2
+
+	BEURIER Erwan
+	CANAVATE VEGA Fernando
+	DE LA ROSA Augustin
+	NAPOLI Luca
+
+	This file contains the functions that derive independent and reproducible
+	random streams from one master seed.
+	A stream is identified by a key: the master seed followed by a path of
+	integers, e.g. [seed, replication, ARRIVALS]. numpy.random.RandomState
+	accepts such a list as a seed and hashes the whole of it (init_by_array),
+	so two different keys give unrelated generators, whatever the number of
+	processes that use them.
+
+	Useful methods:
+		newSeed()
+		spawn()
+		spawnMany()
+	(The rest is supposed to be private, even if Python doesn't know about
+	encapsulation)
+
+	This file is not supposed to be launched via console.
+
+
+============================================================================"""
+
+
+import os
+import struct
+
+
+# Streams of a simulation of the port (last integer of their keys).
+ARRIVALS = 0
+UNLOADING = 1
+TRAVELEMPTY = 2
+TRAVELFULL = 3
+
+
+def newSeed():
+	"""
+	Returns a new master seed (a 32-bit integer) drawn from the entropy of the
+	system. Used when no seed is given, so that the run can still be
+	reproduced by printing its seed.
+	"""
+	return struct.unpack("<I", os.urandom(4))[0]
+
+
+def spawn(seed, *path):
+	"""
+	Returns the key of the child stream "path" of "seed", or None if "seed"
+	is None (the stream is then seeded from the system).
+
+	Arguments:
+		seed			A master seed (integer) or the key of a stream (list
+						of integers).
+		path			Integers identifying the child stream.
+	"""
+	if seed is None:
+		return None
+	if isinstance(seed, (list, tuple)):
+		return list(seed) + list(path)
+	return [seed] + list(path)
+
+
+def spawnMany(seed, number):
+	"""
+	Returns the keys of the "number" first child streams of "seed" (e.g. one
+	per replication).
+
+	Arguments:
+		seed			A master seed or the key of a stream.
+		number			Number of keys to return.
+	"""
+	return [spawn(seed, i) for i in xrange(number)]
@@ -0,0 +1,192 @@
+# -*- coding:utf8 -*-
+
+
+"""============================================================================
+								ENUNCIADO 5
+								PRACTICA 2
+
+	BEURIER Erwan
+	CANAVATE VEGA Fernando
+	DE LA ROSA Augustin
+	NAPOLI Luca
+
+	This file saves and loads in bulk the records returned by Port.simulate()
+	(cf. Port.getRecord()): one record per simulation, with the configuration,
+	the counters and every result. The format depends on the extension of the
+	file:
+		.csv			One row per record, with a header.
+		.jsonl			JSON Lines: one JSON object per record. The
+						undefined values (NaN) are written as null.
+		.npz			NumPy file, one array per column (cf. load()).
+	Any of them can be loaded at once as a dictionary (column, numpy array).
+
+	Useful methods:
+		save()
+		load()
+	(The rest is supposed to be private, even if Python doesn't know about
+	encapsulation)
+
+	This file is not supposed to be launched via console.
+
+
+============================================================================"""
+
+
+import csv
+import json
+import os
+import numpy
+import PortSimulation
+
+
+# The columns of a record, in the order in which they are saved.
+COLUMNS = (PortSimulation.CONFIGURATION + PortSimulation.COUNTS
+			+ [name for name, label, unit in PortSimulation.RESULTS])
+
+FORMATS = (".csv", ".jsonl", ".npz")
+
+
+def save(records, path, append = False):
+	"""
+	Saves a list of records in "path", in the format given by its extension.
+	Only the columns of COLUMNS are saved.
+
+	Arguments:
+		records			List of records (dictionaries).
+		path			The file, ending with one of FORMATS.
+		append			True to add the records at the end of an existing
+						CSV or JSON Lines file. A .npz file is always
+						rewritten.
+	"""
+	extension = getFormat(path)
+	if extension == ".csv":
+		saveCsv(records, path, append)
+	elif extension == ".jsonl":
+		saveJsonLines(records, path, append)
+	else:
+		saveNpz(records, path)
+
+
+def load(path):
+	"""
+	Loads a file written by save(), whatever its format. Returns a dictionary
+	(column, numpy array) with the columns of COLUMNS: "safe" is an array of
+	booleans, "seed" an array of strings (the keys of the random streams, cf.
+	RandomStreams), everything else is an array of floats (NaN for undefined
+	values).
+
+	Arguments:
+		path			The file, ending with one of FORMATS.
+	"""
+	extension = getFormat(path)
+	if extension == ".npz":
+		content = numpy.load(path)
+		table = dict((column, content[column]) for column in COLUMNS)
+		content.close()
+		return table
+	if extension == ".csv":
+		records = list(csv.DictReader(open(path, "rb")))
+	else:
+		records = [json.loads(line) for line in open(path) if line.strip()]
+	return toColumns(records)
+
+
+def saveCsv(records, path, append = False):
+	"""
+	Writes the records in the CSV file "path" (the header is written if the
+	file is new or empty).
+
+	Arguments:
+		records			List of records.
+		path			The CSV file.
+		append			True to add the records at the end of the file.
+	"""
+	newFile = not append or not os.path.exists(path) or os.path.getsize(path) == 0
+	output = open(path, "ab" if append else "wb")
+	writer = csv.DictWriter(output, COLUMNS, extrasaction = "ignore")
+	if newFile:
+		writer.writerow(dict(zip(COLUMNS, COLUMNS)))
+	writer.writerows(records)
+	output.close()
+
+
+def saveJsonLines(records, path, append = False):
+	"""
+	Writes the records in the JSON Lines file "path", one object per line.
+
+	Arguments:
+		records			List of records.
+		path			The JSON Lines file.
+		append			True to add the records at the end of the file.
+	"""
+	output = open(path, "a" if append else "w")
+	for record in records:
+		line = {}
+		for column in COLUMNS:
+			value = record[column]
+			if value != value: # NaN is not valid JSON.
+				value = None
+			line[column] = value
+		output.write(json.dumps(line, sort_keys = True) + "\n")
+	output.close()
+
+
+def saveNpz(records, path):
+	"""
+	Writes the records in the NumPy file "path", one array per column (cf.
+	load()).
+
+	Arguments:
+		records			List of records.
+		path			The .npz file.
+	"""
+	numpy.savez(path, **toColumns(records))
+
+
+
+
+"""============================================================================
+Below these two lines are functions that are not crucial to the
+understanding of the code.
+============================================================================"""
+
+def getFormat(path):
+	"""
+	Returns the extension of "path", one of FORMATS. Raises an Exception for
+	any other extension.
+	"""
+	extension = os.path.splitext(path)[1].lower()
+	if extension not in FORMATS:
+		raise Exception("Unknown format of records: \"" + path + "\" (expected " + ", ".join(FORMATS) + ").")
+	return extension
+
+
+def toColumns(records):
+	"""
+	Converts a list of records to a dictionary (column, numpy array), cf.
+	load(). The records can come from Port.getRecord(), from a CSV file
+	(strings) or from a JSON Lines file (None for NaN).
+
+	Arguments:
+		records			List of records.
+	"""
+	table = {}
+	for column in COLUMNS:
+		values = [record[column] for record in records]
+		if column == "safe":
+			table[column] = numpy.array([value in (True, "True") for value in values], dtype = bool)
+		elif column == "seed":
+			table[column] = numpy.array([str(value) for value in values])
+		else:
+			table[column] = numpy.array([toFloat(value) for value in values], dtype = float)
+	return table
+
+
+def toFloat(value):
+	"""
+	Converts a value of a record to a float. NaN if it is not a number.
+	"""
+	try:
+		return float(value)
+	except (TypeError, ValueError):
+		return float("nan")
@@ -0,0 +1,273 @@
+# -*- coding:utf8 -*-
+
+
+"""============================================================================
+								ENUNCIADO 5
+								PRACTICA 2
+
+	BEURIER Erwan
+	CANAVATE VEGA Fernando
+	DE LA ROSA Augustin
+	NAPOLI Luca
+
+	This file contains the implementation of the class Replications, that runs
+	independent replications of the simulation of the port in a pool of
+	processes and computes confidence intervals of the results.
+
+	Useful methods:
+		run()
+		getSummary()
+		printSummary()
+	(The rest is supposed to be private, even if Python doesn't know about
+	encapsulation)
+
+	This file is not supposed to be launched via console.
+
+
+============================================================================"""
+
+
+import math
+import multiprocessing
+import PortSimulation
+import RandomStreams
+
+
+def runReplication(arguments):
+	"""
+	Runs one replication and returns its record (cf. Port.getRecord()), which
+	includes its results.
+	Module-level function, so it can be sent to the worker processes.
+
+	Arguments:
+		arguments		Tuple (config, safe, seed, fast, cache). "config" is
+						the dictionary of the arguments of Port.__init__()
+						(without the seed), "safe" is the value of
+						PortSimulation.SAFEPORT, "seed" the seed of the
+						replication, "fast" is True to simulate with a
+						FastKernel.FastPort (same results, faster) and "cache"
+						is a ResultCache.ResultCache, or None. A record found
+						in the cache is returned without simulating. The
+						cache is not used without a seed.
+	"""
+	config, safe, seed, fast, cache = arguments
+	if seed is None: # Seeded from the system: every simulation is a new one.
+		cache = None
+	if cache is not None:
+		key = cache.getKey(config, safe, seed)
+		record = cache.get(key)
+		if record is not None:
+			return record
+	previous = PortSimulation.SAFEPORT, PortSimulation.BATCHMODE
+	PortSimulation.SAFEPORT = safe
+	PortSimulation.BATCHMODE = True
+	try:
+		if fast:
+			import FastKernel # Not at the top: FastKernel imports PortSimulation, which imports this module.
+			port = FastKernel.FastPort(seed = seed, **config)
+		else:
+			port = PortSimulation.Port(seed = seed, **config)
+		record = port.simulate()
+	finally:
+		PortSimulation.SAFEPORT, PortSimulation.BATCHMODE = previous
+	if cache is not None:
+		cache.put(key, record)
+	return record
+
+
+def halfWidth(mean, std, n, confidence = 0.95):
+	"""
+	Returns the half-width of the Student-t confidence interval of a mean
+	estimated from "n" values, NaN if there are less than two values or if
+	the mean is NaN.
+	SciPy is imported at the first call, so that a single simulation never
+	imports it.
+
+	Arguments:
+		mean			The mean of the values.
+		std				Their (unbiased) standard deviation.
+		n				The number of values.
+		confidence		Level of the confidence interval.
+	"""
+	if n < 2 or mean != mean:
+		return float("nan")
+	from scipy.stats import t as tStudent
+	return float(tStudent.ppf(0.5 + confidence/2.0, n - 1)) * std / math.sqrt(n)
+
+
+def confidenceInterval(values, confidence = 0.95):
+	"""
+	Returns the mean, the standard deviation and the half-width of the
+	Student-t confidence interval of the mean of "values" (cf. halfWidth()).
+	NaN values are ignored. The standard deviation and the half-width are
+	NaN if there are less than two values.
+
+	Arguments:
+		values			List of floats.
+		confidence		Level of the confidence interval.
+	"""
+	values = [v for v in values if v == v]
+	n = len(values)
+	if n == 0:
+		return float("nan"), float("nan"), float("nan")
+	mean = math.fsum(values) / n
+	if n < 2:
+		return mean, float("nan"), float("nan")
+	std = math.sqrt(math.fsum([(v - mean)**2 for v in values]) / (n - 1))
+	return mean, std, halfWidth(mean, std, n, confidence)
+
+
+class Replications:
+	"""
+	Runs "numReplications" independent replications of the same port, each
+	one with its own seed, in a pool of "jobs" processes.
+
+	Attributes:
+		config			Dictionary of the arguments of Port.__init__()
+						(without the seed).
+		safe			Value of PortSimulation.SAFEPORT in the replications.
+		fast			True if the replications use FastKernel.FastPort.
+		cache			ResultCache.ResultCache of the replications, or None.
+		numReplications	Number of replications.
+		jobs			Number of worker processes.
+		seed			The master seed of the replications.
+		seeds			List of the seeds of the replications.
+		confidence		Level of the confidence intervals.
+		results			List of the records of the replications (cf.
+						Port.getRecord()), which can be saved with
+						Records.save(). Empty until run() is called.
+	"""
+
+	def __init__(self, config, numReplications, jobs = 1, seed = None, confidence = 0.95, safe = False, fast = False, cache = None):
+		"""
+		Constructor.
+
+		Arguments:
+			config			Dictionary of the arguments of Port.__init__()
+							(without the seed), e.g. {"maxWharves": 20,
+							"maxTugs": 10, "timeSimulation": 10080}.
+			numReplications	Number of replications.
+			jobs			Number of worker processes. 1 to run everything in
+							the current process.
+			seed			Integer. Master seed: every replication gets its
+							own stream spawned from it, so the whole set of
+							replications can be reproduced, whatever the
+							number of processes. None to draw a new master
+							seed from the system.
+			confidence		Level of the confidence intervals.
+			safe			Value of PortSimulation.SAFEPORT in the
+							replications.
+			fast			True to simulate with FastKernel.FastPort.
+			cache			ResultCache.ResultCache, or None. The replications
+							already in the cache are not simulated again.
+		"""
+		self.config = config
+		self.safe = safe
+		self.fast = fast
+		self.cache = cache
+		self.numReplications = numReplications
+		self.jobs = jobs
+		if seed is None:
+			seed = RandomStreams.newSeed()
+		self.seed = seed
+		self.seeds = Replications.replicationSeeds(seed, numReplications)
+		self.confidence = confidence
+		self.results = []
+
+
+	def run(self):
+		"""
+		Runs the replications. Returns the list of their records.
+		"""
+		pool = None
+		if self.jobs > 1:
+			pool = multiprocessing.Pool(self.jobs)
+		try:
+			self.results = self.runSeeds(self.seeds, pool)
+		finally:
+			if pool is not None:
+				pool.close()
+				pool.join()
+
+		return self.results
+
+
+	def runSeeds(self, seeds, pool = None):
+		"""
+		Runs one replication per seed, in "pool" if it is not None. Returns the
+		list of their records, in the order of the seeds.
+
+		Arguments:
+			seeds			List of seeds.
+			pool			A multiprocessing.Pool, or None to run everything
+							in the current process.
+		"""
+		arguments = [(self.config, self.safe, seed, self.fast, self.cache) for seed in seeds]
+		if pool is not None:
+			return pool.map(runReplication, arguments, 1)
+		return [runReplication(a) for a in arguments]
+
+
+	def getSummary(self):
+		"""
+		Returns a dictionary (name, (mean, std, low, high)) for every result of
+		PortSimulation.RESULTS, where [low, high] is the confidence interval
+		of the mean.
+		"""
+		summary = {}
+		for name, label, unit in PortSimulation.RESULTS:
+			mean, std, halfWidth = confidenceInterval([r[name] for r in self.results], self.confidence)
+			summary[name] = (mean, std, mean - halfWidth, mean + halfWidth)
+		return summary
+
+
+	def printSummary(self):
+		"""
+		Prints the mean, the standard deviation and the confidence interval of
+		every result.
+		"""
+		summary = self.getSummary()
+		print "--------------------------------------------"
+		print "Results of " + str(len(self.results)) + " replications (" + str(int(100*self.confidence)) + "% confidence intervals):"
+		for name, label, unit in PortSimulation.RESULTS:
+			mean, std, low, high = summary[name]
+			print label + ": " + Replications.formatValue(mean, unit) + " [" + Replications.formatValue(low, unit) + ", " + Replications.formatValue(high, unit) + "], std: " + Replications.formatValue(std, unit)
+		print "--------------------------------------------"
+
+
+
+
+	"""========================================================================
+	Below these two lines are functions that are not crucial to the
+	understanding of the code.
+	========================================================================"""
+
+	@staticmethod
+	def replicationSeeds(seed, numReplications):
+		"""
+		Returns the list of the seeds of the replications: the keys of the
+		child streams of "seed" (cf. RandomStreams.spawnMany()), or None if
+		"seed" is None.
+
+		Arguments:
+			seed			The seed of the whole set of replications.
+			numReplications	Number of seeds to return.
+		"""
+		return RandomStreams.spawnMany(seed, numReplications)
+
+
+	@staticmethod
+	def formatValue(value, unit):
+		"""
+		Formats a value of the summary. Times are printed with
+		PortSimulation.minutesToTime().
+
+		Arguments:
+			value			The value to format.
+			unit			The unit of the value, as in PortSimulation.RESULTS.
+		"""
+		if value != value:
+			return "undefined"
+		if unit == "time":
+			return PortSimulation.minutesToTime(value)
+		return str(value)
@@ -0,0 +1,408 @@
+# -*- coding:utf8 -*-
+
+
+"""============================================================================
+								ENUNCIADO 5
+								PRACTICA 2
+
+	BEURIER Erwan
+	CANAVATE VEGA Fernando
+	DE LA ROSA Augustin
+	NAPOLI Luca
+
+	This file contains the implementation of the class ResourceSearch, that
+	looks for the cheapest numbers of wharves and tugs whose results meet
+	service-level targets (e.g. mean time inside the port under 10 hours and
+	mean entrance queue under 5 oil tankers), by successive halving: every
+	candidate gets a few replications, the candidates that clearly miss a
+	target or cost more than a candidate that clearly meets them are dropped,
+	and only the survivors get more replications.
+
+	Useful methods:
+		run()
+		getBest()
+		printSummary()
+	(The rest is supposed to be private, even if Python doesn't know about
+	encapsulation)
+
+	This file can be launched via console:
+		python ResourceSearch.py [--days d] [--hours h] [--mins m]
+						[--wharves W] [--tugs T] [--targets a=x,b=y]
+						[--wharf-cost c] [--tug-cost c] [--initial n]
+						[--eta k] [--max-replications N] [--jobs j]
+						[--seed s] [--safe] [--fast] [--cache directory]
+
+	Arguments:
+		--days d		Adds "d" days to every simulation. Default time is set
+						to one week. (Same for --hours and --mins.)
+		--wharves W		The candidate numbers of wharves. Either a list
+						"10,20,40" or a range "10:40:5" (first:last:step, last
+						included). Default is 10:30:2.
+		--tugs T		The candidate numbers of tugs. Same format. Default is
+						4:16:1.
+		--targets a=x,b=y	The targets: the mean of the result "a" (a
+						column of Records.COLUMNS) must be at most "x", etc.
+						Times are in minutes. Default is
+						meanTimeOilTankerInside=600,meanNumOilTankersEntrance=5.
+		--wharf-cost c	Cost of a wharf. Default is 1.
+		--tug-cost c	Cost of a tug. Default is 1.
+		--initial n		Replications of every candidate in the first round.
+						Default is 3.
+		--eta k			Factor of the number of replications from one round
+						to the next, and of the halving. Default is 3.
+		--max-replications N	Replications needed to decide that a candidate
+						meets the targets. Default is 27.
+		--jobs j		Number of worker processes. Default is 1.
+		--seed s		Seed of the search.
+		--safe			Uses the safe mode of the Port (cf.
+						PortSimulation.SAFEPORT).
+		--fast			Simulates with FastKernel.FastPort (same results,
+						faster).
+		--cache directory	Uses the ResultCache in "directory": the
+						replications simulated by earlier searches or sweeps
+						are not simulated again.
+
+
+============================================================================"""
+
+
+import itertools
+import math
+import multiprocessing
+import sys
+import RandomStreams
+import Replications
+import ResultCache
+import Sweep
+
+
+class ResourceSearch:
+	"""
+	Successive halving over the candidates (maxWharves, maxTugs). Round r
+	brings every open candidate to initial*eta^r replications, then screen()
+	drops candidates, with the confidence intervals of the targeted results:
+		infeasible		The interval of a result is entirely above its target
+						(or the result is undefined).
+		promising		Every interval is entirely below its target: no more
+						screening, the candidate waits for the last round.
+		halved			Among the other open candidates, at most a fraction
+						1 - 1/eta is dropped: the ones whose means miss their
+						targets by the most (relatively).
+	Once the number of replications reaches maxReplications, the open and
+	promising candidates are simulated by increasing cost ("jobs" candidates
+	at a time) and decided:
+		feasible		Every interval is entirely below its target.
+		uncertain		Neither feasible nor infeasible.
+		dominated		Costs more than the cheapest feasible candidate: not
+						simulated further. Most of the expensive candidates
+						end here without being simulated after the first
+						round.
+	A candidate is only declared feasible with maxReplications replications:
+	the results of the port can be bimodal (blocked or not), and a few
+	replications can all fall on the good side.
+	All the candidates use the same seeds for their i-th replication (common
+	random numbers), so that their differences are not hidden by the noise.
+
+	Attributes:
+		timeSimulation	Duration of every simulation (in minutes).
+		candidates		List of the tuples (maxWharves, maxTugs).
+		targets			List of the tuples (result, maximum of its mean).
+		wharfCost		Cost of a wharf.
+		tugCost			Cost of a tug.
+		initial			Replications of the first round.
+		eta				Factor between the rounds.
+		maxReplications	Replications needed to decide a candidate.
+		jobs			Number of worker processes.
+		seed			The master seed of the search.
+		seeds			List of the seeds of the replications, shared by
+						the candidates.
+		confidence		Level of the confidence intervals.
+		safe			Value of PortSimulation.SAFEPORT in the simulations.
+		fast			True to simulate with FastKernel.FastPort.
+		cache			ResultCache.ResultCache, or None.
+		records			Dictionary (candidate, list of the records of its
+						replications, cf. Port.getRecord()).
+		status			Dictionary (candidate, "open", "promising",
+						"feasible", "uncertain", "infeasible", "dominated" or
+						"halved").
+		numRuns			Number of simulations run so far.
+	"""
+
+	def __init__(self, timeSimulation, maxWharves, maxTugs, targets, wharfCost = 1.0, tugCost = 1.0, initial = 3, eta = 3, maxReplications = 27, jobs = 1, seed = None, confidence = 0.95, safe = False, fast = False, cache = None):
+		"""
+		Constructor. Every pair of the values of "maxWharves" and "maxTugs" is
+		a candidate.
+
+		Arguments:
+			timeSimulation	Duration of every simulation (in minutes).
+			maxWharves		List of the numbers of wharves.
+			maxTugs			List of the numbers of tugs.
+			targets			List of the tuples (result, maximum of its mean),
+							e.g. [("meanTimeOilTankerInside", 600)]. The
+							results are columns of Records.COLUMNS.
+			wharfCost		Cost of a wharf.
+			tugCost			Cost of a tug.
+			initial			Replications of every candidate in the first
+							round (at least 2, for the confidence intervals).
+			eta				Factor of the number of replications from one
+							round to the next (at least 2).
+			maxReplications	Replications needed to decide a candidate.
+			jobs			Number of worker processes.
+			seed			Integer. Master seed of the search. None to draw a
+							new seed from the system.
+			confidence		Level of the confidence intervals.
+			safe			Value of PortSimulation.SAFEPORT.
+			fast			True to simulate with FastKernel.FastPort.
+			cache			ResultCache.ResultCache, or None.
+		"""
+		self.timeSimulation = timeSimulation
+		self.candidates = list(itertools.product(maxWharves, maxTugs))
+		self.targets = list(targets)
+		self.wharfCost = wharfCost
+		self.tugCost = tugCost
+		self.initial = max(2, initial)
+		self.eta = max(2, eta)
+		self.maxReplications = max(self.initial, maxReplications)
+		self.jobs = jobs
+		if seed is None:
+			seed = RandomStreams.newSeed()
+		self.seed = seed
+		self.seeds = Replications.Replications.replicationSeeds(seed, self.maxReplications)
+		self.confidence = confidence
+		self.safe = safe
+		self.fast = fast
+		self.cache = cache
+		self.records = dict((candidate, []) for candidate in self.candidates)
+		self.status = dict((candidate, "open") for candidate in self.candidates)
+		self.numRuns = 0
+
+
+	def run(self):
+		"""
+		Runs the rounds of the search. Returns the result of getBest().
+		"""
+		pool = None
+		if self.jobs > 1:
+			pool = multiprocessing.Pool(self.jobs)
+		try:
+			n = self.initial
+			while n < self.maxReplications and self.getOpenCandidates():
+				self.runRound(self.getOpenCandidates(), n, pool)
+				self.screen(n)
+				n *= self.eta
+			while self.getOpenCandidates(True):
+				candidates = sorted(self.getOpenCandidates(True), key = self.getCost)
+				self.runRound(candidates[:max(1, self.jobs)], self.maxReplications, pool)
+				self.screen(self.maxReplications)
+		finally:
+			if pool is not None:
+				pool.close()
+				pool.join()
+		return self.getBest()
+
+
+	def runRound(self, candidates, n, pool = None):
+		"""
+		Brings every candidate of "candidates" to "n" replications. All the
+		simulations of the round are sent to the pool at once.
+
+		Arguments:
+			candidates		List of candidates.
+			n				Number of replications.
+			pool			A multiprocessing.Pool, or None to run everything
+							in the current process.
+		"""
+		keys = []
+		arguments = []
+		for candidate in candidates:
+			config = {"maxWharves": candidate[0], "maxTugs": candidate[1], "timeSimulation": self.timeSimulation}
+			for seed in self.seeds[len(self.records[candidate]):n]:
+				keys.append(candidate)
+				arguments.append((config, self.safe, seed, self.fast, self.cache))
+		if pool is not None:
+			records = pool.map(Replications.runReplication, arguments, 1)
+		else:
+			records = [Replications.runReplication(a) for a in arguments]
+		for candidate, record in zip(keys, records):
+			self.records[candidate].append(record)
+		self.numRuns += len(arguments)
+
+
+	def screen(self, n):
+		"""
+		Updates the status of the open candidates that have "n" replications
+		(cf. the documentation of the class). The halving only happens before
+		the last round.
+
+		Arguments:
+			n				Number of replications of the round.
+		"""
+		violations = {}
+		for candidate in self.getOpenCandidates(True):
+			if len(self.records[candidate]) < n:
+				continue
+			above = False
+			below = True
+			violation = float("-inf")
+			for name, maximum, mean, low, high in self.getIntervals(candidate):
+				if mean != mean or low > maximum:
+					above = True
+				if not high <= maximum: # False if NaN.
+					below = False
+				violation = max(violation, (mean - maximum) / abs(maximum or 1.0))
+			if above:
+				self.status[candidate] = "infeasible"
+			elif n < self.maxReplications:
+				if below:
+					self.status[candidate] = "promising"
+				else:
+					violations[candidate] = violation
+			elif below:
+				self.status[candidate] = "feasible"
+			else:
+				self.status[candidate] = "uncertain"
+
+		feasible = [self.getCost(c) for c in self.candidates if self.status[c] == "feasible"]
+		if feasible:
+			bestCost = min(feasible)
+			for candidate in self.candidates:
+				if self.status[candidate] in ("open", "promising", "feasible", "uncertain") and self.getCost(candidate) > bestCost:
+					self.status[candidate] = "dominated"
+
+		numDropped = len(violations) - int(math.ceil(len(violations) / float(self.eta)))
+		worst = sorted([c for c in violations if violations[c] > 0], key = lambda c: -violations[c])
+		for candidate in worst[:numDropped]:
+			self.status[candidate] = "halved"
+
+
+	def getBest(self):
+		"""
+		Returns a tuple (candidate, confirmed): the cheapest feasible
+		candidate and True. If no candidate was found feasible, the cheapest
+		uncertain candidate whose means meet every target, and False. None if
+		there is none either.
+		"""
+		feasible = [c for c in self.candidates if self.status[c] == "feasible"]
+		if feasible:
+			return min(feasible, key = self.getCost), True
+		likely = [c for c in self.candidates if self.status[c] == "uncertain"
+					if all(mean <= maximum for name, maximum, mean, low, high in self.getIntervals(c))]
+		if likely:
+			return min(likely, key = self.getCost), False
+		return None
+
+
+	def printSummary(self):
+		"""
+		Prints the candidates that reached maxReplications, the best
+		candidate and the number of simulations compared to a full grid with
+		maxReplications replications per candidate.
+		"""
+		print "--------------------------------------------"
+		print "Targets: " + ", ".join(name + " <= " + str(maximum) for name, maximum in self.targets)
+		print "%8s %6s %8s %6s %-11s %s" % ("Wharves", "Tugs", "Cost", "Reps", "Status", "Means")
+		for candidate in sorted(self.candidates, key = self.getCost):
+			if len(self.records[candidate]) >= self.maxReplications:
+				means = ", ".join("%.2f" % mean for name, maximum, mean, low, high in self.getIntervals(candidate))
+				print "%8d %6d %8.1f %6d %-11s %s" % (candidate[0], candidate[1], self.getCost(candidate), len(self.records[candidate]), self.status[candidate], means)
+		counts = dict((status, 0) for status in ("open", "promising", "feasible", "uncertain", "infeasible", "dominated", "halved"))
+		for candidate in self.candidates:
+			counts[self.status[candidate]] += 1
+		print str(len(self.candidates)) + " candidates: " + ", ".join(str(counts[s]) + " " + s for s in sorted(counts))
+
+		best = self.getBest()
+		if best is None:
+			print "No candidate meets the targets."
+		else:
+			(wharves, tugs), confirmed = best
+			print "Cheapest candidate: " + str(wharves) + " wharves and " + str(tugs) + " tugs (cost " + str(self.getCost(best[0])) + ")" + ("." if confirmed else ", not confirmed by the confidence intervals.")
+		grid = len(self.candidates) * self.maxReplications
+		print "Simulations: " + str(self.numRuns) + " (a full grid would take " + str(grid) + ", " + ("%.1f" % (float(grid) / max(1, self.numRuns))) + " times more)."
+		print "--------------------------------------------"
+
+
+
+
+	"""========================================================================
+	Below these two lines are functions that are not crucial to the
+	understanding of the code.
+	========================================================================"""
+
+	def getCost(self, candidate):
+		"""
+		Returns the cost of a candidate (maxWharves, maxTugs).
+		"""
+		return self.wharfCost * candidate[0] + self.tugCost * candidate[1]
+
+
+	def getOpenCandidates(self, promising = False):
+		"""
+		Returns the list of the open candidates, and of the promising ones if
+		"promising" is True.
+		"""
+		statuses = ("open", "promising") if promising else ("open",)
+		return [c for c in self.candidates if self.status[c] in statuses]
+
+
+	def getIntervals(self, candidate):
+		"""
+		Returns a list of tuples (result, maximum, mean, low, high), one per
+		target, where [low, high] is the confidence interval of the mean of the
+		result over the replications of the candidate (NaN with less than two
+		replications).
+		"""
+		intervals = []
+		for name, maximum in self.targets:
+			mean, std, halfWidth = Replications.confidenceInterval([r[name] for r in self.records[candidate]], self.confidence)
+			intervals.append((name, maximum, mean, mean - halfWidth, mean + halfWidth))
+		return intervals
+
+
+
+
+"""============================================================================
+	M 	  M       A 	  II	NN     N
+	MM	 MM      A A	  II   	N N    N
+	M M	M M     A   A	  II   	N  N   N
+	M  M  M     AAAAA	  II   	N   N  N
+	M	  M    A     A	  II	N    N N
+	M 	  M	  A       A   II	N     NN
+============================================================================"""
+
+if __name__=="__main__":
+	time = 0
+	values = {"maxWharves": Sweep.Sweep.parseValues("10:30:2"), "maxTugs": Sweep.Sweep.parseValues("4:16:1")}
+	targets = [("meanTimeOilTankerInside", 600.0), ("meanNumOilTankersEntrance", 5.0)]
+	options = {"wharfCost": 1.0, "tugCost": 1.0, "initial": 3, "eta": 3, "maxReplications": 27, "jobs": 1, "seed": None, "cache": None}
+	names = {"--initial": "initial", "--eta": "eta", "--max-replications": "maxReplications",
+			"--jobs": "jobs", "--seed": "seed"}
+
+	for i in xrange(1, len(sys.argv) - 1):
+		if sys.argv[i] == "--days":
+			time += int(sys.argv[i+1])*60*24
+		elif sys.argv[i] == "--hours":
+			time += int(sys.argv[i+1])*60
+		elif sys.argv[i] == "--mins":
+			time += int(sys.argv[i+1])
+		elif sys.argv[i] == "--wharves":
+			values["maxWharves"] = Sweep.Sweep.parseValues(sys.argv[i+1])
+		elif sys.argv[i] == "--tugs":
+			values["maxTugs"] = Sweep.Sweep.parseValues(sys.argv[i+1])
+		elif sys.argv[i] == "--targets":
+			targets = [(target.split("=")[0], float(target.split("=")[1])) for target in sys.argv[i+1].split(",")]
+		elif sys.argv[i] == "--wharf-cost":
+			options["wharfCost"] = float(sys.argv[i+1])
+		elif sys.argv[i] == "--cache":
+			options["cache"] = ResultCache.ResultCache(sys.argv[i+1])
+		elif sys.argv[i] == "--tug-cost":
+			options["tugCost"] = float(sys.argv[i+1])
+		elif sys.argv[i] in names:
+			options[names[sys.argv[i]]] = int(sys.argv[i+1])
+
+	if time == 0:
+		time = 24*60*7 #Default value, just in case.
+
+	search = ResourceSearch(time, targets = targets, safe = "--safe" in sys.argv, fast = "--fast" in sys.argv, **dict(values, **options))
+	print "Search starting (seed " + str(search.seed) + "): " + str(len(search.candidates)) + " candidates."
+	search.run()
+	search.printSummary()
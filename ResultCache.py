@@ -0,0 +1,278 @@
+# -*- coding:utf8 -*-
+
+
+"""============================================================================
+								ENUNCIADO 5
+								PRACTICA 2
+
+	BEURIER Erwan
+	CANAVATE VEGA Fernando
+	DE LA ROSA Augustin
+	NAPOLI Luca
+
+	This file contains the implementation of the class ResultCache, a cache on
+	disk of the records of the simulations (cf. Port.getRecord()), shared by
+	the processes of a machine (or of several machines, on a shared
+	directory). A simulation is identified by a hash of its whole
+	configuration, of its seed and of the fingerprint of the source of the
+	model, so a record is never used after a change of the model.
+
+	Useful methods:
+		ResultCache.getKey()
+		ResultCache.get()
+		ResultCache.put()
+		ResultCache.evict()
+		fingerprint()
+	(The rest is supposed to be private, even if Python doesn't know about
+	encapsulation)
+
+	This file is not supposed to be launched via console.
+
+
+============================================================================"""
+
+
+import hashlib
+import inspect
+import json
+import os
+import tempfile
+import time
+import PortSimulation
+import Records
+
+try:
+	import fcntl
+except ImportError: # Not available on Windows: the evictions aren't serialized.
+	fcntl = None
+
+
+# The files whose source determines the results of a simulation.
+MODELFILES = ["ArrivalProcess.py", "FastKernel.py", "ListEvents.py", "OilTanker.py",
+			"PortSimulation.py", "PortState.py", "RandomStreams.py", "Statistics.py", "TugPool.py",
+			"VariatePool.py"]
+
+# Age (in seconds) above which evict() removes a temporary file: its writer
+# was killed before renaming it.
+TMPAGE = 3600
+
+modelFingerprint = None
+
+
+def fingerprint():
+	"""
+	Returns the SHA-1 (hexadecimal) of the source of MODELFILES, computed
+	once per process.
+	"""
+	global modelFingerprint
+	if modelFingerprint is None:
+		directory = os.path.dirname(os.path.abspath(__file__))
+		digest = hashlib.sha1()
+		for name in MODELFILES:
+			digest.update(name)
+			digest.update(open(os.path.join(directory, name), "rb").read())
+		modelFingerprint = digest.hexdigest()
+	return modelFingerprint
+
+
+class ResultCache:
+	"""
+	Cache of records in a directory: one small JSON file per record, named
+	after its key (cf. getKey()), in a sub-directory named after the first
+	two characters of the key.
+	Any number of processes can use the same directory: a record is written
+	in a temporary file and renamed, so a reader never sees an incomplete
+	file, and a file that disappears (evicted by another process) is a miss.
+	Every hit updates the modification time of the file, so that evict()
+	removes the least recently used records first, once the files take more
+	than "maxBytes". Only one process evicts at a time (lock file, where
+	fcntl is available).
+	An instance only holds its parameters and counters, so it can be sent to
+	the worker processes.
+
+	Attributes:
+		directory		The directory of the cache.
+		maxBytes		Size of the files above which evict() removes records.
+		checkEvery		put() calls evict() every "checkEvery" records.
+		hits			Number of hits of this instance.
+		misses			Number of misses of this instance.
+		numPut			Number of records written by this instance.
+	"""
+
+	def __init__(self, directory, maxBytes = 256*1024*1024, checkEvery = 100):
+		"""
+		Constructor. Creates the directory if needed.
+
+		Arguments:
+			directory		The directory of the cache.
+			maxBytes		Maximum size of the records, in bytes.
+			checkEvery		Number of records written between two evictions.
+		"""
+		self.directory = directory
+		self.maxBytes = maxBytes
+		self.checkEvery = checkEvery
+		self.hits = 0
+		self.misses = 0
+		self.numPut = 0
+		if not os.path.isdir(directory):
+			try:
+				os.makedirs(directory)
+			except OSError: # Created by another process in the meantime.
+				pass
+
+
+	@staticmethod
+	def getKey(config, safe, seed):
+		"""
+		Returns the key of a simulation: the SHA-1 (hexadecimal) of its whole
+		configuration (the arguments of Port.__init__(), with their default
+		values if missing from "config"), of "safe", of the seed and of the
+		fingerprint of the model. Simulating with FastKernel.FastPort gives
+		the same results, so it has the same key. Raises an Exception
+		without a seed: such a simulation is never the same twice.
+
+		Arguments:
+			config			Dictionary of the arguments of Port.__init__()
+							(without the seed).
+			safe			Value of PortSimulation.SAFEPORT.
+			seed			The seed of the simulation.
+		"""
+		if seed is None:
+			raise Exception("A simulation without seed can't be cached.")
+		names, varargs, keywords, defaults = inspect.getargspec(PortSimulation.Port.__init__)
+		full = dict(zip(names[-len(defaults):], defaults))
+		full.update(config)
+		full.pop("seed", None)
+		full.pop("trace", None)
+		content = json.dumps({"config": full, "safe": bool(safe), "seed": seed, "model": fingerprint()}, sort_keys = True)
+		return hashlib.sha1(content).hexdigest()
+
+
+	def get(self, key):
+		"""
+		Returns the record of "key", or None if it is not in the cache.
+
+		Arguments:
+			key				The key of the simulation (cf. getKey()).
+		"""
+		path = self.getPath(key)
+		try:
+			with open(path) as content:
+				record = json.load(content)
+			os.utime(path, None)
+		except (IOError, OSError, ValueError):
+			self.misses += 1
+			return None
+		for column in Records.COLUMNS:
+			if record[column] is None: # NaN, cf. Records.saveJsonLines().
+				record[column] = float("nan")
+		self.hits += 1
+		return record
+
+
+	def put(self, key, record):
+		"""
+		Writes the record of "key" in the cache (only the columns of
+		Records.COLUMNS).
+
+		Arguments:
+			key				The key of the simulation (cf. getKey()).
+			record			Its record.
+		"""
+		path = self.getPath(key)
+		directory = os.path.dirname(path)
+		if not os.path.isdir(directory):
+			try:
+				os.makedirs(directory)
+			except OSError:
+				pass
+		content = {}
+		for column in Records.COLUMNS:
+			value = record[column]
+			if value != value:
+				value = None
+			content[column] = value
+		handle, temporary = tempfile.mkstemp(dir = directory, suffix = ".tmp")
+		output = os.fdopen(handle, "w")
+		output.write(json.dumps(content, sort_keys = True))
+		output.close()
+		os.rename(temporary, path)
+
+		self.numPut += 1
+		if self.numPut % self.checkEvery == 0:
+			self.evict()
+
+
+	def evict(self):
+		"""
+		If the records take more than maxBytes, removes the least recently
+		used ones until they take less than 90% of maxBytes. Returns the
+		number of removed records.
+		Also removes the temporary files older than TMPAGE seconds, left by
+		the processes killed while writing a record.
+		"""
+		lock = open(os.path.join(self.directory, "evict.lock"), "a")
+		try:
+			if fcntl is not None:
+				fcntl.flock(lock, fcntl.LOCK_EX)
+			now = time.time()
+			for path in self.listFiles(".tmp"):
+				try:
+					if now - os.stat(path).st_mtime > TMPAGE:
+						os.remove(path)
+				except OSError: # Renamed or removed in the meantime.
+					pass
+
+			entries = []
+			total = 0
+			for path in self.listFiles():
+				try:
+					status = os.stat(path)
+				except OSError:
+					continue
+				entries.append((status.st_mtime, status.st_size, path))
+				total += status.st_size
+			if total <= self.maxBytes:
+				return 0
+
+			entries.sort()
+			removed = 0
+			for mtime, size, path in entries:
+				if total <= 0.9 * self.maxBytes:
+					break
+				try:
+					os.remove(path)
+				except OSError:
+					pass
+				total -= size
+				removed += 1
+			return removed
+		finally:
+			lock.close() # Releases the lock.
+
+
+
+
+	"""========================================================================
+	Below these two lines are functions that are not crucial to the
+	understanding of the code.
+	========================================================================"""
+
+	def getPath(self, key):
+		"""
+		Returns the path of the file of "key".
+		"""
+		return os.path.join(self.directory, key[:2], key + ".json")
+
+
+	def listFiles(self, extension = ".json"):
+		"""
+		Returns the list of the paths of the records in the cache (or of the
+		temporary files, with the extension ".tmp").
+		"""
+		paths = []
+		for name in os.listdir(self.directory):
+			subdirectory = os.path.join(self.directory, name)
+			if os.path.isdir(subdirectory):
+				paths.extend(os.path.join(subdirectory, f) for f in os.listdir(subdirectory) if f.endswith(extension))
+		return paths
@@ -0,0 +1,175 @@
+# -*- coding:utf8 -*-
+
+
+"""============================================================================
+								ENUNCIADO 5
+								PRACTICA 2
+
+	BEURIER Erwan
+	CANAVATE VEGA Fernando
+	DE LA ROSA Augustin
+	NAPOLI Luca
+
+	This file contains the implementation of the class SequentialReplications,
+	that launches replications of the simulation of the port until the
+	confidence intervals of the selected results are precise enough.
+
+	Useful methods:
+		run()
+		isConverged()
+		printSummary()
+	(The rest is supposed to be private, even if Python doesn't know about
+	encapsulation)
+
+	This file is not supposed to be launched via console.
+
+
+============================================================================"""
+
+
+import math
+import multiprocessing
+import PortSimulation
+import Replications
+
+
+class SequentialReplications(Replications.Replications):
+	"""
+	Replications whose number is not fixed in advance: after "initial" pilot
+	replications, new replications are launched until the half-width of the
+	confidence interval of every selected result is at most
+	"relativePrecision" times the absolute value of its mean, or until
+	"maxReplications" replications have been run.
+	A result whose mean is 0 has no relative half-width: its absolute
+	half-width is compared with "relativePrecision" instead (cf.
+	getRelativeHalfWidths()).
+	The seeds are the first seeds of the budget, so the procedure can be
+	reproduced.
+
+	Attributes:
+		metrics				List of the names of the selected results (cf.
+							PortSimulation.RESULTS).
+		relativePrecision	Target relative half-width, e.g. 0.02 for +/-2%.
+		initial				Number of pilot replications.
+		(And the attributes of Replications. "numReplications" is the
+		budget.)
+	"""
+
+	def __init__(self, config, metrics, relativePrecision = 0.02, initial = 10, maxReplications = 1000, jobs = 1, seed = None, confidence = 0.95, safe = False, fast = False, cache = None):
+		"""
+		Constructor.
+
+		Arguments:
+			config				Dictionary of the arguments of Port.__init__()
+								(without the seed).
+			metrics				List of the names of the selected results. An
+								Exception is raised if a name is not in
+								PortSimulation.RESULTS.
+			relativePrecision	Target relative half-width.
+			initial				Number of pilot replications (at least 2).
+			maxReplications		Budget: maximum number of replications.
+			jobs				Number of worker processes.
+			seed				Integer. Seed of the whole procedure, or None.
+			confidence			Level of the confidence intervals.
+			safe				Value of PortSimulation.SAFEPORT in the
+								replications.
+			fast				True to simulate with FastKernel.FastPort.
+			cache				ResultCache.ResultCache, or None.
+		"""
+		names = [name for name, label, unit in PortSimulation.RESULTS]
+		unknown = [name for name in metrics if name not in names]
+		if len(unknown) > 0:
+			raise Exception("Unknown results selected: " + ", ".join(unknown) + " (expected some of " + ", ".join(names) + ").")
+		Replications.Replications.__init__(self, config, maxReplications, jobs, seed, confidence, safe, fast, cache)
+		self.metrics = list(metrics)
+		self.relativePrecision = relativePrecision
+		self.initial = max(2, min(initial, maxReplications))
+
+
+	def run(self):
+		"""
+		Runs the replications until the selected results are precise enough
+		or the budget is exhausted. Returns the list of their results.
+		"""
+		pool = None
+		if self.jobs > 1:
+			pool = multiprocessing.Pool(self.jobs)
+		try:
+			self.results = self.runSeeds(self.seeds[:self.initial], pool)
+			while not self.isConverged() and len(self.results) < self.numReplications:
+				n = min(self.getNeededReplications(), self.numReplications)
+				self.results += self.runSeeds(self.seeds[len(self.results):n], pool)
+		finally:
+			if pool is not None:
+				pool.close()
+				pool.join()
+
+		return self.results
+
+
+	def getRelativeHalfWidths(self):
+		"""
+		Returns a dictionary (name, half-width / |mean|) for the selected
+		results. If the mean is 0 but not the half-width, the relative
+		half-width is infinite, so the absolute half-width is returned
+		instead (cf. getAbsoluteMetrics()). NaN if it can't be computed yet.
+		"""
+		widths = {}
+		for name in self.metrics:
+			mean, std, halfWidth = Replications.confidenceInterval([r[name] for r in self.results], self.confidence)
+			if halfWidth == 0:
+				widths[name] = 0.0
+			elif mean != 0:
+				widths[name] = halfWidth / abs(mean)
+			else:
+				widths[name] = halfWidth
+		return widths
+
+
+	def getAbsoluteMetrics(self):
+		"""
+		Returns the list of the selected results whose mean is 0, for which
+		getRelativeHalfWidths() returns the absolute half-width.
+		"""
+		return [name for name in self.metrics if Replications.confidenceInterval([r[name] for r in self.results], self.confidence)[0] == 0]
+
+
+	def isConverged(self):
+		"""
+		Returns True if every selected result has reached the target relative
+		half-width.
+		"""
+		return all(w <= self.relativePrecision for w in self.getRelativeHalfWidths().itervalues())
+
+
+	def getNeededReplications(self):
+		"""
+		Estimates the total number of replications needed to reach the target
+		(the half-width decreases as 1/sqrt(n)). Always more than the current
+		number, by at least one replication per worker.
+		"""
+		n = len(self.results)
+		needed = n + max(1, self.jobs)
+		for w in self.getRelativeHalfWidths().itervalues():
+			if w == w and w > self.relativePrecision:
+				needed = max(needed, int(math.ceil(n * (w / self.relativePrecision)**2)))
+		return needed
+
+
+	def printSummary(self):
+		"""
+		Prints whether the target was reached, then the summary of every
+		result (cf. Replications.printSummary()).
+		"""
+		widths = self.getRelativeHalfWidths()
+		absolute = self.getAbsoluteMetrics()
+		if self.isConverged():
+			print "Target precision reached after " + str(len(self.results)) + " replications."
+		else:
+			print "Budget exhausted after " + str(len(self.results)) + " replications, target precision not reached."
+		for name in self.metrics:
+			if name in absolute:
+				print "Absolute half-width of " + name + " (mean 0): " + str(widths[name]) + " (target: " + str(self.relativePrecision) + ")"
+			else:
+				print "Relative half-width of " + name + ": " + str(widths[name]) + " (target: " + str(self.relativePrecision) + ")"
+		Replications.Replications.printSummary(self)
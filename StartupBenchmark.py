@@ -0,0 +1,214 @@
+# -*- coding:utf8 -*-
+
+
+"""============================================================================
+								ENUNCIADO 5
+								PRACTICA 2
+
+	BEURIER Erwan
+	CANAVATE VEGA Fernando
+	DE LA ROSA Augustin
+	NAPOLI Luca
+
+	This file measures the startup of a short simulation: it launches
+	"python main.py -d 1" (or other arguments) in a new process, and reports
+	the time of the interpreter, of every import and of the rest of main.py.
+	This file imports nothing from the simulation, so that the imports of
+	main.py are measured from scratch.
+
+	Useful methods:
+		measureStartup()
+		printStartup()
+	(The rest is supposed to be private, even if Python doesn't know about
+	encapsulation)
+
+	This file can be launched via console:
+		python StartupBenchmark.py [--repeat k] [--top n] [arguments of main.py]
+
+	Arguments:
+		--repeat k		Launches main.py "k" times and keeps the fastest run.
+						Default is 5.
+		--top n			Number of imports printed. Default is 15.
+		arguments		The arguments given to main.py. Default is "-d 1".
+
+
+============================================================================"""
+
+
+import __builtin__
+import json
+import os
+import runpy
+import subprocess
+import sys
+import tempfile
+import timeit
+
+
+def timeImports():
+	"""
+	Replaces the built-in function __import__ by a timed version. Returns a
+	tuple (times, total) that it fills: "times" is the dictionary (module,
+	[cumulative seconds, self seconds]) of every import that loaded at least
+	one new module, "total" a list holding the total time of the outermost
+	imports. The cumulative time includes the imports done by the module,
+	the self time doesn't. Relative imports ("from . import x") are named
+	after the package that does them.
+	"""
+	original = __builtin__.__import__
+	clock = timeit.default_timer
+	times = {}
+	total = [0.0]
+	children = [] # Time spent in the nested imports of each import in progress.
+
+	def timedImport(name, *args, **kwargs):
+		numModules = len(sys.modules)
+		children.append(0.0)
+		t = clock()
+		try:
+			return original(name, *args, **kwargs)
+		finally:
+			elapsed = clock() - t
+			nested = children.pop()
+			if len(sys.modules) > numModules:
+				if name == "" and args and args[0]:
+					name = args[0].get("__name__", "") + " (relative)"
+				if name not in times:
+					times[name] = [0.0, 0.0]
+				times[name][0] += elapsed
+				times[name][1] += elapsed - nested
+			if children:
+				children[-1] += elapsed
+			else:
+				total[0] += elapsed
+
+	__builtin__.__import__ = timedImport
+	return times, total
+
+
+def runChild(path, arguments):
+	"""
+	Runs main.py in the current process with its imports timed, and writes
+	the times in the JSON file "path": the imports (cf. timeImports()), their
+	total time and the total time of main.py.
+
+	Arguments:
+		path			The JSON file.
+		arguments		The arguments given to main.py.
+	"""
+	main = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+	times, total = timeImports()
+	sys.argv = [main] + arguments
+	t = timeit.default_timer()
+	try:
+		runpy.run_path(main, run_name = "__main__")
+	except SystemExit:
+		pass
+	t = timeit.default_timer() - t
+	f = open(path, "w")
+	json.dump({"imports": times, "total": total[0], "main": t}, f)
+	f.close()
+
+
+def measureProcess(command):
+	"""
+	Launches "command" and returns its wall-clock time. Its output is
+	discarded, and it reads empty lines (so that the pauses of the simulation
+	don't block).
+
+	Arguments:
+		command			List of the arguments of the process.
+	"""
+	devnull = open(os.devnull, "w")
+	t = timeit.default_timer()
+	process = subprocess.Popen(command, stdin = subprocess.PIPE, stdout = devnull, stderr = devnull)
+	process.communicate("\n" * 100000)
+	t = timeit.default_timer() - t
+	devnull.close()
+	return t
+
+
+def measureStartup(arguments = ["-d", "1"], repeat = 5):
+	"""
+	Measures "python main.py arguments" and returns a dictionary with the
+	times (in seconds) of the fastest of "repeat" runs:
+		total			Whole process.
+		interpreter		An empty Python process.
+		imports			All the imports of main.py.
+		run				main.py without its imports.
+		modules			Dictionary (module, [cumulative, self]) of the
+						imports, cf. timeImports().
+
+	Arguments:
+		arguments		The arguments given to main.py.
+		repeat			Number of runs.
+	"""
+	interpreter = min(measureProcess([sys.executable, "-c", "pass"]) for i in xrange(repeat))
+
+	best = None
+	for i in xrange(repeat):
+		handle, path = tempfile.mkstemp(suffix = ".json")
+		os.close(handle)
+		try:
+			total = measureProcess([sys.executable, os.path.abspath(__file__), "--child", path] + list(arguments))
+			times = json.load(open(path))
+		finally:
+			os.remove(path)
+		if best is None or total < best["total"]:
+			imports = times["total"]
+			best = {"total": total,
+					"interpreter": interpreter,
+					"imports": imports,
+					"run": times["main"] - imports,
+					"modules": times["imports"]}
+	return best
+
+
+def printStartup(startup, top = 15):
+	"""
+	Prints the times returned by measureStartup(), and the "top" imports that
+	take the most time.
+
+	Arguments:
+		startup			The dictionary returned by measureStartup().
+		top				Number of imports printed.
+	"""
+	print "--------------------------------------------"
+	print "Startup of main.py: %.3f s" % startup["total"]
+	print "\tInterpreter:\t%.3f s" % startup["interpreter"]
+	print "\tImports:\t%.3f s" % startup["imports"]
+	print "\tmain.py:\t%.3f s (without its imports)" % startup["run"]
+	print "%-36s %12s %12s" % ("Import", "Cumul. (ms)", "Self (ms)")
+	modules = sorted(startup["modules"].iteritems(), key = lambda item: -item[1][0])
+	for name, (cumulative, own) in modules[:top]:
+		print "%-36s %12.1f %12.1f" % (name, 1000 * cumulative, 1000 * own)
+	print "--------------------------------------------"
+
+
+
+
+"""============================================================================
+	M 	  M       A 	  II	NN     N
+	MM	 MM      A A	  II   	N N    N
+	M M	M M     A   A	  II   	N  N   N
+	M  M  M     AAAAA	  II   	N   N  N
+	M	  M    A     A	  II	N    N N
+	M 	  M	  A       A   II	N     NN
+============================================================================"""
+
+if __name__=="__main__":
+	if len(sys.argv) > 2 and sys.argv[1] == "--child":
+		runChild(sys.argv[2], sys.argv[3:])
+		sys.exit()
+
+	arguments = sys.argv[1:]
+	options = {"repeat": 5, "top": 15}
+	for option in ("--repeat", "--top"):
+		if option in arguments:
+			i = arguments.index(option)
+			options[option[2:]] = int(arguments[i+1])
+			del arguments[i:i+2]
+	if not arguments:
+		arguments = ["-d", "1"]
+
+	printStartup(measureStartup(arguments, options["repeat"]), options["top"])
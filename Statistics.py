@@ -0,0 +1,322 @@
+# -*- coding:utf8 -*-
+
+
+"""============================================================================
+								ENUNCIADO 5
+								PRACTICA 2
+
+	BEURIER Erwan
+	CANAVATE VEGA Fernando
+	DE LA ROSA Augustin
+	NAPOLI Luca
+
+	This file contains the implementation of the statistics of the simulation:
+	the accumulators TimePersistent and Observational, and the class
+	Statistics that registers them.
+
+	Useful methods:
+		Statistics.registerTimePersistent()
+		Statistics.registerObservational()
+		Statistics.advance()
+		Statistics.observe()
+		Statistics.merge()
+	(The rest is supposed to be private, even if Python doesn't know about
+	encapsulation)
+
+	This file is not supposed to be launched via console.
+
+
+============================================================================"""
+
+
+class TimePersistent(object):
+	"""
+	Accumulator of a time-persistent metric (a value that holds during an
+	interval of time, e.g. the length of a queue). Computes the time-weighted
+	mean and variance, the min and the max.
+
+	Attributes:
+		duration		Total time during which the metric was observed.
+		integral		Integral of the value over time.
+		integralSquares	Integral of the square of the value over time.
+		minimum			Min of the value (+inf if never updated).
+		maximum			Max of the value (-inf if never updated).
+	"""
+	__slots__ = ("duration", "integral", "integralSquares", "minimum", "maximum")
+
+	def __init__(self):
+		"""
+		Default constructor. Nothing observed.
+		"""
+		self.duration = 0.0
+		self.integral = 0.0
+		self.integralSquares = 0.0
+		self.minimum = float("inf")
+		self.maximum = float("-inf")
+
+
+	def update(self, value, duration):
+		"""
+		Records that the metric held "value" during "duration".
+
+		Arguments:
+			value			The value of the metric.
+			duration		The time during which it held this value.
+		"""
+		self.duration += duration
+		self.integral += value * duration
+		self.integralSquares += value * value * duration
+		if value < self.minimum:
+			self.minimum = value
+		if value > self.maximum:
+			self.maximum = value
+
+
+	def merge(self, other):
+		"""
+		Adds the observations of the TimePersistent "other" to this one (as if
+		the two periods of observation were put end to end).
+
+		Arguments:
+			other			Another TimePersistent.
+		"""
+		self.duration += other.duration
+		self.integral += other.integral
+		self.integralSquares += other.integralSquares
+		self.minimum = min(self.minimum, other.minimum)
+		self.maximum = max(self.maximum, other.maximum)
+
+
+	def getMean(self):
+		"""
+		Returns the time-weighted mean, NaN if the duration is 0.
+		"""
+		if self.duration == 0:
+			return float("nan")
+		return self.integral / self.duration
+
+
+	def getVariance(self):
+		"""
+		Returns the time-weighted variance, NaN if the duration is 0.
+		"""
+		if self.duration == 0:
+			return float("nan")
+		mean = self.integral / self.duration
+		return max(self.integralSquares / self.duration - mean * mean, 0.0)
+
+
+	def getMinimum(self):
+		"""
+		Returns the min, NaN if never updated.
+		"""
+		if self.minimum > self.maximum:
+			return float("nan")
+		return self.minimum
+
+
+	def getMaximum(self):
+		"""
+		Returns the max, NaN if never updated.
+		"""
+		if self.minimum > self.maximum:
+			return float("nan")
+		return self.maximum
+
+
+class Observational(object):
+	"""
+	Accumulator of an observational metric (one value per observation, e.g.
+	the time spent by an oil tanker in the port). Computes the sum, the mean
+	and the variance (with Welford's algorithm), the min and the max.
+
+	Attributes:
+		count			Number of observations.
+		total			Sum of the observations.
+		mean			Running mean of the observations.
+		m2				Sum of the squares of the differences to the mean.
+		minimum			Min of the observations (+inf if none).
+		maximum			Max of the observations (-inf if none).
+	"""
+	__slots__ = ("count", "total", "mean", "m2", "minimum", "maximum")
+
+	def __init__(self):
+		"""
+		Default constructor. Nothing observed.
+		"""
+		self.count = 0
+		self.total = 0.0
+		self.mean = 0.0
+		self.m2 = 0.0
+		self.minimum = float("inf")
+		self.maximum = float("-inf")
+
+
+	def add(self, value):
+		"""
+		Records the observation "value".
+
+		Arguments:
+			value			The observed value.
+		"""
+		self.count += 1
+		self.total += value
+		delta = value - self.mean
+		self.mean += delta / self.count
+		self.m2 += delta * (value - self.mean)
+		if value < self.minimum:
+			self.minimum = value
+		if value > self.maximum:
+			self.maximum = value
+
+
+	def merge(self, other):
+		"""
+		Adds the observations of the Observational "other" to this one (Chan's
+		formula for the variance).
+
+		Arguments:
+			other			Another Observational.
+		"""
+		count = self.count + other.count
+		if count == 0:
+			return
+		delta = other.mean - self.mean
+		self.m2 += other.m2 + delta * delta * self.count * other.count / count
+		self.mean += delta * other.count / count
+		self.count = count
+		self.total += other.total
+		self.minimum = min(self.minimum, other.minimum)
+		self.maximum = max(self.maximum, other.maximum)
+
+
+	def getMean(self):
+		"""
+		Returns the mean of the observations, NaN if there is none.
+		"""
+		if self.count == 0:
+			return float("nan")
+		return self.mean
+
+
+	def getVariance(self):
+		"""
+		Returns the sample variance of the observations, NaN if there are less
+		than two.
+		"""
+		if self.count < 2:
+			return float("nan")
+		return self.m2 / (self.count - 1)
+
+
+	def getMinimum(self):
+		"""
+		Returns the min, NaN if there is no observation.
+		"""
+		if self.count == 0:
+			return float("nan")
+		return self.minimum
+
+
+	def getMaximum(self):
+		"""
+		Returns the max, NaN if there is no observation.
+		"""
+		if self.count == 0:
+			return float("nan")
+		return self.maximum
+
+
+class Statistics(object):
+	"""
+	Registry of the accumulators of a simulation. A time-persistent metric is
+	registered with the names of the attributes of the state whose sum is the
+	value of the metric; advance() then updates all of them in one pass.
+	Observational metrics are updated one by one with observe().
+	An instance only holds numbers and names, so it can be pickled and sent
+	between processes, and instances can be merged.
+
+	Attributes:
+		timePersistent	List of tuples (name, attributes, TimePersistent), in
+						the order of registration.
+		accumulators	Dictionary (name, accumulator) of every registered
+						metric.
+	"""
+
+	def __init__(self):
+		"""
+		Default constructor. No metric registered.
+		"""
+		self.timePersistent = []
+		self.accumulators = {}
+
+
+	def registerTimePersistent(self, name, attributes):
+		"""
+		Registers a time-persistent metric.
+
+		Arguments:
+			name			The name of the metric.
+			attributes		Tuple of names of attributes of the state given to
+							advance(). The value of the metric is their sum.
+		"""
+		accumulator = TimePersistent()
+		self.timePersistent.append((name, tuple(attributes), accumulator))
+		self.accumulators[name] = accumulator
+
+
+	def registerObservational(self, name):
+		"""
+		Registers an observational metric.
+
+		Arguments:
+			name			The name of the metric.
+		"""
+		self.accumulators[name] = Observational()
+
+
+	def advance(self, state, duration):
+		"""
+		Records that the state "state" held during "duration". Updates every
+		time-persistent metric.
+
+		Arguments:
+			state			The object whose attributes give the values of the
+							metrics (e.g. a PortState).
+			duration		The time during which the state held.
+		"""
+		for name, attributes, accumulator in self.timePersistent:
+			value = 0
+			for attribute in attributes:
+				value += getattr(state, attribute)
+			accumulator.update(value, duration)
+
+
+	def observe(self, name, value):
+		"""
+		Records an observation of the observational metric "name".
+
+		Arguments:
+			name			The name of the metric.
+			value			The observed value.
+		"""
+		self.accumulators[name].add(value)
+
+
+	def get(self, name):
+		"""
+		Returns the accumulator of the metric "name".
+		"""
+		return self.accumulators[name]
+
+
+	def merge(self, other):
+		"""
+		Merges the accumulators of the Statistics "other" (e.g. of another
+		replication) into this one. Both must have the same metrics.
+
+		Arguments:
+			other			Another Statistics.
+		"""
+		for name, accumulator in self.accumulators.iteritems():
+			accumulator.merge(other.accumulators[name])
@@ -0,0 +1,174 @@
+# -*- coding:utf8 -*-
+
+
+"""============================================================================
+								ENUNCIADO 5
+								PRACTICA 2
+
+	BEURIER Erwan
+	CANAVATE VEGA Fernando
+	DE LA ROSA Augustin
+	NAPOLI Luca
+
+	This file contains the steady-state analysis of one long simulation: the
+	class BatchMeans, that records the averages of the time-persistent
+	metrics over consecutive batches of simulated time, detects the end of
+	the warm-up period with MSER and computes batch-means confidence
+	intervals.
+
+	Useful methods:
+		BatchMeans.advance()
+		BatchMeans.analyze()
+		BatchMeans.printAnalysis()
+	(The rest is supposed to be private, even if Python doesn't know about
+	encapsulation)
+
+	This file is not supposed to be launched via console.
+
+
+============================================================================"""
+
+
+import numpy
+import Replications
+
+
+def mser(values, m = 5):
+	"""
+	Marginal Standard Error Rule (MSER-m). Averages the values by groups of
+	"m", then returns the number of groups to delete at the beginning, d,
+	that minimizes the squared standard error of the mean of the remaining
+	groups: sum((Y_i - mean)^2) / (n - d)^2. d is at most n/2.
+	Returns the number of values (not of groups) to delete.
+
+	Arguments:
+		values			Sequence of floats (e.g. batch averages).
+		m				Size of the groups.
+	"""
+	n = len(values) // m
+	if n < 2:
+		return 0
+	groups = numpy.asarray(values[:n*m], dtype = float).reshape(n, m).mean(axis = 1)
+
+	# Sums and sums of squares of groups[d:], for every d.
+	sums = numpy.cumsum(groups[::-1])[::-1]
+	squares = numpy.cumsum((groups * groups)[::-1])[::-1]
+	remaining = numpy.arange(n, 0, -1, dtype = float)
+	errors = (squares - sums * sums / remaining) / (remaining * remaining)
+
+	d = int(numpy.argmin(errors[:n//2 + 1]))
+	return d * m
+
+
+class BatchMeans:
+	"""
+	Records the averages of some time-persistent metrics over consecutive
+	batches of "batchLength" minutes of simulated time. Port.updateTimes()
+	calls advance() if the port has a BatchMeans (cf.
+	Port.enableSteadyState()).
+
+	Attributes:
+		metrics			List of tuples (name, attributes): the value of the
+						metric "name" is the sum of the attributes of the
+						state, as in Statistics.registerTimePersistent().
+		batchLength		Length of a batch, in minutes.
+		batchEnd		End of the current batch.
+		current			List of the integrals of the metrics over the current
+						batch.
+		batches			List of the averages of the metrics over every
+						finished batch (one list per batch).
+	"""
+
+	def __init__(self, metrics, batchLength = 60.0):
+		"""
+		Constructor.
+
+		Arguments:
+			metrics			List of tuples (name, attributes).
+			batchLength		Length of a batch, in minutes.
+		"""
+		self.metrics = list(metrics)
+		self.batchLength = float(batchLength)
+		self.batchEnd = self.batchLength
+		self.current = [0.0] * len(self.metrics)
+		self.batches = []
+
+
+	def advance(self, state, start, end):
+		"""
+		Records that "state" held between "start" and "end". Closes the batches
+		that end before "end".
+
+		Arguments:
+			state			The object whose attributes give the values of the
+							metrics (e.g. a PortState).
+			start			Beginning of the interval.
+			end				End of the interval.
+		"""
+		values = [sum([getattr(state, attribute) for attribute in attributes]) for name, attributes in self.metrics]
+
+		while end > self.batchEnd:
+			if start < self.batchEnd:
+				for i in xrange(len(values)):
+					self.current[i] += values[i] * (self.batchEnd - start)
+				start = self.batchEnd
+			self.batches.append([integral / self.batchLength for integral in self.current])
+			self.current = [0.0] * len(self.metrics)
+			self.batchEnd += self.batchLength
+
+		for i in xrange(len(values)):
+			self.current[i] += values[i] * (end - start)
+
+
+	def analyze(self, m = 5, numBatches = 20, confidence = 0.95):
+		"""
+		Detects the end of the warm-up with MSER-m on every metric, deletes the
+		longest warm-up from every series, groups the remaining batches into
+		"numBatches" batches and computes the batch-means confidence interval
+		of every metric.
+		Returns a tuple (warmUp, numBatches, summary): the warm-up in minutes,
+		the number of batches actually used (less than "numBatches" if few
+		batches remain after the warm-up), and a dictionary (name, (mean, std,
+		low, high)) where "std" is the standard deviation of the big batches.
+
+		Arguments:
+			m				Size of the groups of MSER.
+			numBatches		Number of batches of the batch-means method.
+			confidence		Level of the confidence intervals.
+		"""
+		series = numpy.array(self.batches, dtype = float).reshape(len(self.batches), len(self.metrics))
+		deleted = max([0] + [mser(series[:, i], m) for i in xrange(len(self.metrics))])
+		kept = series[deleted:]
+
+		numBatches = min(numBatches, len(kept))
+		summary = {}
+		for i, (name, attributes) in enumerate(self.metrics):
+			if numBatches == 0:
+				means = []
+			else:
+				size = len(kept) // numBatches
+				means = kept[:size*numBatches, i].reshape(numBatches, size).mean(axis = 1).tolist()
+			mean, std, halfWidth = Replications.confidenceInterval(means, confidence)
+			summary[name] = (mean, std, mean - halfWidth, mean + halfWidth)
+
+		return deleted * self.batchLength, numBatches, summary
+
+
+	def printAnalysis(self, m = 5, numBatches = 20, confidence = 0.95):
+		"""
+		Prints the results of analyze(), with the number of batches actually
+		used (less than "numBatches" if few batches remain after the warm-up).
+
+		Arguments:
+			m				Size of the groups of MSER.
+			numBatches		Number of batches of the batch-means method.
+			confidence		Level of the confidence intervals.
+		"""
+		warmUp, numBatches, summary = self.analyze(m, numBatches, confidence)
+		print "--------------------------------------------"
+		print "Steady-state analysis (" + str(len(self.batches)) + " batches of " + str(self.batchLength) + " min):"
+		print "End of the warm-up (MSER-" + str(m) + "): " + str(warmUp) + " min."
+		for name, attributes in self.metrics:
+			mean, std, low, high = summary[name]
+			print "Mean " + name + ": " + str(mean) + " [" + str(low) + ", " + str(high) + "] (" + str(int(100*confidence)) + "%, " + str(numBatches) + " batch means)"
+		print "--------------------------------------------"
@@ -0,0 +1,416 @@
+# -*- coding:utf8 -*-
+
+
+"""============================================================================
+								ENUNCIADO 5
+								PRACTICA 2
+
+	BEURIER Erwan
+	CANAVATE VEGA Fernando
+	DE LA ROSA Augustin
+	NAPOLI Luca
+
+	This file contains the implementation of the class Sweep, that simulates
+	the port for every combination of a grid of parameters in a pool of
+	processes, and writes the results in a CSV file as the cells finish.
+
+	Useful methods:
+		run()
+		loadResults()
+		saveNpz()
+	(The rest is supposed to be private, even if Python doesn't know about
+	encapsulation)
+
+	This file can be launched via console:
+		python Sweep.py output.csv [--days d] [--hours h] [--mins m]
+						[--wharves W] [--tugs T] [--safe s] [--muEmpty M]
+						[--sigEmpty S] [--muFull M] [--sigFull S]
+						[--replications n] [--jobs j] [--seed s] [--npz file]
+						[--fast] [--cache directory]
+
+	Arguments:
+		output.csv		The file where the results are written. If it already
+						contains some cells of the grid, they are not simulated
+						again (so a killed sweep can be resumed).
+		--days d		Adds "d" days to the simulation. Default time is set to
+						one week. (Same for --hours and --mins.)
+		--wharves W		The values of the number of wharves. Either a list
+						"10,20,40" or a range "10:40:5" (first:last:step, last
+						included). Default is 20.
+		--tugs T		The values of the number of tugs. Same format. Default
+						is 10.
+		--safe s		"no", "yes" or "both": the values of
+						PortSimulation.SAFEPORT. Default is "no".
+		--muEmpty M		The values of the arguments of Port.__init__(), same
+		--sigEmpty S	format as --wharves. Defaults are the ones of
+		--muFull M		Port.__init__().
+		--sigFull S
+		--replications n	Number of replications of every cell. Default is 1.
+		--jobs j		Number of worker processes. Default is 1.
+		--seed s		Seed of the whole sweep. By default, the seed of the
+						sweep already in "output.csv", or a new one.
+		--npz file		Also saves the whole table in the NumPy file "file"
+						once the sweep is done.
+		--fast			Simulates with FastKernel.FastPort (same results,
+						faster).
+		--cache directory	Takes the cells already simulated by any study
+						from the ResultCache in "directory", and adds the new
+						ones to it.
+
+
+============================================================================"""
+
+
+import csv
+import itertools
+import multiprocessing
+import os
+import sys
+import numpy
+import PortSimulation
+import RandomStreams
+import Replications
+import ResultCache
+
+
+# Columns describing a cell, in the order of the CSV file.
+CELLCOLUMNS = ["maxWharves", "maxTugs", "safe", "muEmpty", "sigEmpty", "muFull",
+				"sigFull", "timeSimulation", "replication", "seed"]
+
+
+def runCell(arguments):
+	"""
+	Simulates one cell of the grid and returns the row of the table: the cell
+	and the results of the simulation (cf. Port.getResults()). Module-level
+	function, so it can be sent to the worker processes.
+
+	Arguments:
+		arguments		Tuple (cell, fast, cache). "cell" is a dictionary
+						(column, value) with the columns of CELLCOLUMNS, "fast"
+						is True to simulate with FastKernel.FastPort, "cache"
+						is a ResultCache.ResultCache or None.
+	"""
+	cell, fast, cache = arguments
+	config = {"maxWharves": cell["maxWharves"],
+				"maxTugs": cell["maxTugs"],
+				"timeSimulation": cell["timeSimulation"],
+				"muEmpty": cell["muEmpty"],
+				"sigEmpty": cell["sigEmpty"],
+				"muFull": cell["muFull"],
+				"sigFull": cell["sigFull"]
+				}
+	record = Replications.runReplication((config, cell["safe"], cell["seed"], fast, cache))
+	row = dict(cell)
+	for name, label, unit in PortSimulation.RESULTS:
+		row[name] = record[name]
+	return row
+
+
+class Sweep:
+	"""
+	Simulates the port for every combination of the given values of the
+	parameters. Every finished cell is appended to a CSV file, one row per
+	cell and replication.
+
+	Attributes:
+		path			The CSV file of the results.
+		timeSimulation	The duration of every simulation (in minutes).
+		values			Dictionary (parameter, list of values) for the
+						parameters of the grid (maxWharves, maxTugs, safe,
+						muEmpty, sigEmpty, muFull, sigFull).
+		replications	Number of replications of every cell.
+		jobs			Number of worker processes.
+		seed			Seed of the whole sweep.
+		fast			True to simulate with FastKernel.FastPort.
+		cache			ResultCache.ResultCache, or None.
+	"""
+
+	def __init__(self, path, timeSimulation, maxWharves, maxTugs, safe = (False,), muEmpty = (2,), sigEmpty = (1,), muFull = (10,), sigFull = (3,), replications = 1, jobs = 1, seed = None, fast = False, cache = None):
+		"""
+		Constructor. Every parameter of the grid is a list of values.
+
+		Arguments:
+			path			The CSV file of the results.
+			timeSimulation	The duration of every simulation (in minutes).
+			maxWharves		List of the numbers of wharves.
+			maxTugs			List of the numbers of tugs.
+			safe			List of the values of PortSimulation.SAFEPORT.
+			muEmpty, sigEmpty, muFull, sigFull
+							Lists of the values of the arguments of
+							Port.__init__().
+			replications	Number of replications of every cell.
+			jobs			Number of worker processes.
+			seed			Integer. Seed of the whole sweep: every cell gets
+							its own stream spawned from it. None to take the
+							seed of the sweep already in "path" (to resume it),
+							or to draw a new seed from the system.
+			fast			True to simulate with FastKernel.FastPort (same
+							results, faster).
+			cache			ResultCache.ResultCache, or None. The cells in the
+							cache are not simulated again.
+		"""
+		self.path = path
+		self.timeSimulation = timeSimulation
+		self.values = {"maxWharves": list(maxWharves),
+						"maxTugs": list(maxTugs),
+						"safe": list(safe),
+						"muEmpty": list(muEmpty),
+						"sigEmpty": list(sigEmpty),
+						"muFull": list(muFull),
+						"sigFull": list(sigFull)
+						}
+		self.replications = replications
+		self.jobs = jobs
+		if seed is None:
+			seed = Sweep.readSeed(path)
+		if seed is None:
+			seed = RandomStreams.newSeed()
+		self.seed = seed
+		self.fast = fast
+		self.cache = cache
+
+
+	def getCells(self):
+		"""
+		Returns the list of the cells of the grid (one per combination and per
+		replication), as dictionaries (column, value). The order, and thus the
+		seeds, only depend on the values given to the constructor.
+		"""
+		names = CELLCOLUMNS[:7]
+		combinations = list(itertools.product(*[self.values[name] for name in names]))
+		numCells = len(combinations) * self.replications
+		seeds = Replications.Replications.replicationSeeds(self.seed, numCells)
+
+		cells = []
+		for combination in combinations:
+			for replication in xrange(self.replications):
+				cell = dict(zip(names, combination))
+				cell["timeSimulation"] = self.timeSimulation
+				cell["replication"] = replication
+				cell["seed"] = seeds[len(cells)]
+				cells.append(cell)
+		return cells
+
+
+	def run(self):
+		"""
+		Simulates every cell that is not already in the CSV file, and appends
+		the rows to the file as soon as the cells are done. Returns the number
+		of simulated cells.
+		"""
+		done = Sweep.readDoneCells(self.path)
+		cells = [cell for cell in self.getCells() if Sweep.cellKey(cell) not in done]
+		columns = CELLCOLUMNS + [name for name, label, unit in PortSimulation.RESULTS]
+
+		newFile = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+		output = open(self.path, "ab")
+		writer = csv.DictWriter(output, columns)
+		if newFile:
+			writer.writerow(dict(zip(columns, columns)))
+			output.flush()
+
+		pool = None
+		if self.jobs > 1:
+			pool = multiprocessing.Pool(self.jobs)
+			rows = pool.imap_unordered(runCell, [(cell, self.fast, self.cache) for cell in cells], 1)
+		else:
+			rows = itertools.imap(runCell, [(cell, self.fast, self.cache) for cell in cells])
+
+		try:
+			for row in rows:
+				writer.writerow(row)
+				output.flush()
+		finally:
+			output.close()
+			if pool is not None:
+				pool.terminate()
+				pool.join()
+		return len(cells)
+
+
+
+
+	"""========================================================================
+	Below these two lines are functions that are not crucial to the
+	understanding of the code.
+	========================================================================"""
+
+	@staticmethod
+	def cellKey(cell):
+		"""
+		Returns the key identifying a cell, as written in the CSV file (the csv
+		module writes the floats with repr()).
+
+		Arguments:
+			cell			Dictionary (column, value) of the cell.
+		"""
+		return tuple(repr(cell[column]) for column in CELLCOLUMNS)
+
+
+	@staticmethod
+	def readDoneCells(path):
+		"""
+		Returns the set of the keys of the cells already in the CSV file.
+		An incomplete last line (the sweep was killed while writing it) is
+		removed from the file.
+
+		Arguments:
+			path			The CSV file of the results.
+		"""
+		if not os.path.exists(path):
+			return set()
+
+		content = open(path, "rb").read()
+		if not content.endswith("\n"):
+			output = open(path, "r+b")
+			output.truncate(content.rfind("\n") + 1)
+			output.close()
+
+		done = set()
+		for row in csv.DictReader(open(path, "rb")):
+			if None not in row.values():
+				done.add(tuple(row[column] for column in CELLCOLUMNS))
+		return done
+
+
+	@staticmethod
+	def readSeed(path):
+		"""
+		Returns the seed of the sweep whose results are in the CSV file: the
+		first integer of the seed of its first row (the seeds of the cells are
+		the keys of the child streams of the seed of the sweep, cf.
+		getCells()). None if the file has no row.
+
+		Arguments:
+			path			The CSV file of the results.
+		"""
+		if not os.path.exists(path):
+			return None
+		for row in csv.DictReader(open(path, "rb")):
+			if row.get("seed"):
+				return int(row["seed"].strip("[]").split(",")[0])
+		return None
+
+
+	@staticmethod
+	def loadResults(path):
+		"""
+		Loads the CSV file of a sweep. Returns a dictionary (column, numpy
+		array). "safe" is an array of booleans, "seed" an array of strings
+		(the keys of the random streams, cf. RandomStreams), everything else
+		is an array of floats (NaN for undefined values).
+
+		Arguments:
+			path			The CSV file of the results.
+		"""
+		rows = list(csv.DictReader(open(path, "rb")))
+		columns = CELLCOLUMNS + [name for name, label, unit in PortSimulation.RESULTS]
+		table = {}
+		for column in columns:
+			if column == "safe":
+				table[column] = numpy.array([row[column] == "True" for row in rows])
+			elif column == "seed":
+				table[column] = numpy.array([row[column] for row in rows])
+			else:
+				table[column] = numpy.array([Sweep.toFloat(row[column]) for row in rows])
+		return table
+
+
+	@staticmethod
+	def saveNpz(path, npzPath):
+		"""
+		Saves the CSV file of a sweep as a NumPy .npz file, one array per
+		column.
+
+		Arguments:
+			path			The CSV file of the results.
+			npzPath			The .npz file to write.
+		"""
+		numpy.savez(npzPath, **Sweep.loadResults(path))
+
+
+	@staticmethod
+	def toFloat(text):
+		"""
+		Converts a value of the CSV file to a float. NaN if it is not a number.
+		"""
+		try:
+			return float(text)
+		except ValueError:
+			return float("nan")
+
+
+	@staticmethod
+	def parseValues(text):
+		"""
+		Reads a list of values given in the console: either "a,b,c" or
+		"first:last:step" (last included). The values are integers if they
+		all look like integers, floats otherwise.
+
+		Arguments:
+			text			The string to read.
+		"""
+		convert = float
+		if "." not in text:
+			convert = int
+
+		if ":" in text:
+			bounds = [convert(x) for x in text.split(":")]
+			first, last = bounds[0], bounds[1]
+			step = convert(1)
+			if len(bounds) > 2:
+				step = bounds[2]
+			values = []
+			while first <= last + 1e-9:
+				values.append(first)
+				first += step
+			return values
+
+		return [convert(x) for x in text.split(",")]
+
+
+
+
+"""============================================================================
+	M 	  M       A 	  II	NN     N
+	MM	 MM      A A	  II   	N N    N
+	M M	M M     A   A	  II   	N  N   N
+	M  M  M     AAAAA	  II   	N   N  N
+	M	  M    A     A	  II	N    N N
+	M 	  M	  A       A   II	N     NN
+============================================================================"""
+
+if __name__=="__main__":
+	path = sys.argv[1]
+	time = 0
+	values = {"maxWharves": [20], "maxTugs": [10], "safe": [False]}
+	options = {"replications": 1, "jobs": 1, "seed": None, "npz": None, "fast": "--fast" in sys.argv, "cache": None}
+	names = {"--wharves": "maxWharves", "--tugs": "maxTugs", "--muEmpty": "muEmpty",
+			"--sigEmpty": "sigEmpty", "--muFull": "muFull", "--sigFull": "sigFull"}
+
+	for i in xrange(2, len(sys.argv) - 1):
+		if sys.argv[i] == "--days":
+			time += int(sys.argv[i+1])*60*24
+		elif sys.argv[i] == "--hours":
+			time += int(sys.argv[i+1])*60
+		elif sys.argv[i] == "--mins":
+			time += int(sys.argv[i+1])
+		elif sys.argv[i] in names:
+			values[names[sys.argv[i]]] = Sweep.parseValues(sys.argv[i+1])
+		elif sys.argv[i] == "--safe":
+			values["safe"] = {"no": [False], "yes": [True], "both": [False, True]}[sys.argv[i+1]]
+		elif sys.argv[i] in ("--replications", "--jobs", "--seed"):
+			options[sys.argv[i][2:]] = int(sys.argv[i+1])
+		elif sys.argv[i] == "--npz":
+			options["npz"] = sys.argv[i+1]
+		elif sys.argv[i] == "--cache":
+			options["cache"] = ResultCache.ResultCache(sys.argv[i+1])
+
+	if time == 0:
+		time = 24*60*7 #Default value, just in case.
+
+	sweep = Sweep(path, time, replications = options["replications"], jobs = options["jobs"], seed = options["seed"], fast = options["fast"], cache = options["cache"], **values)
+	print "Sweep starting (seed " + str(sweep.seed) + "): " + str(len(sweep.getCells())) + " cells."
+	print "Sweep done: " + str(sweep.run()) + " cells simulated."
+	if options["npz"] is not None:
+		Sweep.saveNpz(path, options["npz"])
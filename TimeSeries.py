@@ -0,0 +1,314 @@
+# -*- coding:utf8 -*-
+
+
+"""============================================================================
+								ENUNCIADO 5
+								PRACTICA 2
+
+	BEURIER Erwan
+	CANAVATE VEGA Fernando
+	DE LA ROSA Augustin
+	NAPOLI Luca
+
+	This file contains the implementation of the class StateRecorder, that
+	records the curves of the state of the port (entrance queue, oil tankers
+	inside, occupied wharves, free tugs) over the simulated time, in a
+	bounded memory whatever the duration of the simulation, and their
+	average profile over the time of the day.
+
+	Useful methods:
+		advance()
+		getSeries()
+		getProfile()
+		save()
+		printProfile()
+	(The rest is supposed to be private, even if Python doesn't know about
+	encapsulation)
+
+	This file is not supposed to be launched via console.
+
+
+============================================================================"""
+
+
+import numpy
+import ArrivalProcess
+
+
+DAY = 24*60
+
+# The curves recorded by a Port (cf. Port.enableTimeSeries()), in the order
+# of the values given to advance():
+#	waiting			Oil tankers in the queue at the entrance.
+#	inside			Oil tankers inside the port.
+#	wharves			Occupied wharves (unloading or waiting for a tug).
+#	freeTugs		Free tugs.
+SERIES = ["waiting", "inside", "wharves", "freeTugs"]
+
+
+class StateRecorder:
+	"""
+	Records piecewise-constant curves in buckets of simulated time: for every
+	bucket, the time-weighted mean, the minimum and the maximum of every
+	curve. The buckets are preallocated NumPy arrays of "capacity" rows.
+	When the simulation goes past the last bucket, the buckets are merged two
+	by two and their width doubles, so that the memory stays the same for any
+	duration (the resolution decreases instead).
+	At the same time, the integrals of the curves are accumulated by time of
+	the day (bins of "profileStep" minutes), for the average daily profile.
+	advance() is called at every event: it accumulates the current bucket and
+	the current bin in lists of floats, and only writes them in the arrays
+	when the time moves to the next bucket or bin (cf. flush()).
+
+	Attributes:
+		names			List of the names of the curves.
+		width			Width of a bucket, in minutes. Starts at "step".
+		capacity		Number of buckets.
+		integrals		Array (capacity, curves) of the integrals of the
+						curves over every bucket.
+		minimum			Array (capacity, curves) of the minima.
+		maximum			Array (capacity, curves) of the maxima.
+		length			Number of buckets in use.
+		end				Latest time recorded: the curves are recorded
+						between 0 and "end".
+		profileStep		Width of a bin of the daily profile, in minutes.
+		profileIntegrals	Array (bins, curves) of the integrals of the
+						curves over every bin of the day, over all the days.
+		profileDurations	Array (bins) of the time recorded in every bin.
+		bucket			Index of the current bucket, or None.
+		bucketIntegrals, bucketMinimum, bucketMaximum
+						Lists of the integrals, minima and maxima of the
+						curves over the current bucket, not yet in the arrays.
+		bin				Index of the current bin of the profile since the
+						beginning (not modulo one day), or None.
+		binIntegrals	List of the integrals of the curves over the current
+						bin, not yet in the arrays.
+		binDuration		Time recorded in the current bin.
+	"""
+
+	def __init__(self, names = SERIES, step = 10.0, capacity = 4096, profileStep = 60.0):
+		"""
+		Constructor.
+
+		Arguments:
+			names			List of the names of the curves.
+			step			Initial width of a bucket, in minutes.
+			capacity		Number of buckets (even).
+			profileStep		Width of a bin of the daily profile, in minutes.
+							Must divide one day.
+		"""
+		if DAY % profileStep != 0:
+			raise Exception("The bins of the daily profile (" + str(profileStep) + " min) must divide one day.")
+		self.names = list(names)
+		self.width = float(step)
+		self.capacity = capacity + capacity % 2
+		self.integrals = numpy.zeros((self.capacity, len(self.names)))
+		self.minimum = numpy.empty((self.capacity, len(self.names)))
+		self.minimum.fill(numpy.inf)
+		self.maximum = numpy.empty((self.capacity, len(self.names)))
+		self.maximum.fill(-numpy.inf)
+		self.length = 0
+		self.end = 0.0
+		self.profileStep = float(profileStep)
+		self.profileIntegrals = numpy.zeros((int(DAY / profileStep), len(self.names)))
+		self.profileDurations = numpy.zeros(int(DAY / profileStep))
+		self.bucket = None
+		self.bin = None
+
+
+	def advance(self, values, start, end):
+		"""
+		Records that the curves had the values "values" between "start" and
+		"end". The clock of the port can go back a little (a travel time,
+		drawn from a normal law, can be negative): the time already recorded
+		is not recorded again.
+
+		Arguments:
+			values			Sequence of the values of the curves, in the order
+							of self.names.
+			start			Beginning of the interval.
+			end				End of the interval.
+		"""
+		start = max(start, self.end)
+		if end <= start:
+			return
+		self.end = end
+		numCurves = len(values)
+
+		t = start
+		while t < end:
+			j = int(t // self.width)
+			if (j + 1) * self.width <= t: # Rounding.
+				j += 1
+			if j != self.bucket:
+				self.flushBucket()
+				if j >= self.capacity:
+					self.merge()
+					continue
+				self.bucket = j
+				self.bucketIntegrals = [0.0] * numCurves
+				self.bucketMinimum = list(values)
+				self.bucketMaximum = list(values)
+			stop = min(end, (j + 1) * self.width)
+			duration = stop - t
+			integrals = self.bucketIntegrals
+			minimum = self.bucketMinimum
+			maximum = self.bucketMaximum
+			for i in xrange(numCurves):
+				value = values[i]
+				integrals[i] += value * duration
+				if value < minimum[i]:
+					minimum[i] = value
+				if value > maximum[i]:
+					maximum[i] = value
+			t = stop
+
+		t = start
+		while t < end:
+			k = int(t // self.profileStep)
+			if (k + 1) * self.profileStep <= t: # Rounding.
+				k += 1
+			if k != self.bin:
+				self.flushBin()
+				self.bin = k
+				self.binIntegrals = [0.0] * numCurves
+				self.binDuration = 0.0
+			stop = min(end, (k + 1) * self.profileStep)
+			duration = stop - t
+			integrals = self.binIntegrals
+			for i in xrange(numCurves):
+				integrals[i] += values[i] * duration
+			self.binDuration += duration
+			t = stop
+
+
+	def flush(self):
+		"""
+		Writes the current bucket and the current bin in the arrays. Called
+		by getSeries() and getProfile(), it can also be called at any time.
+		"""
+		self.flushBucket()
+		self.flushBin()
+
+
+	def getSeries(self):
+		"""
+		Returns a dictionary (column, numpy array) with one row per bucket in
+		use: "time" is the beginning of the bucket, and for every curve
+		"name", "nameMean", "nameMin" and "nameMax" are its time-weighted
+		mean, its minimum and its maximum over the bucket. The last bucket is
+		only averaged over the time recorded.
+		"""
+		self.flush()
+		n = self.length
+		time = numpy.arange(n) * self.width
+		durations = numpy.empty(n)
+		durations.fill(self.width)
+		if n > 0:
+			durations[-1] = self.end - time[-1]
+		series = {"time": time}
+		for i, name in enumerate(self.names):
+			series[name + "Mean"] = self.integrals[:n, i] / durations
+			series[name + "Min"] = self.minimum[:n, i].copy()
+			series[name + "Max"] = self.maximum[:n, i].copy()
+		return series
+
+
+	def getProfile(self):
+		"""
+		Returns a dictionary (column, numpy array) with one row per bin of
+		the day: "timeOfDay" is the beginning of the bin (in minutes since
+		0h), "arrivalRate" the rate of arrivals of ArrivalProcess (oil
+		tankers per hour) in the middle of the bin, and every curve its mean
+		over this time of the day, across all the days (NaN if the bin was
+		never recorded).
+		"""
+		self.flush()
+		timeOfDay = numpy.arange(len(self.profileDurations)) * self.profileStep
+		profile = {"timeOfDay": timeOfDay,
+					"arrivalRate": numpy.array([ArrivalProcess.rate(t + self.profileStep / 2) for t in timeOfDay])}
+		durations = numpy.where(self.profileDurations > 0, self.profileDurations, numpy.nan)
+		for i, name in enumerate(self.names):
+			profile[name] = self.profileIntegrals[:, i] / durations
+		return profile
+
+
+	def save(self, path):
+		"""
+		Saves the curves (cf. getSeries()) and the daily profile (cf.
+		getProfile(), the columns prefixed with "profile") in the NumPy file
+		"path".
+
+		Arguments:
+			path			The .npz file.
+		"""
+		content = self.getSeries()
+		for column, values in self.getProfile().iteritems():
+			content["profile" + column[0].upper() + column[1:]] = values
+		numpy.savez(path, **content)
+
+
+	def printProfile(self):
+		"""
+		Prints the daily profile: the rate of arrivals and the mean of every
+		curve by time of the day.
+		"""
+		profile = self.getProfile()
+		print "--------------------------------------------"
+		print "Daily profile (means over " + ("%.1f" % (self.profileDurations.sum() / DAY)) + " days):"
+		print "%-8s %12s" % ("Time", "Arrivals/h") + "".join("%12s" % name for name in self.names)
+		for b in xrange(len(profile["timeOfDay"])):
+			t = int(profile["timeOfDay"][b])
+			print "%02d:%02d    %12.2f" % (t // 60, t % 60, profile["arrivalRate"][b]) + "".join("%12.2f" % profile[name][b] for name in self.names)
+		print "--------------------------------------------"
+
+
+
+
+	"""========================================================================
+	Below these two lines are functions that are not crucial to the
+	understanding of the code.
+	========================================================================"""
+
+	def flushBucket(self):
+		"""
+		Adds the current bucket to the arrays. There is no current bucket
+		afterwards.
+		"""
+		if self.bucket is None:
+			return
+		j = self.bucket
+		self.integrals[j] += self.bucketIntegrals
+		numpy.minimum(self.minimum[j], self.bucketMinimum, self.minimum[j])
+		numpy.maximum(self.maximum[j], self.bucketMaximum, self.maximum[j])
+		self.length = max(self.length, j + 1)
+		self.bucket = None
+
+
+	def flushBin(self):
+		"""
+		Adds the current bin of the profile to the arrays. There is no
+		current bin afterwards.
+		"""
+		if self.bin is None:
+			return
+		b = self.bin % len(self.profileDurations)
+		self.profileIntegrals[b] += self.binIntegrals
+		self.profileDurations[b] += self.binDuration
+		self.bin = None
+
+
+	def merge(self):
+		"""
+		Merges the buckets two by two: the width doubles and half of the
+		buckets become free. Supposed to be called without current bucket.
+		"""
+		half = self.capacity // 2
+		self.integrals[:half] = self.integrals[0::2] + self.integrals[1::2]
+		self.minimum[:half] = numpy.minimum(self.minimum[0::2], self.minimum[1::2])
+		self.maximum[:half] = numpy.maximum(self.maximum[0::2], self.maximum[1::2])
+		self.integrals[half:] = 0.0
+		self.minimum[half:] = numpy.inf
+		self.maximum[half:] = -numpy.inf
+		self.length = (self.length + 1) // 2
+		self.width *= 2
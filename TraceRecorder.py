@@ -0,0 +1,189 @@
+# -*- coding:utf8 -*-
+
+
+"""============================================================================
+								ENUNCIADO 5
+								PRACTICA 2
+
+	BEURIER Erwan
+	CANAVATE VEGA Fernando
+	DE LA ROSA Augustin
+	NAPOLI Luca
+
+	This file contains the implementation of the class TraceRecorder, that
+	records every event dispatched by Port.simulate() in binary column files,
+	and of the functions to read them back.
+
+	Useful methods:
+		record()
+		flush()
+		close()
+		load()
+		replay()
+	(The rest is supposed to be private, even if Python doesn't know about
+	encapsulation)
+
+	This file is not supposed to be launched via console.
+
+	Vocabulary (because the code is in English but the wording is in Spanish):
+		tug 		= remolcador
+		oil tanker	= petrolero
+		wharf 		= muelle
+
+
+============================================================================"""
+
+
+import json
+import os
+import numpy
+import ListEvents
+
+
+# The columns of a trace: name and type. One file "name.bin" per column.
+COLUMNS = [("code", numpy.uint8), # Index of the event in ListEvents.EVENTS.
+			("time", numpy.float64),
+			("tanker", numpy.int64), # Id of the oil tanker, -1 if none.
+			("waiting", numpy.int32),
+			("inside", numpy.int32),
+			("atWharf", numpy.int32),
+			("doneUnloading", numpy.int32),
+			("freeTugs", numpy.int32)]
+
+# Codes of the events, cf. ListEvents.EVENTS.
+EVENTCODES = dict((event, code) for code, event in enumerate(ListEvents.EVENTS))
+
+
+def load(directory):
+	"""
+	Loads a trace. Returns a dictionary (column, numpy array). The arrays are
+	memory-mapped on the files of the trace (read-only), so nothing is copied
+	and traces bigger than the memory can be analysed.
+
+	Arguments:
+		directory		The directory of the trace.
+	"""
+	header = json.load(open(os.path.join(directory, "header.json")))
+	columns = {}
+	for name, dtype in header["columns"]:
+		if header["count"] == 0:
+			columns[name] = numpy.zeros(0, dtype = dtype)
+		else:
+			columns[name] = numpy.memmap(os.path.join(directory, name + ".bin"), dtype = dtype, mode = "r", shape = (header["count"],))
+	return columns
+
+
+def replay(directory):
+	"""
+	Generator over the records of a trace, in the order in which they were
+	recorded. Each record is a dictionary (column, value), with the name of
+	the event instead of its code.
+
+	Arguments:
+		directory		The directory of the trace.
+	"""
+	columns = load(directory)
+	names = [name for name, dtype in COLUMNS]
+	for i in xrange(len(columns["code"])):
+		record = dict((name, columns[name][i].item()) for name in names)
+		record["event"] = ListEvents.EVENTS[record.pop("code")]
+		yield record
+
+
+class TraceRecorder:
+	"""
+	Records the events dispatched by a Port in a preallocated buffer. When the
+	buffer is full, each column is appended to its own binary file. A small
+	JSON header gives the types of the columns and the number of records.
+
+	Attributes:
+		directory		The directory of the trace.
+		buffer			Preallocated numpy structured array of "chunkSize"
+						records.
+		size			Number of records in the buffer.
+		count			Number of records written in the files.
+		files			Dictionary (column, open file).
+	"""
+
+	def __init__(self, directory, chunkSize = 65536):
+		"""
+		Constructor. Creates the directory and empty column files (an existing
+		trace in the same directory is overwritten).
+
+		Arguments:
+			directory		The directory of the trace.
+			chunkSize		Number of records kept in memory before being
+							written to the files.
+		"""
+		self.directory = directory
+		if not os.path.isdir(directory):
+			os.makedirs(directory)
+		self.buffer = numpy.zeros(chunkSize, dtype = COLUMNS)
+		self.size = 0
+		self.count = 0
+		self.files = dict((name, open(os.path.join(directory, name + ".bin"), "wb")) for name, dtype in COLUMNS)
+		self.writeHeader()
+
+
+	def record(self, event, time, oilTanker, state, freeTugs):
+		"""
+		Records an event.
+
+		Arguments:
+			event			The name of the event.
+			time			The time of the event.
+			oilTanker		The concerned oil tanker, or None.
+			state			The PortState of the port.
+			freeTugs		The number of free tugs.
+		"""
+		tanker = -1
+		if oilTanker is not None:
+			tanker = oilTanker.id
+		self.buffer[self.size] = (EVENTCODES[event], time, tanker, state.waiting, state.inside,
+									state.atWharf, state.doneUnloading, freeTugs)
+		self.size += 1
+		if self.size == len(self.buffer):
+			self.flush()
+
+
+	def flush(self):
+		"""
+		Appends the records of the buffer to the column files, and updates the
+		header.
+		"""
+		if self.size > 0:
+			for name, dtype in COLUMNS:
+				self.buffer[name][:self.size].tofile(self.files[name])
+				self.files[name].flush()
+			self.count += self.size
+			self.size = 0
+		self.writeHeader()
+
+
+	def close(self):
+		"""
+		Flushes the buffer and closes the files.
+		"""
+		self.flush()
+		for f in self.files.itervalues():
+			f.close()
+
+
+
+
+	"""========================================================================
+	Below these two lines are functions that are not crucial to the
+	understanding of the code.
+	========================================================================"""
+
+	def writeHeader(self):
+		"""
+		Writes the header of the trace: the columns, their types and the
+		number of records written in the files.
+		"""
+		header = {"columns": [(name, numpy.dtype(dtype).str) for name, dtype in COLUMNS],
+					"count": self.count,
+					"events": list(ListEvents.EVENTS)}
+		f = open(os.path.join(self.directory, "header.json"), "w")
+		json.dump(header, f)
+		f.close()
@@ -0,0 +1,203 @@
+# -*- coding:utf8 -*-
+
+
+"""============================================================================
+								ENUNCIADO 5
+								PRACTICA 2
+
+	BEURIER Erwan
+	CANAVATE VEGA Fernando
+	DE LA ROSA Augustin
+	NAPOLI Luca
+
+	This file contains the implementation of the class TugPool, the fleet of
+	tugs of the port: the state of every tug (idle, travelling empty, towing
+	an oil tanker), the time it spent in every state, and the idle tugs
+	ready to be dispatched.
+
+	Useful methods:
+		acquire()
+		setState()
+		release()
+		getUtilization()
+		getMeanUtilization()
+		printUtilization()
+	(The rest is supposed to be private, even if Python doesn't know about
+	encapsulation)
+
+	This file is not supposed to be launched via console.
+
+	Vocabulary (because the code is in English but the wording is in Spanish):
+		tug 		= remolcador
+		oil tanker	= petrolero
+		wharf 		= muelle
+
+
+============================================================================"""
+
+
+import numpy
+
+
+# The states of a tug. The index of a state in STATES is its integer code.
+#	idle			At the port, waiting to be dispatched.
+#	empty			Travelling empty to the entrance or to a wharf.
+#	towing			Towing an oil tanker to a wharf or out of the port.
+#	lost			Towed an oil tanker that found no free wharf (cf.
+#					Port.routineArrivalOilTankerWharf()): the tug never
+#					becomes available again.
+STATES = ("idle", "empty", "towing", "lost")
+IDLE = STATES.index("idle")
+EMPTY = STATES.index("empty")
+TOWING = STATES.index("towing")
+LOST = STATES.index("lost")
+
+
+class TugPool:
+	"""
+	The tugs are numbered from 0 to size - 1. The idle tugs are kept in a
+	stack (list), so that dispatching a tug (acquire()) or making it idle
+	again (release()) is in O(1) whatever the size of the fleet, and the
+	number of free tugs is len(idle).
+	Every change of state adds the time spent in the previous state to the
+	time of this state for this tug, so the times are up to date at the
+	last change of every tug (getUtilization() adds the current state).
+	The events of the tugs carry their number (cf. ListEvents.addEvent()).
+
+	Attributes:
+		size			Number of tugs.
+		idle			List (stack) of the numbers of the idle tugs. The
+						last one is the next one to be dispatched.
+		state			List of the states of the tugs (codes of STATES).
+		since			List of the times of the last change of state of the
+						tugs.
+		times			List, indexed by the codes of STATES, of the lists of
+						the times spent by the tugs in this state (in
+						minutes), until their last change of state.
+		tows			List of the number of oil tankers towed by every tug
+						(in or out of the port).
+	"""
+
+	def __init__(self, size):
+		"""
+		Constructor. All the tugs are idle at time 0.
+
+		Arguments:
+			size			Number of tugs.
+		"""
+		self.size = size
+		self.idle = range(size - 1, -1, -1) # Tug 0 is dispatched first.
+		self.state = [IDLE] * size
+		self.since = [0.0] * size
+		self.times = [[0.0] * size for state in STATES]
+		self.tows = [0] * size
+
+
+	def acquire(self, time):
+		"""
+		Dispatches an idle tug: it leaves empty at "time". Returns its
+		number. There must be an idle tug.
+
+		Arguments:
+			time			The current time.
+		"""
+		tug = self.idle.pop()
+		self.times[IDLE][tug] += time - self.since[tug]
+		self.state[tug] = EMPTY
+		self.since[tug] = time
+		return tug
+
+
+	def setState(self, tug, state, time):
+		"""
+		Changes the state of a tug that is not idle (cf. release() to make
+		it idle).
+
+		Arguments:
+			tug				The number of the tug.
+			state			Its new state (code of STATES).
+			time			The current time.
+		"""
+		self.times[self.state[tug]][tug] += time - self.since[tug]
+		self.state[tug] = state
+		self.since[tug] = time
+		if state == TOWING:
+			self.tows[tug] += 1
+
+
+	def release(self, tug, time):
+		"""
+		Makes a tug idle: it can be dispatched again.
+
+		Arguments:
+			tug				The number of the tug.
+			time			The current time.
+		"""
+		self.times[self.state[tug]][tug] += time - self.since[tug]
+		self.state[tug] = IDLE
+		self.since[tug] = time
+		self.idle.append(tug)
+
+
+	def getUtilization(self, time):
+		"""
+		Returns a dictionary (column, numpy array) with one row per tug:
+		"tug" is its number, then the time it spent in every state of
+		STATES until "time" (in minutes, including its current state),
+		"tows" the number of oil tankers it towed, and "utilization" the
+		fraction of its time in service (not lost) during which it was
+		travelling empty or towing (NaN if no time in service).
+
+		Arguments:
+			time			The end of the period, usually the clock of the
+							port.
+		"""
+		utilization = {"tug": numpy.arange(self.size),
+						"tows": numpy.array(self.tows)}
+		for code, name in enumerate(STATES):
+			utilization[name] = numpy.array(self.times[code], dtype = float)
+		current = time - numpy.array(self.since, dtype = float)
+		for tug in xrange(self.size):
+			utilization[STATES[self.state[tug]]][tug] += current[tug]
+		busy = utilization["empty"] + utilization["towing"]
+		total = busy + utilization["idle"]
+		utilization["utilization"] = numpy.where(total > 0, busy / numpy.where(total > 0, total, 1.0), numpy.nan)
+		return utilization
+
+
+	def getMeanUtilization(self, time):
+		"""
+		Returns the mean utilization of the tugs until "time" (cf.
+		getUtilization()), NaN if there is no tug or no time.
+
+		Arguments:
+			time			The end of the period.
+		"""
+		utilization = self.getUtilization(time)["utilization"]
+		utilization = utilization[~numpy.isnan(utilization)]
+		if len(utilization) == 0:
+			return float("nan")
+		return float(utilization.mean())
+
+
+	def printUtilization(self, time):
+		"""
+		Prints the time spent by every tug in every state, in percentage of
+		the time, and the fleet average.
+
+		Arguments:
+			time			The end of the period, usually the clock of the
+							port.
+		"""
+		utilization = self.getUtilization(time)
+		share = 0.0 # Percentage of the time per minute.
+		if time > 0:
+			share = 100.0 / time
+		print "--------------------------------------------"
+		print "Utilization of the tugs (" + str(self.size) + " tugs, " + str(len(self.idle)) + " idle now):"
+		print "%-6s" % "Tug" + "".join("%10s" % name for name in STATES) + "%8s %12s" % ("Tows", "Utilization")
+		for tug in xrange(self.size):
+			print "%-6d" % tug + "".join("%9.1f%%" % (share * utilization[name][tug]) for name in STATES) + "%8d %11.1f%%" % (utilization["tows"][tug], 100 * utilization["utilization"][tug])
+		if self.size > 0:
+			print "%-6s" % "Mean" + "".join("%9.1f%%" % (share * utilization[name].mean()) for name in STATES) + "%8.1f %11.1f%%" % (utilization["tows"].mean(), 100 * self.getMeanUtilization(time))
+		print "--------------------------------------------"
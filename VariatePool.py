@@ -0,0 +1,86 @@
+# -*- coding:utf8 -*-
+
+
+"""============================================================================
+								ENUNCIADO 5
+								PRACTICA 2
+
+	BEURIER Erwan
+	CANAVATE VEGA Fernando
+	DE LA ROSA Augustin
+	NAPOLI Luca
+
+	This file contains the implementation of the class VariatePool.
+
+	Useful methods:
+		draw()
+	(The rest is supposed to be private, even if Python doesn't know about
+	encapsulation)
+
+	This file is not supposed to be launched via console.
+
+
+============================================================================"""
+
+
+import numpy
+
+
+class VariatePool:
+	"""
+	Supplies random variates one by one, but draws them by blocks with NumPy.
+	Calling scipy.stats or the module random once per variate is slow, drawing
+	a whole block at once is not.
+	The distribution is given by the name of a method of
+	numpy.random.RandomState (e.g. "chisquare" or "normal") and its arguments,
+	so the instance can be pickled.
+
+	Attributes:
+		distribution	Name of the method of numpy.random.RandomState to use.
+		args			Tuple of arguments given to this method (without the
+						size).
+		blockSize		Number of variates drawn at each refill.
+		randomState		The numpy.random.RandomState used to draw the variates.
+		block			List of the variates of the current block.
+		index			Index in "block" of the next variate to hand out.
+	"""
+
+	def __init__(self, distribution, args, blockSize = 4096, seed = None):
+		"""
+		Constructor. The first block is drawn at the first call to draw().
+
+		Arguments:
+			distribution	Name of the method of numpy.random.RandomState to
+							use, e.g. "chisquare".
+			args			Tuple of arguments of the distribution, e.g. (3,).
+			blockSize		Number of variates drawn at each refill.
+			seed			Seed of the numpy.random.RandomState. Anything
+							numpy accepts as a seed (an integer or a list of
+							integers). None to seed from the system.
+		"""
+		self.distribution = distribution
+		self.args = tuple(args)
+		self.blockSize = blockSize
+		self.randomState = numpy.random.RandomState(seed)
+		self.block = []
+		self.index = 0
+
+
+	def draw(self):
+		"""
+		Returns the next variate, as a Python float. Refills the block if it
+		has been used up.
+		"""
+		if self.index >= len(self.block):
+			self.refill()
+		self.index += 1
+		return self.block[self.index - 1]
+
+
+	def refill(self):
+		"""
+		Draws a new block of "blockSize" variates.
+		"""
+		sampler = getattr(self.randomState, self.distribution)
+		self.block = sampler(*self.args, size = self.blockSize).tolist()
+		self.index = 0
@@ -14,10 +14,22 @@
 	and prints the results.
 	
 	This file is supposed to be launched via console:
-		python main.py [debug] [log] [safe] [--days d] [--hours h] [--mins m]
-						[--tugs t] [--wharves w]
+		python main.py [debug] [log] [pause] [safe] [--days d] [--hours h] [--mins m]
+						[--tugs t] [--wharves w] [--replications n] [--jobs j]
+						[--trace directory] [--checkpoint file] 
+						[--checkpoint-events k] [--checkpoint-seconds s]
+						[--resume file] [--steady-state] [--batch-length b]
+						[--precision p] [--max-replications N] [--metrics a,b]
+						[--seed s] [--profile] [--fast] [--export file]
+						[--series file] [--cache directory] [--tug-usage]
 	Or: 
-		python main.py [debug] [log] [safe] [-d d] [-h h] [-m m] [-t t] [-w w]
+		python main.py [debug] [log] [pause] [safe] [-d d] [-h h] [-m m] [-t t] [-w w]
+						[-r n] [-j j] [--trace directory] [--checkpoint file] 
+						[--checkpoint-events k] [--checkpoint-seconds s]
+						[--resume file] [--steady-state] [--batch-length b]
+						[--precision p] [--max-replications N] [--metrics a,b]
+						[--seed s] [--profile] [--fast] [--export file]
+						[--series file] [--cache directory] [--tug-usage]
 		
 	(Or any combination of both)
 	
@@ -28,6 +40,10 @@
 						(see PortSimulation.simulate()).
 		log 			The string "log". If present, will print the complete state 
 						of the port at each iteration.
+		pause			The string "pause". If present, interrupts the execution 
+						when an oil tanker is lost while the port is blocked, or 
+						when an oil tanker stayed very long in the port (cf. 
+						Hooks.Pauses). Implied by "debug".
 		safe 			The string "safe". If present, the file will use the safe 
 						mode of the Port. It means that the tugs give priority to 
 						the oil tankers at the wharves over the ones in the entrance.
@@ -41,12 +57,87 @@
 		-t t 			Other version of "--tugs t".
 		--wharves w		Sets the number of wharves to "w". Default number is 20.
 		-w w			Other version of "--wharves w".
+		--replications n	Runs "n" independent replications instead of a 
+						single simulation, and prints the confidence intervals 
+						of the results. 
+		-r n 			Other version of "--replications n".
+		--jobs j 		Number of processes running the replications. Default 
+						number is 1.
+		-j j 			Other version of "--jobs j".
+		--trace directory	Records every event of the simulation in binary 
+						files in "directory" (cf. TraceRecorder.load() to read 
+						them). Ignored with "--replications".
+		--checkpoint file	Saves the whole state of the simulation in "file" 
+						regularly, so that it can be resumed if it is killed. 
+						Ignored with "--replications".
+		--checkpoint-events k	Saves every "k" events. 
+		--checkpoint-seconds s	Saves every "s" seconds (wall-clock time). 
+						Default is 60 if neither this nor "--checkpoint-events" 
+						is given.
+		--resume file 	Continues the simulation saved in "file" (by 
+						"--checkpoint"). The time, tugs, wharves and "safe" are 
+						the ones of the saved simulation. The results are the 
+						same as if the simulation had never been interrupted.
+		--steady-state	Also prints a steady-state analysis of the time-
+						persistent metrics: end of the warm-up (MSER-5) and 
+						batch-means confidence intervals. Ignored with 
+						"--replications" and "--resume".
+		--batch-length b	Length (in minutes) of the batches of the 
+						steady-state analysis. Default is 60.
+		--precision p	Runs replications until the relative half-width of 
+						the 95% confidence interval of every selected result 
+						is at most "p" (e.g. 0.02 for +/-2%), instead of a 
+						fixed number. Starts with "--replications" 
+						replications (at least 10 by default).
+		--max-replications N	Budget of "--precision". Default is 1000.
+		--metrics a,b	Results selected by "--precision" (names of 
+						PortSimulation.RESULTS, separated by commas). Default 
+						is meanTimeOilTankerInside.
+		--seed s		Master seed (integer) of the simulation or of the 
+						replications: every random source and every 
+						replication gets its own stream spawned from it, so 
+						the results are the same for any "--jobs". By default 
+						a new seed is drawn and printed, so that the run can 
+						be reproduced.
+		--profile		Times every type of event and the main methods of the 
+						port, and prints them sorted by time. Ignored with 
+						"--replications".
+		--fast			Simulates with FastKernel.FastPort: same results, 
+						faster, but no debug, log, pauses, trace, checkpoint, 
+						resume, steady-state analysis, profile nor time series 
+						(a single simulation refuses them, the replications 
+						ignore them).
+		--export file	Also saves the record of the simulation (or one 
+						record per replication) in "file": configuration, 
+						counters and results. The format is given by the 
+						extension: .csv, .jsonl or .npz (cf. Records).
+		--series file	Records the curves of the entrance queue, of the oil 
+						tankers inside, of the occupied wharves and of the 
+						free tugs in the NumPy file "file", and prints their 
+						mean by hour of the day (cf. TimeSeries). Ignored 
+						with "--replications" and "--resume".
+		--cache directory	With "--replications" or "--precision", takes 
+						the replications already simulated (same 
+						configuration, seed and model) from the ResultCache 
+						in "directory", and adds the new ones to it.
+		--tug-usage		Prints the time spent by every tug idle, travelling 
+						empty, towing or lost, its number of tows and its 
+						utilization (cf. TugPool). Ignored with 
+						"--replications".
 		
 
 ============================================================================"""
 
 
 import PortSimulation
+import Profiler
+import Records
+import Checkpoint
+import FastKernel
+import Replications
+import ResultCache
+import SequentialStopping
+import TraceRecorder
 import time
 import sys
 
@@ -55,7 +146,8 @@ import sys
 def readArgs(argv):
 	"""
 	Function that reads the command line arguments and returns what it reads, 
-	in terms of times, number of tugs and number of wharves.
+	in terms of times, number of tugs and number of wharves, as a dictionary 
+	of options.
 	
 	Arguments: 
 		argv		Supposed to be sys.argv.
@@ -70,9 +162,32 @@ def readArgs(argv):
 	if "log" in argv:
 		PortSimulation.LOGPORT = True
 		argv.remove("log")
+	if "pause" in argv:
+		PortSimulation.PAUSEPORT = True
+		argv.remove("pause")
 	
-	wharves = 20
-	tugs = 10
+	options = {"wharves": 20,
+				"tugs": 10,
+				"replications": 1,
+				"jobs": 1,
+				"trace": None,
+				"checkpoint": None,
+				"checkpointEvents": None,
+				"checkpointSeconds": None,
+				"resume": None,
+				"steadyState": False,
+				"batchLength": 60.0,
+				"precision": None,
+				"maxReplications": 1000,
+				"metrics": ["meanTimeOilTankerInside"],
+				"seed": None,
+				"profile": False,
+				"fast": False,
+				"export": None,
+				"series": None,
+				"cache": None,
+				"tugUsage": False
+				}
 	time = 0
 	timeChanged = False
 	
@@ -91,15 +206,82 @@ def readArgs(argv):
 			timeChanged = True 
 		elif argv[i] == "--tugs" or argv[i] == "-t":
 			i += 1
-			tugs = int(sys.argv[i])
+			options["tugs"] = int(sys.argv[i])
 		elif argv[i] == "--wharves" or argv[i] == "-w":
 			i += 1
-			wharves = int(sys.argv[i])
+			options["wharves"] = int(sys.argv[i])
+		elif argv[i] == "--replications" or argv[i] == "-r":
+			i += 1
+			options["replications"] = int(argv[i])
+		elif argv[i] == "--jobs" or argv[i] == "-j":
+			i += 1
+			options["jobs"] = int(argv[i])
+		elif argv[i] == "--trace":
+			i += 1
+			options["trace"] = argv[i]
+		elif argv[i] == "--checkpoint":
+			i += 1
+			options["checkpoint"] = argv[i]
+		elif argv[i] == "--checkpoint-events":
+			i += 1
+			options["checkpointEvents"] = int(argv[i])
+		elif argv[i] == "--checkpoint-seconds":
+			i += 1
+			options["checkpointSeconds"] = float(argv[i])
+		elif argv[i] == "--steady-state":
+			options["steadyState"] = True
+		elif argv[i] == "--batch-length":
+			i += 1
+			options["batchLength"] = float(argv[i])
+		elif argv[i] == "--precision":
+			i += 1
+			options["precision"] = float(argv[i])
+		elif argv[i] == "--max-replications":
+			i += 1
+			options["maxReplications"] = int(argv[i])
+		elif argv[i] == "--metrics":
+			i += 1
+			options["metrics"] = argv[i].split(",")
+		elif argv[i] == "--profile":
+			options["profile"] = True
+		elif argv[i] == "--fast":
+			options["fast"] = True
+		elif argv[i] == "--export":
+			i += 1
+			options["export"] = argv[i]
+		elif argv[i] == "--series":
+			i += 1
+			options["series"] = argv[i]
+		elif argv[i] == "--cache":
+			i += 1
+			options["cache"] = ResultCache.ResultCache(argv[i])
+		elif argv[i] == "--tug-usage":
+			options["tugUsage"] = True
+		elif argv[i] == "--seed":
+			i += 1
+			options["seed"] = int(argv[i])
+		elif argv[i] == "--resume":
+			i += 1
+			options["resume"] = argv[i]
 	
 	if not timeChanged:
 		time = 24*60*7 #Default value, just in case.
+	options["time"] = time
 	
-	return wharves, tugs, time
+	if options["fast"] and options["replications"] == 1 and options["precision"] is None:
+		# FastKernel.FastPort has none of these (the replications ignore them).
+		unsupported = [name for name, used in (("debug", PortSimulation.ISDEBUG), 
+					("log", PortSimulation.LOGPORT), ("pause", PortSimulation.PAUSEPORT), 
+					("--trace", options["trace"] is not None), ("--checkpoint", options["checkpoint"] is not None), 
+					("--resume", options["resume"] is not None), ("--steady-state", options["steadyState"]), 
+					("--profile", options["profile"]), ("--series", options["series"] is not None)) if used]
+		if unsupported:
+			print "Error: --fast can't be used with " + ", ".join(unsupported) + "."
+			print "Usage: python main.py --fast [--days d] [--hours h] [--mins m] [--tugs t] [--wharves w] [--seed s] [--export file] [--tug-usage]"
+			print "(or remove --fast, cf. the header of main.py)"
+			sys.exit(2)
+	
+	return options
 			
 
 
@@ -115,21 +297,95 @@ def readArgs(argv):
 
 if __name__=="__main__":
 	try:
-		wharves, tugs, tiempo = readArgs(sys.argv)
+		options = readArgs(sys.argv)
 	except IndexError:
 		print "Error: something went wrong with the arguments."
+		sys.exit(2)
+	
+	if options["precision"] is not None:
+		config = {"maxWharves": options["wharves"],
+					"maxTugs": options["tugs"],
+					"timeSimulation": options["time"]
+					}
+		initial = options["replications"]
+		if initial == 1:
+			initial = 10
+		try:
+			replications = SequentialStopping.SequentialReplications(config, options["metrics"], options["precision"], initial, options["maxReplications"], options["jobs"], options["seed"], safe = PortSimulation.SAFEPORT, fast = options["fast"], cache = options["cache"])
+		except Exception as e:
+			print e
+			sys.exit(2)
+		print "Initialisation done (seed " + str(replications.seed) + "). Replications starting, until a relative half-width of " + str(options["precision"]) + "."
+		t = time.time()
+		replications.run()
+		t = time.time() - t
+		print "Replications done in " + str(t) + " seconds."
+		replications.printSummary()
+		if options["export"] is not None:
+			Records.save(replications.results, options["export"])
+		sys.exit()
+	
+	if options["replications"] > 1:
+		config = {"maxWharves": options["wharves"],
+					"maxTugs": options["tugs"],
+					"timeSimulation": options["time"]
+					}
+		replications = Replications.Replications(config, options["replications"], options["jobs"], options["seed"], safe = PortSimulation.SAFEPORT, fast = options["fast"], cache = options["cache"])
+		print "Initialisation done (seed " + str(replications.seed) + "). " + str(options["replications"]) + " replications starting."
+		t = time.time()
+		replications.run()
+		t = time.time() - t
+		print "Replications done in " + str(t) + " seconds."
+		replications.printSummary()
+		if options["export"] is not None:
+			Records.save(replications.results, options["export"])
+		sys.exit()
 	
-	#port = PortSimulation.Port(20, 10, 60*24*7)
-	port = PortSimulation.Port(wharves, tugs, tiempo)
-	#
+	trace = None
+	if options["trace"] is not None:
+		trace = TraceRecorder.TraceRecorder(options["trace"])
+	
+	if options["resume"] is not None:
+		port = Checkpoint.load(options["resume"])
+		port.trace = trace
+		print "Checkpoint loaded. Simulation resuming at " + PortSimulation.minutesToTime(port.time) + "."
+	else:
+		#port = PortSimulation.Port(20, 10, 60*24*7)
+		if options["fast"]:
+			port = FastKernel.FastPort(options["wharves"], options["tugs"], options["time"], seed = options["seed"])
+			port.trace = trace
+		else:
+			port = PortSimulation.Port(options["wharves"], options["tugs"], options["time"], seed = options["seed"], trace = trace)
+		#
+		if options["steadyState"]:
+			port.enableSteadyState(options["batchLength"])
+		if options["series"] is not None:
+			port.enableTimeSeries()
+		print "Initialisation done (seed " + str(port.seed) + "). Simulation starting."
+	
+	if options["checkpoint"] is not None:
+		if options["checkpointEvents"] is None and options["checkpointSeconds"] is None:
+			options["checkpointSeconds"] = 60
+		port.checkpoint = Checkpoint.Checkpointer(options["checkpoint"], options["checkpointEvents"], options["checkpointSeconds"])
+	
+	if options["profile"]:
+		port.profiler = Profiler.Profiler()
 	
-	print "Initialisation done. Simulation starting."
 	t = time.clock()
-	port.simulate()
+	record = port.simulate()
 	t = time.clock() - t
 	print "Simulation done in " + str(t) + " seconds."
+	if trace is not None:
+		trace.close()
 	port.printResults()
-	
-	
-	
-	
\ No newline at end of file
+	if port.steadyState is not None:
+		port.steadyState.printAnalysis()
+	if port.timeSeries is not None and options["series"] is not None:
+		port.timeSeries.save(options["series"])
+		port.timeSeries.printProfile()
+	if options["tugUsage"]:
+		port.tugs.printUtilization(port.time)
+	if port.profiler is not None:
+		port.profiler.printHotSpots()
+	if options["export"] is not None:
+		Records.save([record], options["export"])
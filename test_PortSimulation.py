@@ -0,0 +1,86 @@
+# -*- coding:utf8 -*-
+
+
+"""============================================================================
+								ENUNCIADO 5
+								PRACTICA 2
+
+	BEURIER Erwan
+	CANAVATE VEGA Fernando
+	DE LA ROSA Augustin
+	NAPOLI Luca
+
+	This file contains the regression tests of the class Port: with a fixed
+	seed, the sequence of the events dispatched by simulate() (event, time,
+	id of the oil tanker) must stay the same, in a normal port and in an
+	overloaded one, with both policies of the tugs. The SHA-1 of every
+	sequence is compared with the value recorded in SEQUENCES. A change that
+	is supposed to modify the simulation must record the new values.
+
+	This file is supposed to be launched via console:
+		python -m unittest test_PortSimulation
+
+
+============================================================================"""
+
+
+import hashlib
+import unittest
+import PortSimulation
+
+
+# The configurations (maxWharves, maxTugs, days, seed, SAFEPORT) and the
+# SHA-1 of their sequences of events.
+SEQUENCES = [((20, 10, 7, 1, False), "8924345ed100805d32a8bbba0c1d7320f8bcccc8"),
+			((5, 2, 7, 2, False), "1bf0e9362097afdfc3bf7065e82deae3aaefdc45"),
+			((20, 10, 7, 3, True), "4e4c0736f2f8bc31e55d41a1733d268082857881"),
+			((5, 2, 7, 4, True), "eb0e926813f5c70ec5215863446bf641bad8240b")]
+
+
+def hashEvents(maxWharves, maxTugs, days, seed, safe):
+	"""
+	Simulates the port and returns the SHA-1 (hexadecimal) of the sequence of
+	the events it dispatched: the repr() of the tuples (event, time, id of
+	the oil tanker or -1), as returned by ListEvents.getNextEvent().
+
+	Arguments:
+		maxWharves		The number of wharves.
+		maxTugs			The number of tugs.
+		days			The duration of the simulation, in days.
+		seed			The seed of the simulation.
+		safe			The value of PortSimulation.SAFEPORT.
+	"""
+	digest = hashlib.sha1()
+	previous = PortSimulation.SAFEPORT, PortSimulation.BATCHMODE
+	PortSimulation.SAFEPORT = safe
+	PortSimulation.BATCHMODE = True
+	try:
+		port = PortSimulation.Port(maxWharves, maxTugs, days*24*60, seed = seed)
+		getNextEvent = port.listEvents.getNextEvent
+		def record():
+			nextEvent = getNextEvent()
+			tanker = -1
+			if nextEvent[2] is not None:
+				tanker = nextEvent[2].id
+			digest.update(repr((nextEvent[0], nextEvent[1], tanker)))
+			return nextEvent
+		port.listEvents.getNextEvent = record
+		port.simulate()
+	finally:
+		PortSimulation.SAFEPORT, PortSimulation.BATCHMODE = previous
+	return digest.hexdigest()
+
+
+class TestEventSequence(unittest.TestCase):
+	"""
+	Compares the sequences of events with SEQUENCES.
+	"""
+
+	def test_sequences(self):
+		for configuration, expected in SEQUENCES:
+			self.assertEqual(hashEvents(*configuration), expected, "Sequence of events changed for " + str(configuration))
+
+
+	def test_sameSeedSameSequence(self):
+		configuration = SEQUENCES[1][0]
+		self.assertEqual(hashEvents(*configuration), hashEvents(*configuration))